@@ -0,0 +1,57 @@
+"""Alert endpoints"""
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.db.session import get_db
+from app.models.alert import UserAlert, UserAlertPreferences
+from app.schemas.alert import (
+    UserAlertResponse, AlertPreferencesUpdate, AlertPreferencesResponse
+)
+from app.core.security import get_current_user
+from app.core.auth_cache import Principal
+from app.services.alerts.subscriptions import subscription_index
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[UserAlertResponse])
+async def list_alerts(
+    unread_only: bool = False,
+    limit: int = 50,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List current user's alerts"""
+    query = select(UserAlert).where(UserAlert.user_id == current_user.id)
+    if unread_only:
+        query = query.where(UserAlert.is_read == False)
+    
+    result = await db.execute(query.order_by(UserAlert.created_at.desc()).limit(limit))
+    return result.scalars().all()
+
+
+@router.put("/preferences", response_model=AlertPreferencesResponse)
+async def update_preferences(
+    update: AlertPreferencesUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Update current user's alert preferences"""
+    preferences = await db.get(UserAlertPreferences, current_user.id)
+    if preferences is None:
+        preferences = UserAlertPreferences(user_id=current_user.id, alert_types={})
+        db.add(preferences)
+    
+    for field, value in update.model_dump(exclude_unset=True).items():
+        setattr(preferences, field, value)
+    
+    await db.commit()
+    await db.refresh(preferences)
+    
+    # Other workers pick this up through SubscriptionIndex.refresh()
+    if update.alert_types is not None:
+        subscription_index.upsert_user(current_user.id, alert_types=preferences.alert_types)
+    
+    return preferences
@@ -1,72 +1,98 @@
 """Analytics endpoints"""
 
-from fastapi import APIRouter, Depends
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import Optional
+from typing import List, Optional
+from uuid import UUID
 
-from app.db.session import get_db
-from app.models.user import User
+from app.db.session import get_read_db
 from app.models.platform import Campaign
-from app.models.profile import PlatformProfile
 from app.core.security import get_current_user
+from app.core.auth_cache import Principal
+from app.core.cache import cached_json, cached_response, platform_scope
+from app.schemas.profile import LeaderboardEntry
+from app.services import dashboard, leaderboard
+from app.utils.fields import parse_fields
 
 router = APIRouter()
 
 
 @router.get("/dashboard-stats")
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get dashboard statistics"""
     
-    # Total active campaigns
-    campaign_count = await db.execute(
-        select(func.count()).select_from(Campaign).where(Campaign.status == 'active')
-    )
-    total_campaigns = campaign_count.scalar()
-    
-    # User's average rank (if they have profiles)
-    wallet_ids = [w.id for w in current_user.wallets]
-    if wallet_ids:
-        avg_rank_query = await db.execute(
-            select(func.avg(PlatformProfile.global_rank)).where(
-                PlatformProfile.user_wallet_id.in_(wallet_ids),
-                PlatformProfile.global_rank.isnot(None)
-            )
+    # Total active campaigns, shared with the campaign list's cached count
+    async def load_total_campaigns():
+        result = await db.execute(
+            select(func.count()).select_from(Campaign).where(Campaign.status == 'active')
         )
-        avg_rank = avg_rank_query.scalar() or 0
-    else:
-        avg_rank = 0
+        return result.scalar()
+    
+    count_params = {"platform_id": None, "status": "active"}
+    total_campaigns = json.loads(await cached_json("campaign_count", count_params, load_total_campaigns))
+    
+    # Per-user aggregates are precomputed by ingestion
+    stats = await dashboard.get_dashboard_stats(db, current_user.id)
     
     return {
         "totalCampaigns": total_campaigns,
-        "avgRank": int(avg_rank) if avg_rank else None,
-        "shillScore": 0,  # Placeholder
-        "estimatedValue": 0  # Placeholder
+        "avgRank": stats.avg_rank,
+        "shillScore": float(stats.shill_score) if stats.shill_score is not None else 0,
+        "estimatedValue": float(stats.estimated_value_usd or 0)
     }
 
 
-@router.get("/leaderboard/global")
+@router.get("/leaderboard/global", response_model=List[LeaderboardEntry])
 async def get_global_leaderboard(
+    request: Request,
     platform_id: Optional[int] = None,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of entry fields"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get global leaderboard"""
     
-    query = select(PlatformProfile).where(
-        PlatformProfile.global_rank.isnot(None)
-    )
+    selected = parse_fields(fields, LeaderboardEntry)
     
-    if platform_id:
-        query = query.where(PlatformProfile.platform_id == platform_id)
+    async def load():
+        return await leaderboard.get_top(db, platform_id, limit, selected)
     
-    query = query.order_by(PlatformProfile.global_rank).limit(limit)
+    params = {"platform_id": platform_id, "limit": limit, "fields": selected}
+    return await cached_response("leaderboard", params, load, scopes=[platform_scope(platform_id)], request=request)
+
+
+@router.get("/leaderboard/{platform_id}/rank/{profile_id}")
+async def get_leaderboard_rank(
+    platform_id: int,
+    profile_id: UUID,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a profile's rank and position on a platform leaderboard"""
     
-    result = await db.execute(query)
-    profiles = result.scalars().all()
+    standing = await leaderboard.get_standing(db, platform_id, profile_id)
+    if standing is None:
+        raise HTTPException(status_code=404, detail="Profile not ranked on this platform")
     
-    return profiles
+    return {"profile_id": profile_id, "platform_id": platform_id, **standing}
+
 
+@router.get("/leaderboard/{platform_id}/around/{profile_id}")
+async def get_leaderboard_neighborhood(
+    platform_id: int,
+    profile_id: UUID,
+    k: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the leaderboard entries around a profile"""
+    
+    entries = await leaderboard.get_neighborhood(db, platform_id, profile_id, k)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="Profile not ranked on this platform")
+    
+    return entries
@@ -11,10 +11,12 @@ from app.schemas.user import (
     TokenResponse, WalletLogin, UserWalletCreate
 )
 from app.core.security import (
-    get_password_hash, verify_password,
-    create_access_token, create_refresh_token,
-    verify_wallet_signature, get_current_user
+    create_access_token, create_refresh_token, get_current_user
 )
+from app.core import crypto
+from app.core.auth_cache import Principal, invalidate_principals
+from app.services.dashboard import refresh_dashboard_stats
+from app.services.identity import link_user_wallet, normalize_wallet, resolve_identities
 
 router = APIRouter()
 
@@ -44,7 +46,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     user = User(
         email=user_data.email,
         username=user_data.username,
-        password_hash=get_password_hash(user_data.password) if user_data.password else None
+        password_hash=await crypto.hash_password(user_data.password) if user_data.password else None
     )
     
     db.add(user)
@@ -69,7 +71,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    if not await crypto.verify_password(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -100,7 +102,7 @@ async def wallet_login(wallet_data: WalletLogin, db: AsyncSession = Depends(get_
     """Login with Web3 wallet signature"""
     
     # Verify signature
-    if not verify_wallet_signature(
+    if not await crypto.verify_wallet_signature(
         wallet_data.wallet_address,
         wallet_data.message,
         wallet_data.signature
@@ -129,6 +131,16 @@ async def wallet_login(wallet_data: WalletLogin, db: AsyncSession = Depends(get_
             verified_at=datetime.utcnow()
         )
         db.add(wallet)
+        await db.flush()
+        
+        # Link the verified wallet to any crawled profiles that share its address
+        await resolve_identities(db, [[
+            ("user_wallet", str(wallet.id)),
+            ("wallet", normalize_wallet(wallet.wallet_address)),
+        ]])
+        await link_user_wallet(db, wallet.id, wallet.wallet_address)
+        await db.flush()
+        await refresh_dashboard_stats(db, [user.id])
         await db.commit()
         await db.refresh(wallet)
     
@@ -146,17 +158,18 @@ async def wallet_login(wallet_data: WalletLogin, db: AsyncSession = Depends(get_
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get current user info"""
     return current_user
 
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def logout(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """Logout user"""
     # Delete user sessions
     await db.execute(delete(UserSession).where(UserSession.user_id == current_user.id))
     await db.commit()
+    await invalidate_principals([current_user.id])
     
     return {"message": "Logged out successfully"}
 
@@ -1,62 +1,118 @@
 """Campaign endpoints"""
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, or_
+from sqlalchemy.orm import selectinload
 from typing import Optional
 from uuid import UUID
+from datetime import datetime
+import json
 
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models.platform import Campaign
 from app.schemas.platform import CampaignResponse, CampaignListResponse
+from app.core.cache import cached_response, cached_json, platform_scope
+from app.utils.pagination import encode_cursor, decode_cursor, estimate_count
 
 router = APIRouter()
 
 
 @router.get("/", response_model=CampaignListResponse)
 async def list_campaigns(
+    request: Request,
     platform_id: Optional[int] = None,
     status: Optional[str] = Query("active", regex="^(active|ended|upcoming)$"),
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100),
+    count: str = Query("exact", regex="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List campaigns with filters"""
-    
-    # Build query
-    query = select(Campaign)
-    
-    if platform_id:
-        query = query.where(Campaign.platform_id == platform_id)
-    if status:
-        query = query.where(Campaign.status == status)
+    """
+    List campaigns with filters
+
+    Pass the returned ``next_cursor`` as ``cursor`` to page in constant time;
+    ``skip`` is kept for the first pages of existing clients. ``count`` picks
+    an exact total (computed once per crawl and cached), the planner's
+    estimate, or no total at all.
+    """
     
-    # Get total count
-    count_query = select(func.count()).select_from(Campaign)
+    filters = []
     if platform_id:
-        count_query = count_query.where(Campaign.platform_id == platform_id)
+        filters.append(Campaign.platform_id == platform_id)
     if status:
-        count_query = count_query.where(Campaign.status == status)
+        filters.append(Campaign.status == status)
+    scopes = [platform_scope(platform_id)]
     
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    async def load_total():
+        total_result = await db.execute(select(func.count()).select_from(Campaign).where(*filters))
+        return total_result.scalar()
     
-    # Get campaigns
-    query = query.offset(skip).limit(limit).order_by(Campaign.discovered_at.desc())
-    result = await db.execute(query)
-    campaigns = result.scalars().all()
+    async def load():
+        # Build query
+        query = select(Campaign).options(selectinload(Campaign.platform)).where(*filters)
+        
+        if cursor:
+            discovered_at, last_id = decode_cursor(cursor, 2)
+            try:
+                last_id = UUID(last_id)
+                discovered_at = datetime.fromisoformat(discovered_at) if discovered_at is not None else None
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if discovered_at is None:
+                # Rows without discovered_at come first, so the rest all follow
+                query = query.where(or_(
+                    Campaign.discovered_at.is_not(None),
+                    Campaign.discovered_at.is_(None) & (Campaign.id < last_id)
+                ))
+            else:
+                query = query.where(tuple_(Campaign.discovered_at, Campaign.id) < (discovered_at, last_id))
+        elif skip:
+            query = query.offset(skip)
+        
+        # Get campaigns, plus one row to tell whether another page exists
+        query = query.order_by(Campaign.discovered_at.desc().nulls_first(), Campaign.id.desc()).limit(limit + 1)
+        result = await db.execute(query)
+        campaigns = result.scalars().all()
+        
+        next_cursor = None
+        if len(campaigns) > limit:
+            campaigns = campaigns[:limit]
+            next_cursor = encode_cursor(campaigns[-1].discovered_at, campaigns[-1].id)
+        
+        # Get total count
+        total = None
+        if count == "exact":
+            count_params = {"platform_id": platform_id, "status": status}
+            total = json.loads(await cached_json("campaign_count", count_params, load_total, scopes=scopes))
+        elif count == "estimate":
+            total = await estimate_count(db, select(Campaign.id).where(*filters))
+        
+        return CampaignListResponse(
+            total=total,
+            total_is_estimate=count == "estimate",
+            page=None if cursor else skip // limit + 1,
+            page_size=limit,
+            next_cursor=next_cursor,
+            campaigns=[CampaignResponse.model_validate(c) for c in campaigns]
+        )
     
-    return {
-        "total": total,
-        "page": skip // limit + 1,
-        "page_size": limit,
-        "campaigns": campaigns
+    params = {
+        "platform_id": platform_id, "status": status, "cursor": cursor,
+        "skip": skip, "limit": limit, "count": count,
     }
+    return await cached_response("campaigns", params, load, scopes=scopes, request=request)
 
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
-async def get_campaign(campaign_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_campaign(campaign_id: UUID, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Get campaign by ID"""
-    campaign = await db.get(Campaign, campaign_id)
-    return campaign
-
+    
+    async def load():
+        campaign = await db.get(Campaign, campaign_id, options=[selectinload(Campaign.platform)])
+        if campaign is None:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        return CampaignResponse.model_validate(campaign)
+    
+    return await cached_response("campaign", {"id": campaign_id}, load, request=request)
@@ -0,0 +1,111 @@
+"""Bulk export endpoints"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, func
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+from app.models.platform import Campaign, CampaignParticipation
+from app.models.profile import PlatformProfile
+from app.models.twitter import TwitterProfile, TwitterEngagement
+from app.core.security import get_current_user
+from app.core.auth_cache import Principal
+from app.services.exports import export_response
+from app.services.identity import normalize_twitter_handle
+
+router = APIRouter()
+
+FORMAT_PATTERN = "^(ndjson|csv)$"
+
+
+@router.get("/leaderboard")
+async def export_leaderboard(
+    platform_id: Optional[int] = None,
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream every ranked profile"""
+    
+    query = select(
+        PlatformProfile.id,
+        PlatformProfile.platform_id,
+        PlatformProfile.username,
+        PlatformProfile.display_name,
+        PlatformProfile.twitter_handle,
+        PlatformProfile.total_points,
+        PlatformProfile.global_rank,
+        PlatformProfile.level,
+        PlatformProfile.last_synced_at,
+    ).where(PlatformProfile.global_rank.isnot(None))
+    
+    if platform_id:
+        query = query.where(PlatformProfile.platform_id == platform_id)
+    
+    query = query.order_by(PlatformProfile.platform_id, PlatformProfile.global_rank)
+    return export_response(query, format, "leaderboard")
+
+
+@router.get("/participation")
+async def export_participation(
+    campaign_id: Optional[UUID] = None,
+    platform_id: Optional[int] = None,
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream campaign participation records"""
+    
+    query = select(
+        CampaignParticipation.campaign_id,
+        Campaign.platform_id,
+        CampaignParticipation.platform_profile_id,
+        CampaignParticipation.points_earned,
+        CampaignParticipation.rank,
+        CampaignParticipation.completion_percentage,
+        CampaignParticipation.quests_completed,
+        CampaignParticipation.quests_total,
+        CampaignParticipation.first_activity_at,
+        CampaignParticipation.last_activity_at,
+    ).join(Campaign, Campaign.id == CampaignParticipation.campaign_id)
+    
+    if campaign_id:
+        query = query.where(CampaignParticipation.campaign_id == campaign_id)
+    if platform_id:
+        query = query.where(Campaign.platform_id == platform_id)
+    
+    query = query.order_by(CampaignParticipation.campaign_id, CampaignParticipation.rank)
+    return export_response(query, format, "participation")
+
+
+@router.get("/engagement")
+async def export_engagement(
+    twitter_handle: Optional[str] = None,
+    since: Optional[datetime] = None,
+    format: str = Query("ndjson", regex=FORMAT_PATTERN),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream Twitter engagement history"""
+    
+    query = select(
+        TwitterProfile.twitter_handle,
+        TwitterEngagement.tweet_id,
+        TwitterEngagement.posted_at,
+        TwitterEngagement.likes_count,
+        TwitterEngagement.retweets_count,
+        TwitterEngagement.replies_count,
+        TwitterEngagement.quotes_count,
+        TwitterEngagement.is_platform_related,
+        TwitterEngagement.related_platforms,
+        TwitterEngagement.sentiment,
+        TwitterEngagement.tweet_text,
+    ).join(TwitterProfile, TwitterProfile.id == TwitterEngagement.twitter_profile_id)
+    
+    if twitter_handle:
+        query = query.where(
+            func.lower(TwitterProfile.twitter_handle) == normalize_twitter_handle(twitter_handle)
+        )
+    if since:
+        query = query.where(TwitterEngagement.posted_at >= since)
+    
+    query = query.order_by(TwitterEngagement.posted_at)
+    return export_response(query, format, "engagement")
@@ -1,26 +1,30 @@
 """Platform endpoints"""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models.platform import Platform
 from app.schemas.platform import PlatformResponse
+from app.core.cache import cached_response
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[PlatformResponse])
 async def list_platforms(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all platforms"""
-    result = await db.execute(
-        select(Platform).where(Platform.is_active == True).offset(skip).limit(limit)
-    )
-    platforms = result.scalars().all()
-    return platforms
-
+    
+    async def load():
+        result = await db.execute(
+            select(Platform).where(Platform.is_active == True).offset(skip).limit(limit)
+        )
+        return [PlatformResponse.model_validate(p) for p in result.scalars().all()]
+    
+    return await cached_response("platforms", {"skip": skip, "limit": limit}, load, request=request)
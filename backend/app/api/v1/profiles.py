@@ -1,34 +1,144 @@
 """Profile endpoints"""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import List, Optional
 
-from app.db.session import get_db
-from app.models.user import User
+from app.db.session import get_db, get_read_db
 from app.models.profile import PlatformProfile
+from app.schemas.profile import (
+    PlatformProfileResponse, ShillScoreSummary, ProfileLookupRequest, ProfileLookupResponse, BULK_LOOKUP_LIMIT
+)
 from app.core.security import get_current_user
+from app.core.auth_cache import Principal
+from app.core.responses import FastJSONResponse
+from app.services.identity import (
+    normalize_wallet, normalize_twitter_handle, get_linked_profiles,
+    bulk_lookup_profiles, latest_shill_scores
+)
+from app.utils.fields import parse_fields, load_only_fields, project
 
 router = APIRouter()
 
 
-@router.get("/me")
+@router.get("/me", response_model=List[PlatformProfileResponse])
 async def get_my_profiles(
-    current_user: User = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of profile fields"),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get current user's platform profiles"""
     
-    # Get all wallets for this user
-    wallet_ids = [w.id for w in current_user.wallets]
+    selected = parse_fields(fields, PlatformProfileResponse)
     
-    # Get all profiles linked to those wallets
+    # Get all profiles linked to the user's wallets, loading only the selected columns
     result = await db.execute(
-        select(PlatformProfile).where(
-            PlatformProfile.user_wallet_id.in_(wallet_ids)
-        )
+        select(PlatformProfile)
+        .options(load_only_fields(PlatformProfile, selected))
+        .where(PlatformProfile.user_wallet_id.in_(current_user.wallet_ids))
     )
     profiles = result.scalars().all()
     
-    return profiles
+    return FastJSONResponse([project(p, selected) for p in profiles])
+
+
+@router.get("/linked", response_model=List[PlatformProfileResponse])
+async def get_linked(
+    wallet_address: Optional[str] = None,
+    twitter_handle: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get every platform profile resolved to the same person"""
+    
+    if wallet_address:
+        key = ("wallet", normalize_wallet(wallet_address))
+    elif twitter_handle:
+        key = ("twitter", normalize_twitter_handle(twitter_handle))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="wallet_address or twitter_handle is required"
+        )
+    
+    if key[1] is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid identifier"
+        )
+    
+    profiles = await get_linked_profiles(db, *key)
+    
+    fields = list(PlatformProfileResponse.model_fields)
+    return FastJSONResponse([project(p, fields) for p in profiles])
+
+
+@router.post("/lookup", response_model=ProfileLookupResponse)
+async def lookup_profiles(
+    lookup: ProfileLookupRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Resolve many wallets, usernames and twitter handles at once
 
+    Results are grouped per identifier in request order, each profile with
+    its current rank and latest shill score. Identifiers that are not valid
+    wallets or handles are returned in ``invalid``.
+    """
+    
+    total = len(lookup.wallets) + len(lookup.usernames) + len(lookup.twitter_handles)
+    if total > BULK_LOOKUP_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BULK_LOOKUP_LIMIT} identifiers per lookup"
+        )
+    
+    # (kind, identifier as sent, normalized value), without repeats
+    requested = {}
+    invalid = []
+    normalizers = (
+        ("wallet", lookup.wallets, normalize_wallet),
+        ("username", lookup.usernames, lambda u: u.strip().lower() or None),
+        ("twitter", lookup.twitter_handles, normalize_twitter_handle),
+    )
+    for kind, identifiers, normalize in normalizers:
+        for identifier in identifiers:
+            value = normalize(identifier)
+            if value is None:
+                invalid.append(identifier)
+            else:
+                requested.setdefault((kind, identifier), value)
+    
+    def values(kind):
+        return list({v for (k, _), v in requested.items() if k == kind})
+    
+    found = await bulk_lookup_profiles(
+        db,
+        wallets=values("wallet"),
+        twitter_handles=values("twitter"),
+        usernames=values("username"),
+        platform_id=lookup.platform_id,
+    )
+    profile_ids = {p.id for profiles in found.values() for p in profiles}
+    scores = await latest_shill_scores(db, list(profile_ids))
+    
+    fields = list(PlatformProfileResponse.model_fields)
+    
+    def entry(profile):
+        score = scores.get(profile.id)
+        return {
+            **project(profile, fields),
+            "shill_score": ShillScoreSummary.model_validate(score) if score else None,
+        }
+    
+    results = []
+    for (kind, identifier), value in requested.items():
+        profiles = sorted(
+            found.get((kind, value), ()),
+            key=lambda p: (p.global_rank is None, p.global_rank or 0)
+        )
+        results.append({"kind": kind, "identifier": identifier, "profiles": [entry(p) for p in profiles]})
+    
+    return FastJSONResponse({"results": results, "invalid": invalid})
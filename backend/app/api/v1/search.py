@@ -0,0 +1,111 @@
+"""Search endpoints"""
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.db.session import get_read_db
+from app.schemas.platform import CampaignResponse
+from app.schemas.profile import PlatformProfileResponse
+from app.schemas.search import (
+    CampaignSearchResult, ProfileSearchResult, TwitterProfileSearchResult, AutocompleteResponse
+)
+from app.services.search import (
+    search_campaigns, search_profiles, search_twitter_profiles, autocomplete, normalize_query
+)
+from app.core.cache import cached_response, platform_scope
+
+router = APIRouter()
+
+
+@router.get("/campaigns", response_model=list[CampaignSearchResult])
+async def search_campaigns_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=100),
+    platform_id: Optional[int] = None,
+    status: Optional[str] = Query(None, regex="^(active|ended|upcoming)$"),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search campaigns by name and description, best matches first"""
+    
+    async def load():
+        rows = await search_campaigns(db, q, platform_id=platform_id, status=status, limit=limit)
+        return [
+            CampaignSearchResult(**CampaignResponse.model_validate(c).model_dump(), score=score)
+            for c, score in rows
+        ]
+    
+    params = {"q": normalize_query(q), "platform_id": platform_id, "status": status, "limit": limit}
+    return await cached_response(
+        "search_campaigns", params, load, scopes=[platform_scope(platform_id)], request=request
+    )
+
+
+@router.get("/profiles", response_model=list[ProfileSearchResult])
+async def search_profiles_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=100),
+    platform_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search profiles by username, display name or twitter handle, best matches first"""
+    
+    async def load():
+        rows = await search_profiles(db, q, platform_id=platform_id, limit=limit)
+        return [
+            ProfileSearchResult(**PlatformProfileResponse.model_validate(p).model_dump(), score=score)
+            for p, score in rows
+        ]
+    
+    params = {"q": normalize_query(q), "platform_id": platform_id, "limit": limit}
+    return await cached_response(
+        "search_profiles", params, load, scopes=[platform_scope(platform_id)], request=request
+    )
+
+
+@router.get("/twitter", response_model=list[TwitterProfileSearchResult])
+async def search_twitter_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search twitter profiles by handle, best matches first"""
+    
+    async def load():
+        rows = await search_twitter_profiles(db, q, limit=limit)
+        return [
+            TwitterProfileSearchResult(
+                id=t.id,
+                twitter_handle=t.twitter_handle,
+                display_name=t.display_name,
+                followers_count=t.followers_count,
+                is_verified=t.is_verified,
+                profile_image_url=t.profile_image_url,
+                score=score,
+            )
+            for t, score in rows
+        ]
+    
+    return await cached_response(
+        "search_twitter", {"q": normalize_query(q), "limit": limit}, load, request=request
+    )
+
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Campaign names, usernames and twitter handles starting with ``q``"""
+    
+    async def load():
+        return AutocompleteResponse(suggestions=await autocomplete(db, q, limit=limit))
+    
+    return await cached_response(
+        "search_autocomplete", {"q": normalize_query(q), "limit": limit}, load, request=request
+    )
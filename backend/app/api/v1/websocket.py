@@ -0,0 +1,93 @@
+"""WebSocket endpoints"""
+
+import asyncio
+import json
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.core.security import decode_token
+from app.core.auth_cache import get_principal
+from app.services.realtime import LiveConnection, live_hub, is_valid_channel
+
+router = APIRouter()
+
+
+async def _authenticate(token: str):
+    """Principal for a token, or None"""
+    try:
+        user_id = UUID(decode_token(token).get("sub"))
+    except (HTTPException, TypeError, ValueError):
+        return None
+    async with AsyncSessionLocal() as db:
+        principal = await get_principal(db, user_id)
+    if principal is None or not principal.is_active:
+        return None
+    return principal
+
+
+@router.websocket("/live")
+async def live_updates(websocket: WebSocket, token: str):
+    """
+    Live leaderboard, campaign and alert updates
+
+    Send ``{"action": "subscribe", "channel": "leaderboard:1"}`` (or
+    ``campaigns:<platform_id>``, or ``alerts`` for your own alerts) and
+    ``"unsubscribe"`` to stop.
+    """
+    principal = await _authenticate(token)
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = LiveConnection(str(principal.id))
+
+    async def send_updates():
+        while True:
+            payload = await connection.next_message()
+            await websocket.send_text(payload.decode())
+
+    sender = asyncio.create_task(send_updates())
+    try:
+        while True:
+            try:
+                request = json.loads(await websocket.receive_text())
+                action = request["action"]
+                channel = str(request["channel"])
+            except (ValueError, KeyError, TypeError):
+                await websocket.send_json({"type": "error", "detail": "Invalid message"})
+                continue
+
+            # Users may only follow their own alerts
+            if channel == "alerts":
+                channel = f"alerts:{principal.id}"
+            if not is_valid_channel(channel) or (
+                channel.startswith("alerts:") and channel != f"alerts:{principal.id}"
+            ):
+                await websocket.send_json({"type": "error", "detail": f"Unknown channel: {channel}"})
+                continue
+
+            if action == "subscribe":
+                if len(connection.channels) >= settings.WS_MAX_SUBSCRIPTIONS:
+                    await websocket.send_json({"type": "error", "detail": "Too many subscriptions"})
+                    continue
+                try:
+                    await live_hub.subscribe(connection, channel)
+                except RedisError:
+                    await websocket.send_json({"type": "error", "detail": "Live updates unavailable"})
+                    continue
+            elif action == "unsubscribe":
+                await live_hub.unsubscribe(connection, channel)
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown action: {action}"})
+                continue
+            await websocket.send_json({"type": f"{action}d", "channel": channel})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await live_hub.disconnect(connection)
@@ -0,0 +1,213 @@
+"""
+Authenticated user cache
+
+``get_current_user`` resolves a token's subject to a ``Principal``: the
+user's identity, active flag, tier and wallets. Principals are cached in a
+small per-worker LRU with a short TTL, backed by Redis with a longer one, so
+authenticated requests normally run no identity queries at all.
+
+Entries are dropped after any commit that inserts, updates or deletes a
+``User`` or ``UserWallet`` through the ORM, and explicitly on logout. Other
+workers' in-memory copies expire within ``AUTH_CACHE_LOCAL_TTL_SECONDS``.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.core.cache import get_redis, collect_on_commit
+from app.models.user import User, UserWallet
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass
+class PrincipalWallet:
+    id: int
+    wallet_address: str
+    chain: str
+    is_primary: bool
+    verified_at: Optional[datetime]
+    created_at: datetime
+
+
+@dataclass
+class Principal:
+    """The authenticated user as seen by request handlers"""
+    id: UUID
+    email: Optional[str]
+    username: str
+    subscription_tier: str
+    subscription_expires_at: Optional[datetime]
+    is_active: bool
+    created_at: datetime
+    wallets: List[PrincipalWallet] = field(default_factory=list)
+
+    @property
+    def wallet_ids(self) -> List[int]:
+        return [w.id for w in self.wallets]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            subscription_tier=user.subscription_tier or 'free',
+            subscription_expires_at=user.subscription_expires_at,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            wallets=[
+                PrincipalWallet(
+                    id=w.id,
+                    wallet_address=w.wallet_address,
+                    chain=w.chain,
+                    is_primary=bool(w.is_primary),
+                    verified_at=w.verified_at,
+                    created_at=w.created_at,
+                )
+                for w in user.wallets
+            ],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(jsonable_encoder(asdict(self)))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        return cls(
+            id=UUID(data["id"]),
+            email=data["email"],
+            username=data["username"],
+            subscription_tier=data["subscription_tier"],
+            subscription_expires_at=_parse_datetime(data["subscription_expires_at"]),
+            is_active=data["is_active"],
+            created_at=_parse_datetime(data["created_at"]),
+            wallets=[
+                PrincipalWallet(
+                    id=w["id"],
+                    wallet_address=w["wallet_address"],
+                    chain=w["chain"],
+                    is_primary=w["is_primary"],
+                    verified_at=_parse_datetime(w["verified_at"]),
+                    created_at=_parse_datetime(w["created_at"]),
+                )
+                for w in data["wallets"]
+            ],
+        )
+
+
+class LocalPrincipalCache:
+    """Bounded LRU of principals with a per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[UUID, Tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+local_principals = LocalPrincipalCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_LOCAL_TTL_SECONDS)
+
+
+def _principal_key(user_id: UUID) -> str:
+    return f"auth:principal:{user_id}"
+
+
+async def get_principal(db: AsyncSession, user_id: UUID) -> Optional[Principal]:
+    """Principal for a user id, from memory, Redis or the database in that order"""
+    principal = local_principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    redis_ok = True
+    try:
+        raw = await get_redis().get(_principal_key(user_id))
+        if raw is not None:
+            principal = Principal.from_json(raw)
+    except RedisError as e:
+        logger.warning("Auth cache unavailable, reading through: %s", e)
+        redis_ok = False
+
+    if principal is None:
+        result = await db.execute(
+            select(User).options(selectinload(User.wallets)).where(User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        if redis_ok:
+            try:
+                await get_redis().set(
+                    _principal_key(user_id), principal.to_json(), ex=settings.AUTH_CACHE_TTL_SECONDS
+                )
+            except RedisError as e:
+                logger.warning("Auth cache fill failed: %s", e)
+
+    local_principals.put(principal)
+    return principal
+
+
+async def invalidate_principals(user_ids: Iterable[UUID]) -> None:
+    """Drop cached principals so the next request reloads them"""
+    user_ids = list(user_ids)
+    for user_id in user_ids:
+        local_principals.pop(user_id)
+    if user_ids:
+        try:
+            await get_redis().delete(*(_principal_key(u) for u in user_ids))
+        except RedisError as e:
+            logger.warning("Auth cache invalidation failed: %s", e)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_principal_changes(session: Session, flush_context) -> None:
+    """Invalidate principals of users whose row or wallets this transaction changed"""
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+        elif isinstance(obj, UserWallet) and obj.user_id is not None:
+            changed.add(obj.user_id)
+    if changed:
+        collect_on_commit(session, "principal_invalidate", changed, invalidate_principals)
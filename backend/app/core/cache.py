@@ -0,0 +1,356 @@
+"""
+Redis caching layer
+
+Hot read endpoints cache their serialized JSON under a key built from the
+endpoint name, its query params and the current data version of the
+platforms it reads. Ingestion bumps those versions when a crawl commits, so
+stale entries are never read again and simply expire.
+
+Misses are single-flighted: concurrent requests for the same key in one
+process share a single load, and across processes a short Redis lock lets one
+worker fill the entry while the others wait for it.
+
+The same versions make cheap HTTP validators: ``cached_response`` derives
+an ETag and Last-Modified from them and answers a matching conditional GET
+with 304 before anything is loaded or read from the cache.
+
+A fill within ``DATABASE_REPLICA_MAX_LAG_SECONDS`` of a version bump reads
+from the primary, so a lagging replica cannot store pre-crawl data under the
+new version for a whole TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.responses import dumps
+from app.db.session import primary_reads
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+LOCK_TIMEOUT_MS = 10000
+LOCK_POLL_SECONDS = 0.05
+
+_redis: Optional[aioredis.Redis] = None
+_inflight: Dict[str, asyncio.Future] = {}
+_background_tasks: set = set()
+
+
+def get_redis() -> aioredis.Redis:
+    """Shared async Redis client"""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+def platform_scope(platform_id: Optional[int]) -> str:
+    """Version scope for data of one platform, or all platforms"""
+    return f"platform:{platform_id}" if platform_id else GLOBAL_SCOPE
+
+
+def _version_key(scope: str) -> str:
+    return f"cache:version:{scope}"
+
+
+def _modified_key(scope: str) -> str:
+    return f"cache:modified:{scope}"
+
+
+async def get_validators(scopes: Iterable[str]) -> Tuple[List[int], float]:
+    """
+    Current data version of each scope and when the newest of them changed
+
+    A scope with no recorded change time (first use, or Redis lost its data)
+    is stamped with the current time, so validators handed out before never
+    match again.
+    """
+    scopes = list(scopes)
+    redis = get_redis()
+    values = await redis.mget(
+        [_version_key(s) for s in scopes] + [_modified_key(s) for s in scopes]
+    )
+    versions = [int(v) if v else 0 for v in values[:len(scopes)]]
+    modified = []
+    for scope, value in zip(scopes, values[len(scopes):]):
+        if value is None:
+            now = time.time()
+            await redis.set(_modified_key(scope), now, nx=True)
+            value = await redis.get(_modified_key(scope)) or now
+        modified.append(float(value))
+    return versions, max(modified)
+
+
+async def bump_versions(platform_ids: Iterable[int]) -> None:
+    """Invalidate every cached response that read these platforms"""
+    now = time.time()
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for platform_id in set(platform_ids):
+            pipe.incr(_version_key(platform_scope(platform_id)))
+            pipe.set(_modified_key(platform_scope(platform_id)), now)
+        pipe.incr(_version_key(GLOBAL_SCOPE))
+        pipe.set(_modified_key(GLOBAL_SCOPE), now)
+        await pipe.execute()
+
+
+async def _run_callbacks(callbacks: List[Callable[[], Awaitable[Any]]]) -> None:
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception as e:
+            logger.warning("After-commit callback failed: %s", e)
+
+
+def _after_commit(session) -> None:
+    for name in session.info.pop("after_commit_sets", ()):
+        session.info.pop(name, None)
+    callbacks = session.info.pop("after_commit", None)
+    if not callbacks:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_run_callbacks(callbacks))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _after_rollback(session) -> None:
+    session.info.pop("after_commit", None)
+    for name in session.info.pop("after_commit_sets", ()):
+        session.info.pop(name, None)
+
+
+def on_commit(db: Union[AsyncSession, Session], callback: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Run a coroutine in the background once the session's transaction
+    commits; a transaction's callbacks run one after another in the order
+    they were registered
+    """
+    sync_session = getattr(db, "sync_session", db)
+    if not event.contains(sync_session, "after_commit", _after_commit):
+        event.listen(sync_session, "after_commit", _after_commit)
+        event.listen(sync_session, "after_rollback", _after_rollback)
+    db.info.setdefault("after_commit", []).append(callback)
+
+
+def collect_on_commit(
+    db: Union[AsyncSession, Session],
+    name: str,
+    items: Iterable[Any],
+    callback: Callable[[set], Awaitable[Any]]
+) -> None:
+    """
+    Accumulate items over a transaction and hand the whole set to one
+    callback once it commits
+    """
+    pending = db.info.get(name)
+    if pending is None:
+        pending = db.info[name] = set()
+        db.info.setdefault("after_commit_sets", []).append(name)
+
+        async def flush():
+            await callback(pending)
+
+        on_commit(db, flush)
+    pending.update(items)
+
+
+def invalidate_on_commit(db: AsyncSession, platform_id: int) -> None:
+    """Bump a platform's data version once the session's transaction commits"""
+    collect_on_commit(db, "cache_invalidate", [platform_id], bump_versions)
+
+
+def _serialize(data: Any) -> bytes:
+    return dumps(data)
+
+
+def _recently_changed(modified: float) -> bool:
+    """Whether replicas may not have the writes behind a version bump at ``modified`` yet"""
+    return time.time() - modified < settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+
+
+async def _load(loader: Callable[[], Awaitable[Any]], from_primary: bool) -> Any:
+    if not from_primary:
+        return await loader()
+    with primary_reads():
+        return await loader()
+
+
+async def _fill(key: str, loader: Callable[[], Awaitable[Any]], ttl: int, from_primary: bool = False) -> bytes:
+    """Load and store an entry, holding a cross-process lock while loading"""
+    redis = get_redis()
+    lock_key = f"{key}:lock"
+    try:
+        locked = await redis.set(lock_key, b"1", nx=True, px=LOCK_TIMEOUT_MS)
+        if not locked:
+            # Another worker is filling this key; wait for it rather than hit the database
+            for _ in range(int(LOCK_TIMEOUT_MS / 1000 / LOCK_POLL_SECONDS)):
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                body = await redis.get(key)
+                if body is not None:
+                    return body
+                if not await redis.exists(lock_key):
+                    break
+    except RedisError as e:
+        logger.warning("Cache lock unavailable, loading directly: %s", e)
+        locked = False
+
+    try:
+        body = _serialize(await _load(loader, from_primary))
+        try:
+            await redis.set(key, body, ex=ttl)
+        except RedisError as e:
+            logger.warning("Cache fill failed: %s", e)
+    finally:
+        if locked:
+            try:
+                await redis.delete(lock_key)
+            except RedisError:
+                pass
+    return body
+
+
+def _cache_key(namespace: str, params: Dict[str, Any], versions: List[int]) -> str:
+    fingerprint = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+    version_tag = ".".join(str(v) for v in versions)
+    return f"cache:{namespace}:{fingerprint}:v{version_tag}"
+
+
+async def _cached_body(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int,
+    from_primary: bool = False
+) -> bytes:
+    try:
+        body = await get_redis().get(key)
+        if body is not None:
+            return body
+    except RedisError as e:
+        logger.warning("Cache unavailable, reading through: %s", e)
+        return _serialize(await loader())
+
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        body = await _fill(key, loader, ttl, from_primary)
+        future.set_result(body)
+        return body
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters re-raise the error; keep the unobserved future from warning
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def cached_json(
+    namespace: str,
+    params: Dict[str, Any],
+    loader: Callable[[], Awaitable[Any]],
+    scopes: Iterable[str] = (GLOBAL_SCOPE,),
+    ttl: Optional[int] = None
+) -> bytes:
+    """Serialized JSON for a cacheable read, loading it at most once per key on a miss"""
+    if not settings.CACHE_ENABLED:
+        return _serialize(await loader())
+
+    try:
+        versions, modified = await get_validators(scopes)
+    except RedisError as e:
+        logger.warning("Cache unavailable, reading through: %s", e)
+        return _serialize(await loader())
+
+    key = _cache_key(namespace, params, versions)
+    return await _cached_body(key, loader, ttl or settings.CACHE_DEFAULT_TTL, _recently_changed(modified))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when an ETag was sent (RFC 9110 13.1.3)
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def cached_response(
+    namespace: str,
+    params: Dict[str, Any],
+    loader: Callable[[], Awaitable[Any]],
+    scopes: Iterable[str] = (GLOBAL_SCOPE,),
+    ttl: Optional[int] = None,
+    request: Optional[Request] = None
+) -> Response:
+    """
+    JSON response served from the cache
+
+    With ``request`` the response carries an ETag and Last-Modified derived
+    from the scopes' data versions, and a matching conditional request gets
+    a 304 without loading or fetching the body.
+    """
+    if request is None or not settings.CACHE_ENABLED:
+        body = await cached_json(namespace, params, loader, scopes, ttl)
+        return Response(content=body, media_type="application/json")
+
+    scopes = list(scopes)
+    try:
+        versions, modified = await get_validators(scopes)
+    except RedisError as e:
+        logger.warning("Cache unavailable, reading through: %s", e)
+        return Response(content=_serialize(await loader()), media_type="application/json")
+
+    key = _cache_key(namespace, params, versions)
+    etag = 'W/"%s"' % hashlib.sha1(f"{key}:{modified}".encode()).hexdigest()[:20]
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        # Clients may keep the body but must revalidate before reusing it
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    body = await _cached_body(key, loader, ttl or settings.CACHE_DEFAULT_TTL, _recently_changed(modified))
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,164 @@
+"""
+Crypto execution layer
+
+bcrypt hashing and secp256k1 signature recovery take tens to hundreds of
+milliseconds of CPU each, so running them inside a handler stalls every
+other request on the worker. The async helpers here run them on a shared
+executor instead: a process pool by default (signature recovery holds the
+GIL), or a thread pool with ``CRYPTO_EXECUTOR=thread``.
+
+At most ``CRYPTO_MAX_PENDING`` jobs may be queued; beyond that callers get a
+503 rather than an unbounded backlog. The pool starts on first use, so API
+workers boot without spawning it; its workers import ``eth_account`` and run
+one recovery as they start.
+
+The ``check_*`` functions are the synchronous implementations and are what
+the pool workers execute.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from app.config import settings
+
+T = TypeVar("T")
+
+_pwd_context = None
+
+# A real signature (throwaway key 0x11..11) so worker warmup runs a full recovery
+_WARMUP_ADDRESS = "0x19E7E376E7C213B7E7e7e46cc70A5dD086DAff2A"
+_WARMUP_SIGNATURE = (
+    "0x0066c3da0dff8f961a1f2e1caab883604bf2836d0cd5c5c7f4b8f5d584a1bde7"
+    "02a61bea9b5292e92d58416f8a917d8156606b1d9e1363b5678f7ca7712ffbe01b"
+)
+
+
+# Synchronous implementations
+
+def get_pwd_context():
+    """bcrypt context, built on first use to keep passlib out of startup"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash"""
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def make_password_hash(password: str) -> str:
+    """Hash password"""
+    return get_pwd_context().hash(password)
+
+
+def check_wallet_signature(wallet_address: str, message: str, signature: str) -> bool:
+    """Verify that an Ethereum personal_sign signature was made by the wallet"""
+    try:
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        recovered_address = Account.recover_message(encode_defunct(text=message), signature=signature)
+        return recovered_address.lower() == wallet_address.lower()
+    except Exception:
+        return False
+
+
+def check_wallet_signatures(items: Sequence[Tuple[str, str, str]]) -> List[bool]:
+    """Verify (wallet_address, message, signature) triples"""
+    return [check_wallet_signature(*item) for item in items]
+
+
+def _warm_worker() -> None:
+    """Load eth_account's signing stack before the first real request"""
+    check_wallet_signature(_WARMUP_ADDRESS, "warmup", _WARMUP_SIGNATURE)
+
+
+# Async layer
+
+class CryptoExecutor:
+    """Bounded-queue executor for CPU-heavy auth work"""
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="crypto",
+                initializer=_warm_worker,
+            )
+        else:
+            # spawn keeps workers free of the parent's event loop and connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        # Start a worker (and run its warmup) ahead of the job that started the pool
+        self._executor.submit(_warm_worker)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.start()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+
+crypto_executor = CryptoExecutor(
+    settings.CRYPTO_EXECUTOR,
+    settings.CRYPTO_WORKERS,
+    settings.CRYPTO_MAX_PENDING,
+)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash off the event loop"""
+    return await crypto_executor.run(check_password, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    """Hash password off the event loop"""
+    return await crypto_executor.run(make_password_hash, password)
+
+
+async def verify_wallet_signature(wallet_address: str, message: str, signature: str) -> bool:
+    """Verify a wallet signature off the event loop"""
+    return await crypto_executor.run(check_wallet_signature, wallet_address, message, signature)
+
+
+async def verify_wallet_signatures(items: Sequence[Tuple[str, str, str]]) -> List[bool]:
+    """
+    Verify many (wallet_address, message, signature) triples, shipping them
+    to the pool in chunks of ``CRYPTO_BATCH_SIZE`` to amortize dispatch
+    """
+    size = settings.CRYPTO_BATCH_SIZE
+    chunks = [list(items[i:i + size]) for i in range(0, len(items), size)]
+    results = await asyncio.gather(*(crypto_executor.run(check_wallet_signatures, c) for c in chunks))
+    return [ok for chunk in results for ok in chunk]
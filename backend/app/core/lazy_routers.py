@@ -0,0 +1,48 @@
+"""
+Lazily included routers
+
+Optional routers (alerts, exports, search, websockets) are not imported
+when the application is. ``LazyRouterMiddleware`` imports and includes a
+router the first time a request reaches its prefix, and includes every
+pending router before the OpenAPI schema is served, so the docs stay
+complete. Until then a worker only pays for the routers it serves.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass
+class LazyRouter:
+    """A router module, imported on first use and included under ``prefix``"""
+    module: str
+    prefix: str
+    tags: List[str]
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware including lazy routers before the request reaches routing"""
+
+    def __init__(self, app: ASGIApp, api: FastAPI, routers: Sequence[LazyRouter]):
+        self.app = app
+        self.api = api
+        self.pending = list(routers)
+
+    def include(self, router: LazyRouter) -> None:
+        module = importlib.import_module(router.module)
+        self.api.include_router(module.router, prefix=router.prefix, tags=router.tags)
+        # Rebuilt with the new routes on the next request for it
+        self.api.openapi_schema = None
+        self.pending.remove(router)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.pending and scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            for router in list(self.pending):
+                if path == self.api.openapi_url or path == router.prefix or path.startswith(router.prefix + "/"):
+                    self.include(router)
+        await self.app(scope, receive, send)
@@ -0,0 +1,378 @@
+"""
+Rate limiting
+
+Every API request is counted against per-minute and per-hour sliding
+windows for its caller: the user behind a bearer token, the owner of an
+``X-API-Key``, or otherwise the client IP. Limits are ``RATE_LIMIT_PER_*``
+scaled by the caller's subscription tier, and API keys additionally spend
+``api_quota_remaining``.
+
+The windows live in Redis and are checked and incremented by one Lua
+script (a weighted two-bucket sliding window), so the check is atomic across
+workers. To skip Redis on most requests the script hands out small leases:
+while a caller is far below its limit a worker may serve a few requests
+locally before asking again. Close to the limit leases shrink to a single
+request, so enforcement is exact where it matters. A lease is charged up
+front; whatever is left of it when it expires is refunded to the windows
+and the quota.
+
+API key quotas are counted in Redis: the remaining quota, re-read from the
+database every ``API_QUOTA_TTL_SECONDS`` so changes made there take effect,
+and the requests spent since the last flush. ``flush_api_quotas`` runs from
+beat and subtracts the spent requests from ``users.api_quota_remaining``.
+
+Redis outages fail open, and a caller that cannot be identified because
+the database is unavailable is limited by IP.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.cache import get_redis
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (60, 3600)
+EXEMPT_PATHS = frozenset({"/", "/health", "/metrics", "/docs", "/redoc", f"{settings.API_V1_PREFIX}/openapi.json"})
+LOCAL_STATE_SIZE = 50000
+API_KEY_TTL = 60.0
+# Lapsed leases refunded per Redis round trip of a request
+LEASE_SWEEP_SIZE = 100
+
+# KEYS: current and previous bucket of each window, then the optional quota and spent keys
+# ARGV: requested lease, lease fraction, then (limit, previous bucket weight, ttl ms) per window
+# Returns {granted, remaining in the first window, rejecting window (1-based, 0 = quota)}
+SLIDING_WINDOW_LUA = """
+local requested = tonumber(ARGV[1])
+local fraction = tonumber(ARGV[2])
+local windows = (#ARGV - 2) / 3
+local grant = requested
+local remaining = nil
+
+for i = 1, windows do
+    local limit = tonumber(ARGV[3 * i])
+    local weight = tonumber(ARGV[3 * i + 1])
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local free = limit - (math.floor(previous * weight) + current)
+    if free < 1 then
+        return {0, 0, i}
+    end
+    grant = math.min(grant, math.max(1, math.floor(free * fraction)))
+    if remaining == nil then
+        remaining = free
+    end
+end
+
+local quota_key = KEYS[2 * windows + 1]
+if quota_key then
+    local quota = tonumber(redis.call('GET', quota_key) or '0')
+    if quota < 1 then
+        return {0, 0, 0}
+    end
+    grant = math.min(grant, quota)
+    redis.call('DECRBY', quota_key, grant)
+    redis.call('INCRBY', KEYS[2 * windows + 2], grant)
+end
+
+for i = 1, windows do
+    redis.call('INCRBY', KEYS[2 * i - 1], grant)
+    redis.call('PEXPIRE', KEYS[2 * i - 1], tonumber(ARGV[3 * i + 2]))
+end
+return {grant, remaining - grant, -1}
+"""
+
+# KEYS: the current bucket of each window charged for a lease, then the optional quota and spent keys
+# ARGV: unused tokens, number of bucket keys
+REFUND_LUA = """
+local unused = tonumber(ARGV[1])
+local buckets = tonumber(ARGV[2])
+for i = 1, buckets do
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if current > 0 then
+        redis.call('DECRBY', KEYS[i], math.min(unused, current))
+    end
+end
+local quota_key = KEYS[buckets + 1]
+if quota_key then
+    if redis.call('EXISTS', quota_key) == 1 then
+        redis.call('INCRBY', quota_key, unused)
+    end
+    redis.call('DECRBY', KEYS[buckets + 2], unused)
+end
+return unused
+"""
+
+
+@dataclass
+class Caller:
+    """Who a request is counted against"""
+    key: str
+    tier: str = 'free'
+    api_key_hash: Optional[str] = None
+
+
+@dataclass
+class Lease:
+    tokens: int
+    expires: float
+    remaining: int
+    # Window buckets (and quota keys) the lease was charged to, for the refund
+    charged: Tuple[str, ...] = ()
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    reason: str = ""
+
+
+def tier_limits(tier: str) -> List[int]:
+    """Requests allowed per window for a subscription tier"""
+    multiplier = settings.RATE_LIMIT_TIER_MULTIPLIERS.get(tier, 1)
+    return [settings.RATE_LIMIT_PER_MINUTE * multiplier, settings.RATE_LIMIT_PER_HOUR * multiplier]
+
+
+def _quota_key(api_key_hash: str) -> str:
+    return f"ratelimit:quota:{api_key_hash}"
+
+
+def _spent_key(user_id: str) -> str:
+    return f"ratelimit:quota_spent:{user_id}"
+
+
+class RateLimiter:
+    """Sliding-window limiter with locally served leases"""
+
+    def __init__(self):
+        self._leases: "OrderedDict[str, Lease]" = OrderedDict()
+        self._api_keys: Dict[str, Tuple[float, Optional[Caller]]] = {}
+        self._script = None
+        self._refund_script = None
+
+    def _window_args(self, key: str, limits: List[int], now: float) -> Tuple[List[str], List[float]]:
+        keys, args = [], []
+        for window, limit in zip(WINDOWS, limits):
+            bucket = int(now // window)
+            elapsed = (now % window) / window
+            keys += [f"ratelimit:{key}:{window}:{bucket}", f"ratelimit:{key}:{window}:{bucket - 1}"]
+            args += [limit, 1 - elapsed, window * 2000]
+        return keys, args
+
+    def _take_local(self, key: str, now: float) -> Optional[Lease]:
+        lease = self._leases.get(key)
+        if lease is None or lease.tokens < 1 or lease.expires < now:
+            return None
+        lease.tokens -= 1
+        lease.remaining = max(0, lease.remaining - 1)
+        self._leases.move_to_end(key)
+        return lease
+
+    async def _refund(self, lease: Lease) -> None:
+        """Give the unused tokens of a lapsed lease back to its windows and quota"""
+        if lease.tokens < 1:
+            return
+        if self._refund_script is None:
+            self._refund_script = get_redis().register_script(REFUND_LUA)
+        try:
+            await self._refund_script(keys=list(lease.charged), args=[lease.tokens, len(WINDOWS)])
+        except RedisError as e:
+            logger.debug("Could not refund %d leased requests: %s", lease.tokens, e)
+
+    async def _release_expired(self, now: float) -> None:
+        """Refund leases that lapsed, least recently used first"""
+        for _ in range(LEASE_SWEEP_SIZE):
+            if not self._leases:
+                return
+            key, lease = next(iter(self._leases.items()))
+            if lease.expires >= now:
+                return
+            del self._leases[key]
+            await self._refund(lease)
+
+    async def check(self, caller: Caller) -> Decision:
+        now = time.time()
+        limits = tier_limits(caller.tier)
+        reset = int(WINDOWS[0] - now % WINDOWS[0])
+
+        lease = self._take_local(caller.key, now)
+        if lease is not None:
+            return Decision(True, limits[0], lease.remaining, reset)
+        stale = self._leases.pop(caller.key, None)
+        if stale is not None:
+            await self._refund(stale)
+        await self._release_expired(now)
+
+        keys, args = self._window_args(caller.key, limits, now)
+        quota_keys = []
+        if caller.api_key_hash:
+            quota_keys = [_quota_key(caller.api_key_hash), _spent_key(caller.key.split(":", 1)[1])]
+            keys += quota_keys
+        if self._script is None:
+            self._script = get_redis().register_script(SLIDING_WINDOW_LUA)
+        granted, remaining, rejected_by = await self._script(
+            keys=keys,
+            args=[settings.RATE_LIMIT_LEASE_MAX, settings.RATE_LIMIT_LEASE_FRACTION, *args],
+        )
+
+        if not granted:
+            if rejected_by == 0:
+                return Decision(False, limits[0], 0, reset, "API quota exhausted")
+            window = WINDOWS[rejected_by - 1]
+            return Decision(False, limits[0], 0, int(window - now % window), "Rate limit exceeded")
+
+        # This request uses one of the granted tokens; keep the rest for later ones
+        charged = tuple(keys[0:2 * len(WINDOWS):2]) + tuple(quota_keys)
+        self._leases[caller.key] = Lease(granted - 1, now + settings.RATE_LIMIT_LEASE_SECONDS, remaining, charged)
+        self._leases.move_to_end(caller.key)
+        while len(self._leases) > LOCAL_STATE_SIZE:
+            await self._refund(self._leases.popitem(last=False)[1])
+        return Decision(True, limits[0], remaining, reset)
+
+    async def api_key_caller(self, api_key: str) -> Optional[Caller]:
+        """Caller for an API key, seeding its quota counter from the database"""
+        digest = hashlib.sha256(api_key.encode()).hexdigest()[:32]
+        cached = self._api_keys.get(digest)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.subscription_tier, User.api_quota_remaining)
+                .where(User.api_key == api_key, User.is_active.is_(True))
+            )
+            row = result.first()
+        caller = None
+        if row is not None:
+            user_id, tier, quota = row
+            caller = Caller(key=f"user:{user_id}", tier=tier or 'free', api_key_hash=digest)
+            redis = get_redis()
+            # Requests spent since the last flush are not in the database yet
+            spent = int(await redis.get(_spent_key(str(user_id))) or 0)
+            await redis.set(_quota_key(digest), max(0, (quota or 0) - spent), nx=True, ex=settings.API_QUOTA_TTL_SECONDS)
+        self._api_keys[digest] = (time.monotonic() + API_KEY_TTL, caller)
+        return caller
+
+
+rate_limiter = RateLimiter()
+
+
+async def flush_api_quotas() -> int:
+    """Subtract the requests API keys spent since the last flush from users.api_quota_remaining"""
+    redis = get_redis()
+    flushed = 0
+    async with AsyncSessionLocal() as db:
+        async for key in redis.scan_iter(match=_spent_key("*"), count=1000):
+            spent = int(await redis.getset(key, 0) or 0)
+            if not spent:
+                continue
+            user_id = UUID(key.decode().rsplit(":", 1)[1])
+            try:
+                await db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(api_quota_remaining=func.greatest(User.api_quota_remaining - spent, 0))
+                )
+                await db.commit()
+            except Exception:
+                # Keep the requests counted for the next flush
+                await redis.incrby(key, spent)
+                raise
+            flushed += 1
+    return flushed
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def identify(scope: Scope) -> Caller:
+    """Resolve the caller of a request without touching the database on a warm cache"""
+    from app.core.auth_cache import get_principal
+    from app.core.security import decode_token
+
+    try:
+        api_key = _header(scope, b"x-api-key")
+        if api_key:
+            caller = await rate_limiter.api_key_caller(api_key)
+            if caller is not None:
+                return caller
+
+        authorization = _header(scope, b"authorization")
+        if authorization and authorization.lower().startswith("bearer "):
+            try:
+                user_id = UUID(decode_token(authorization[7:]).get("sub"))
+            except (HTTPException, TypeError, ValueError):
+                user_id = None
+            if user_id is not None:
+                async with AsyncSessionLocal() as db:
+                    principal = await get_principal(db, user_id)
+                if principal is not None:
+                    return Caller(key=f"user:{principal.id}", tier=principal.subscription_tier)
+    except (SQLAlchemyError, OSError) as e:
+        # Connection errors and pool timeouts: limit by IP rather than fail the request
+        logger.warning("Could not identify caller, limiting by IP: %s", e)
+
+    client = scope.get("client")
+    return Caller(key=f"ip:{client[0] if client else 'unknown'}")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware rejecting callers over their limits with a 429"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            decision = await rate_limiter.check(await identify(scope))
+        except RedisError as e:
+            logger.warning("Rate limiter unavailable, allowing request: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            "X-RateLimit-Limit": str(decision.limit),
+            "X-RateLimit-Remaining": str(max(0, decision.remaining)),
+            "X-RateLimit-Reset": str(decision.reset),
+        }
+        if not decision.allowed:
+            headers["Retry-After"] = str(max(1, decision.reset))
+            response = JSONResponse({"detail": decision.reason}, status_code=429, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (name.lower().encode(), value.encode()) for name, value in headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
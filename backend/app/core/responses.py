@@ -0,0 +1,33 @@
+"""Fast JSON serialization"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.monitoring import timed
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        # Same representation Pydantic uses for Decimal in JSON mode
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON with orjson, handling Decimals and Pydantic models"""
+    with timed("serialize"):
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the standard library"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
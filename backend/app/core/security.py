@@ -2,32 +2,30 @@
 
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.config import settings
 from app.db.session import get_db
-from app.models.user import User
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.auth_cache import Principal, get_principal
+from app.core.monitoring import timed
+from app.core.crypto import check_password, make_password_hash, check_wallet_signature
 
 # Security scheme
 security = HTTPBearer()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify password against hash (blocking; handlers use app.core.crypto)"""
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash password"""
-    return pwd_context.hash(password)
+    """Hash password (blocking; handlers use app.core.crypto)"""
+    return make_password_hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -68,21 +66,23 @@ def decode_token(token: str) -> dict:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> Principal:
     """Get current authenticated user"""
     token = credentials.credentials
-    payload = decode_token(token)
+    with timed("auth"):
+        payload = decode_token(token)
     
-    user_id: str = payload.get("sub")
-    if user_id is None:
+    try:
+        user_id = UUID(payload.get("sub"))
+    except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
     
-    # Get user from database
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # Served from the auth cache; only a miss queries the database
+    with timed("auth"):
+        user = await get_principal(db, user_id)
     
     if user is None:
         raise HTTPException(
@@ -100,8 +100,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -109,18 +109,5 @@ async def get_current_active_user(
 
 
 def verify_wallet_signature(wallet_address: str, message: str, signature: str) -> bool:
-    """Verify Ethereum wallet signature"""
-    try:
-        from eth_account.messages import encode_defunct
-        from web3 import Web3
-        
-        w3 = Web3()
-        message_hash = encode_defunct(text=message)
-        recovered_address = w3.eth.account.recover_message(
-            message_hash,
-            signature=signature
-        )
-        return recovered_address.lower() == wallet_address.lower()
-    except Exception:
-        return False
-
+    """Verify Ethereum wallet signature (blocking; handlers use app.core.crypto)"""
+    return check_wallet_signature(wallet_address, message, signature)
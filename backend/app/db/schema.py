@@ -0,0 +1,103 @@
+"""
+Schema version check
+
+Startup used to run ``Base.metadata.create_all``, which inspects every table
+on every boot and takes DDL locks while doing it. Instead the models are
+fingerprinted in-process and compared with the fingerprint recorded in
+``schema_version``: a match costs one query, and only a changed or missing
+schema runs ``create_all``, under an advisory lock so that one worker
+applies it while the rest wait.
+
+Applying adds the ``pg_trgm`` extension the search indexes need, missing
+tables, and missing indexes on existing tables; altering columns and
+dropping renamed indexes is left to migrations. With ``DATABASE_AUTO_CREATE`` off a
+mismatch is only logged.
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+SCHEMA_LOCK_ID = 4173_0001
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now(), nullable=False),
+)
+
+
+def schema_fingerprint(metadata: MetaData = Base.metadata) -> str:
+    """Stable hash of the tables, columns and indexes the models declare"""
+    dialect = postgresql.dialect()
+    parts = []
+    for name in sorted(metadata.tables):
+        table = metadata.tables[name]
+        columns = [
+            (c.name, c.type.compile(dialect=dialect), c.nullable, c.primary_key)
+            for c in table.columns
+        ]
+        indexes = sorted(
+            (i.name or "", tuple(str(e) for e in i.expressions), bool(i.unique))
+            for i in table.indexes
+        )
+        parts.append((name, columns, indexes))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def create_missing(sync_conn) -> None:
+    """Create missing tables, and missing indexes of existing tables"""
+    sync_conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(sync_conn)
+    # create_all skips the indexes of tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def _recorded_version(conn: AsyncConnection) -> Optional[str]:
+    if await conn.scalar(text("SELECT to_regclass('schema_version')")) is None:
+        return None
+    return await conn.scalar(select(schema_version.c.version).where(schema_version.c.id == 1))
+
+
+async def ensure_schema(engine: AsyncEngine) -> bool:
+    """Bring the schema up to the models if they changed; True when DDL ran"""
+    expected = schema_fingerprint()
+    async with engine.connect() as conn:
+        if await _recorded_version(conn) == expected:
+            return False
+
+    if not settings.DATABASE_AUTO_CREATE:
+        logger.warning("Database schema does not match the models (expected %s)", expected)
+        return False
+
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_ID})
+        # Another worker may have applied it while we waited for the lock
+        if await _recorded_version(conn) == expected:
+            return False
+        await conn.run_sync(create_missing)
+        await conn.execute(
+            pg_insert(schema_version)
+            .values(id=1, version=expected)
+            .on_conflict_do_update(
+                index_elements=[schema_version.c.id],
+                set_={"version": expected, "applied_at": func.now()},
+            )
+        )
+    logger.info("Database schema updated to %s", expected)
+    return True
@@ -1,18 +1,76 @@
-"""Database session configuration"""
+"""
+Database session configuration
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from typing import AsyncGenerator
+``get_db`` is the read-write session on the primary and commits at the end
+of the request. ``get_read_db`` is for endpoints that only read: its
+transactions are ``READ ONLY``, it never flushes or commits, and it runs on
+one of ``DATABASE_REPLICA_URLS`` when they are configured.
+
+Replicas are picked round-robin when a read session first queries. One that
+fails to connect is taken out of rotation for
+``DATABASE_REPLICA_COOLDOWN_SECONDS`` and the query runs on the primary
+instead; with none available reads fall back to the primary.
+
+Replicas are assumed to lag the primary by less than
+``DATABASE_REPLICA_MAX_LAG_SECONDS``. Reads that must see the latest writes,
+such as cache fills right after a crawl bumped the cache versions, run inside
+``primary_reads()``.
+
+With ``DATABASE_PGBOUNCER`` the engines target a transaction-pooling
+PgBouncer: server connections change between transactions, so prepared
+statements are neither cached nor given reusable names, and PgBouncer rather
+than a local pool holds connections open.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, AsyncIterator, Dict, Iterator, List
+from uuid import uuid4
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
+from app.core.monitoring import InstrumentedQueuePool, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the server could not be reached rather than a bad query
+CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    if settings.DATABASE_PGBOUNCER:
+        pool_args = {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    else:
+        pool_args = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.DATABASE_POOL_SIZE,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        }
+    created = create_async_engine(
+        url.replace('postgresql://', 'postgresql+asyncpg://'),
+        pool_logging_name=name,
+        echo=settings.DEBUG,
+        **pool_args,
+    )
+    instrument_engine(created)
+    return created
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://'),
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    echo=settings.DEBUG,
-)
+engine = _create_engine(settings.DATABASE_URL, "primary")
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
@@ -23,9 +81,95 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Run the queries of read sessions that have not connected yet on the primary"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class ReadRoutingSession(Session):
+    """Sync side of read sessions, choosing its engine when it first connects"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        target = self.info.get("read_target")
+        if target is None:
+            target = replicas.primary if _primary_reads.get() else replicas.choose()
+            self.info["read_target"] = target
+        return target.sync_engine
+
+    def _connection_for_bind(self, engine, execution_options=None, **kw):
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except CONNECTION_ERRORS:
+            target = self.info.get("read_target")
+            if target is None or target is replicas.primary:
+                raise
+            # Retry on the primary rather than fail the request
+            replicas.mark_down(target)
+            self.info["read_target"] = replicas.primary
+            return super()._connection_for_bind(replicas.primary.sync_engine, execution_options, **kw)
+
+
+ReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadRoutingSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+
+class ReplicaSet:
+    """Read-only engines with failure-based health tracking"""
+
+    def __init__(self, primary: AsyncEngine, urls: List[str], cooldown: float):
+        # BEGIN READ ONLY is sent with the BEGIN itself, so it costs no round trip
+        self.primary = primary.execution_options(postgresql_readonly=True)
+        self.replicas = [
+            _create_engine(url, f"replica{i}").execution_options(postgresql_readonly=True)
+            for i, url in enumerate(urls)
+        ]
+        self.cooldown = cooldown
+        self._down_until: Dict[int, float] = {}
+        self._next = 0
+
+    def choose(self) -> AsyncEngine:
+        """Next healthy replica, or the primary when none is"""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if self._down_until.get(id(replica), 0) <= now:
+                return replica
+        return self.primary
+
+    def mark_down(self, target: AsyncEngine) -> None:
+        if target is self.primary:
+            return
+        logger.warning("Read replica %s unavailable for %ss", target.url.host, self.cooldown)
+        self._down_until[id(target)] = time.monotonic() + self.cooldown
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+replicas = ReplicaSet(
+    engine,
+    settings.DATABASE_REPLICA_URLS,
+    settings.DATABASE_REPLICA_COOLDOWN_SECONDS,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get database session"""
+    """Get read-write database session on the primary"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -36,3 +180,22 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """Read-only session on a healthy replica, closed without committing"""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        except CONNECTION_ERRORS:
+            # A replica that dropped mid-request; connect failures were retried already
+            target = session.sync_session.info.get("read_target")
+            if target is not None:
+                replicas.mark_down(target)
+            raise
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get read-only database session"""
+    async with read_session() as session:
+        yield session
@@ -1,5 +1,7 @@
 """FastAPI application entry point"""
 
+import sys
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -7,8 +9,12 @@ from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.api.v1 import auth, platforms, campaigns, profiles, analytics, users
-from app.db.session import engine
-from app.db.base import Base
+from app.db.session import engine, replicas
+from app.db.schema import ensure_schema
+from app.core.crypto import crypto_executor
+from app.core.lazy_routers import LazyRouter, LazyRouterMiddleware
+from app.core.monitoring import MonitoringMiddleware, metrics_response
+from app.core.rate_limit import RateLimitMiddleware
 
 
 @asynccontextmanager
@@ -17,11 +23,13 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting InfoFi API...")
     
-    # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create missing tables only when the models changed since the last boot
+    if await ensure_schema(engine):
+        print("✅ Database schema updated")
+    else:
+        print("✅ Database schema up to date")
     
-    print("✅ Database initialized")
+    # The crypto pool starts on the first login or signature check
     print(f"📊 API running at: http://localhost:8000")
     print(f"📚 Docs available at: http://localhost:8000/docs")
     
@@ -29,6 +37,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("👋 Shutting down InfoFi API...")
+    crypto_executor.shutdown()
+    # Only loaded once a websocket or live update was served
+    realtime = sys.modules.get("app.services.realtime")
+    if realtime is not None:
+        await realtime.live_hub.close()
+    await replicas.dispose()
 
 
 # Create FastAPI application
@@ -42,7 +56,21 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Routers imported on first use; innermost, so they load only for allowed requests
+optional_routers = [
+    LazyRouter("app.api.v1.alerts", f"{settings.API_V1_PREFIX}/alerts", ["Alerts"]),
+    LazyRouter("app.api.v1.exports", f"{settings.API_V1_PREFIX}/exports", ["Exports"]),
+    LazyRouter("app.api.v1.search", f"{settings.API_V1_PREFIX}/search", ["Search"]),
+]
+if settings.ENABLE_WEBSOCKETS:
+    optional_routers.append(LazyRouter("app.api.v1.websocket", f"{settings.API_V1_PREFIX}/ws", ["WebSocket"]))
+
 # Middleware
+app.add_middleware(LazyRouterMiddleware, api=app, routers=optional_routers)
+
+# Added before CORS so CORS headers are also set on 429 responses
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -53,6 +81,9 @@ app.add_middleware(
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Outermost, so metrics recorded anywhere in the stack know their request
+app.add_middleware(MonitoringMiddleware)
+
 # Routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["Authentication"])
 app.include_router(users.router, prefix=f"{settings.API_V1_PREFIX}/users", tags=["Users"])
@@ -73,6 +104,13 @@ async def root():
     }
 
 
+if settings.ENABLE_METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics"""
+        return metrics_response()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,16 +1,22 @@
 """Alert models"""
 
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
-from app.db.base import Base
+from app.db.base_class import Base
 
 
 class UserAlert(Base):
     """User alert model"""
     __tablename__ = "user_alerts"
+    __table_args__ = (
+        # Delivery queue: undelivered alerts per user, oldest first
+        Index('ix_user_alerts_undelivered', 'user_id', 'created_at', postgresql_where=text('delivered_at IS NULL')),
+        # A user's alert feed, newest first
+        Index('ix_user_alerts_user_created', 'user_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -22,12 +28,23 @@ class UserAlert(Base):
     related_entity_id = Column(String(100), nullable=True)
     is_read = Column(Boolean, default=False)
     delivered_at = Column(DateTime, nullable=True)
+    delivery_attempts = Column(Integer, nullable=False, default=0, server_default=text('0'))  # Failed delivery rounds
+    next_attempt_at = Column(DateTime, nullable=True)  # Backoff after a failed round
     created_at = Column(DateTime, default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="alerts")
 
 
+class AlertDelivery(Base):
+    """A channel an alert went out on while another of its channels still failed"""
+    __tablename__ = "alert_deliveries"
+    
+    alert_id = Column(Integer, ForeignKey('user_alerts.id', ondelete='CASCADE'), primary_key=True)
+    channel = Column(String(20), primary_key=True)  # email, telegram
+    delivered_at = Column(DateTime, default=func.now())
+
+
 class UserAlertPreferences(Base):
     """User alert preferences model"""
     __tablename__ = "user_alert_preferences"
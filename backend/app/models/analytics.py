@@ -1,17 +1,21 @@
 """Analytics models"""
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 
-from app.db.base import Base
+from app.db.base_class import Base
 
 
 class ShillScore(Base):
     """Shill score model"""
     __tablename__ = "shill_scores"
+    __table_args__ = (
+        # Latest score per profile (DISTINCT ON ... ORDER BY calculated_at DESC)
+        Index('ix_shill_scores_profile_calculated', 'platform_profile_id', 'calculated_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     platform_profile_id = Column(UUID(as_uuid=True), ForeignKey('platform_profiles.id', ondelete='CASCADE'), nullable=False)
@@ -34,6 +38,10 @@ class ShillScore(Base):
 class ROIPrediction(Base):
     """ROI prediction model"""
     __tablename__ = "roi_predictions"
+    __table_args__ = (
+        # Latest prediction per campaign
+        Index('ix_roi_predictions_campaign_created', 'campaign_id', 'created_at'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     campaign_id = Column(UUID(as_uuid=True), ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False)
@@ -50,3 +58,16 @@ class ROIPrediction(Base):
     # Relationships
     campaign = relationship("Campaign", back_populates="roi_predictions")
 
+
+
+class UserDashboardStats(Base):
+    """Precomputed dashboard aggregates for one user"""
+    __tablename__ = "user_dashboard_stats"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    profiles_count = Column(Integer, default=0)
+    avg_rank = Column(Integer, nullable=True)
+    total_points = Column(Numeric(15, 2), default=0)
+    shill_score = Column(Numeric(5, 2), nullable=True)  # Average of the latest score per profile
+    estimated_value_usd = Column(Numeric(15, 2), default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,31 @@
+"""Crawler models"""
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class CrawlTarget(Base):
+    """A crawled URL with its observed change rate and next scheduled visit"""
+    __tablename__ = "crawl_targets"
+    __table_args__ = (
+        UniqueConstraint('platform_id', 'url', name='uq_crawl_targets_platform_url'),
+        # The scheduler reads each platform's due targets
+        Index('ix_crawl_targets_platform_next', 'platform_id', 'next_crawl_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    platform_id = Column(Integer, ForeignKey('platforms.id', ondelete='CASCADE'), nullable=False)
+    url = Column(String(2000), nullable=False)
+    depth = Column(Integer, default=0)
+    fingerprint = Column(String(40), nullable=True)  # Of the data extracted, not the markup
+    # Exponentially decayed visit statistics behind change_rate
+    visits = Column(Float, default=0)
+    changes = Column(Float, default=0)
+    observed_seconds = Column(Float, default=0)
+    change_rate = Column(Float, nullable=True)  # Estimated changes per hour
+    last_crawled_at = Column(DateTime, nullable=True)
+    last_changed_at = Column(DateTime, nullable=True)
+    next_crawl_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=func.now())
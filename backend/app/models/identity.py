@@ -0,0 +1,23 @@
+"""Identity resolution models"""
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class IdentityMember(Base):
+    """Normalized identifier linked to a resolved cross-platform identity"""
+    __tablename__ = "identity_members"
+    __table_args__ = (
+        UniqueConstraint('kind', 'value', name='uq_identity_members_kind_value'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    identity_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    kind = Column(String(30), nullable=False)  # wallet, twitter, username, platform_profile, twitter_profile, user_wallet
+    value = Column(String(300), nullable=False)
+    platform_profile_id = Column(UUID(as_uuid=True), ForeignKey('platform_profiles.id', ondelete='CASCADE'), nullable=True, index=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -1,12 +1,15 @@
 """Platform and campaign models"""
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Numeric
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 
-from app.db.base import Base
+from app.db.base_class import Base
+
+# Indexed search document; queries must use the identical expression to hit the index
+CAMPAIGN_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
 
 
 class Platform(Base):
@@ -30,6 +33,18 @@ class Platform(Base):
 class Campaign(Base):
     """Campaign model"""
     __tablename__ = "campaigns"
+    __table_args__ = (
+        # Campaign lists: newest first by status, optionally within a platform
+        # (scanned backwards for ORDER BY discovered_at DESC, id DESC)
+        Index('ix_campaigns_status_discovered', 'status', 'discovered_at', 'id'),
+        Index('ix_campaigns_platform_status_discovered', 'platform_id', 'status', 'discovered_at', 'id'),
+        # Ingestion matches crawled campaigns by external id
+        Index('ix_campaigns_platform_external', 'platform_id', 'external_id'),
+        # Search: ranked full text, fuzzy names and name prefixes for autocomplete
+        Index('ix_campaigns_search', text(CAMPAIGN_SEARCH_DOCUMENT), postgresql_using='gin'),
+        Index('ix_campaigns_name_trgm', text('lower(name) gin_trgm_ops'), postgresql_using='gin'),
+        Index('ix_campaigns_name_prefix', text('(lower(name) COLLATE "C")')),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     platform_id = Column(Integer, ForeignKey('platforms.id'), nullable=False)
@@ -44,8 +59,8 @@ class Campaign(Base):
     total_rewards_usd = Column(Numeric(15, 2), nullable=True)
     min_points_required = Column(Integer, nullable=True)
     status = Column(String(20), default='active')  # active, ended, upcoming
-    discovered_at = Column(DateTime, default=func.now())
-    metadata = Column(JSONB, default={})
+    discovered_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+    metadata_ = Column("metadata", JSONB, default={})
     
     # Relationships
     platform = relationship("Platform", back_populates="campaigns")
@@ -56,6 +71,11 @@ class Campaign(Base):
 class CampaignParticipation(Base):
     """Campaign participation model"""
     __tablename__ = "campaign_participation"
+    __table_args__ = (
+        # Per-campaign standings and exports
+        Index('ix_campaign_participation_campaign_rank', 'campaign_id', 'rank'),
+        Index('ix_campaign_participation_profile', 'platform_profile_id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     campaign_id = Column(UUID(as_uuid=True), ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False)
@@ -67,7 +87,7 @@ class CampaignParticipation(Base):
     quests_total = Column(Integer, nullable=True)
     first_activity_at = Column(DateTime, nullable=True)
     last_activity_at = Column(DateTime, nullable=True)
-    metadata = Column(JSONB, default={})
+    metadata_ = Column("metadata", JSONB, default={})
     
     # Relationships
     campaign = relationship("Campaign", back_populates="participations")
@@ -1,17 +1,31 @@
 """Platform profile models"""
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Numeric
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 
-from app.db.base import Base
+from app.db.base_class import Base
 
 
 class PlatformProfile(Base):
     """Platform profile model"""
     __tablename__ = "platform_profiles"
+    __table_args__ = (
+        # Leaderboards, standings and neighborhoods only ever read ranked profiles
+        Index('ix_platform_profiles_platform_rank', 'platform_id', 'global_rank', postgresql_where=text('global_rank IS NOT NULL')),
+        Index('ix_platform_profiles_rank', 'global_rank', postgresql_where=text('global_rank IS NOT NULL')),
+        # Profiles of a user's wallets; most profiles are not linked to one
+        Index('ix_platform_profiles_user_wallet', 'user_wallet_id', postgresql_where=text('user_wallet_id IS NOT NULL')),
+        # Ingestion matches crawled profiles by external id
+        Index('ix_platform_profiles_platform_external', 'platform_id', 'external_user_id'),
+        # Search: fuzzy names and handles, and username prefixes for autocomplete
+        Index('ix_platform_profiles_username_trgm', text('lower(username) gin_trgm_ops'), postgresql_using='gin'),
+        Index('ix_platform_profiles_display_name_trgm', text('lower(display_name) gin_trgm_ops'), postgresql_using='gin'),
+        Index('ix_platform_profiles_twitter_handle_trgm', text('lower(twitter_handle) gin_trgm_ops'), postgresql_using='gin'),
+        Index('ix_platform_profiles_username_prefix', text('(lower(username) COLLATE "C")')),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_wallet_id = Column(Integer, ForeignKey('user_wallets.id', ondelete='CASCADE'), nullable=True)
@@ -28,7 +42,7 @@ class PlatformProfile(Base):
     discord_handle = Column(String(100), nullable=True)
     last_synced_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
-    metadata = Column(JSONB, default={})
+    metadata_ = Column("metadata", JSONB, default={})
     
     # Relationships
     wallet = relationship("UserWallet", back_populates="platform_profiles")
@@ -1,16 +1,23 @@
 """Twitter-related models"""
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
-from app.db.base import Base
+from app.db.base_class import Base
 
 
 class TwitterProfile(Base):
     """Twitter profile model"""
     __tablename__ = "twitter_profiles"
+    __table_args__ = (
+        # Ingestion matches handles case-insensitively
+        Index('ix_twitter_profiles_handle_lower', text('lower(twitter_handle)')),
+        # Search: handle prefixes in byte order for autocomplete, and fuzzy handles
+        Index('ix_twitter_profiles_handle_prefix', text('(lower(twitter_handle) COLLATE "C")')),
+        Index('ix_twitter_profiles_handle_trgm', text('lower(twitter_handle) gin_trgm_ops'), postgresql_using='gin'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     twitter_handle = Column(String(100), unique=True, nullable=False)
@@ -33,6 +40,9 @@ class TwitterProfile(Base):
 class TwitterEngagement(Base):
     """Twitter engagement model"""
     __tablename__ = "twitter_engagement"
+    __table_args__ = (
+        Index('ix_twitter_engagement_profile_posted', 'twitter_profile_id', 'posted_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     twitter_profile_id = Column(Integer, ForeignKey('twitter_profiles.id', ondelete='CASCADE'), nullable=False)
@@ -1,12 +1,12 @@
 """User models"""
 
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, TIMESTAMP
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text, TIMESTAMP, Index
 from sqlalchemy.dialects.postgresql import UUID, INET, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 
-from app.db.base import Base
+from app.db.base_class import Base
 
 
 class User(Base):
@@ -25,7 +25,7 @@ class User(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     last_login_at = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
-    metadata = Column(JSONB, default={})
+    metadata_ = Column("metadata", JSONB, default={})
     
     # Relationships
     wallets = relationship("UserWallet", back_populates="user", cascade="all, delete-orphan")
@@ -36,6 +36,11 @@ class User(Base):
 class UserWallet(Base):
     """User wallet model"""
     __tablename__ = "user_wallets"
+    __table_args__ = (
+        # Ingestion links profiles by case-insensitive address
+        Index('ix_user_wallets_address_lower', text('lower(wallet_address)')),
+        Index('ix_user_wallets_user', 'user_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
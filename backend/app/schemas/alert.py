@@ -0,0 +1,40 @@
+"""Alert schemas"""
+
+from pydantic import BaseModel
+from typing import Optional, Any, Dict
+from datetime import datetime
+
+
+class UserAlertResponse(BaseModel):
+    id: int
+    alert_type: str
+    priority: str
+    title: str
+    message: Optional[str]
+    related_entity_type: Optional[str]
+    related_entity_id: Optional[str]
+    is_read: bool
+    delivered_at: Optional[datetime]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class AlertPreferencesUpdate(BaseModel):
+    email_enabled: Optional[bool] = None
+    telegram_enabled: Optional[bool] = None
+    telegram_chat_id: Optional[str] = None
+    push_enabled: Optional[bool] = None
+    alert_types: Optional[Dict[str, Any]] = None
+
+
+class AlertPreferencesResponse(BaseModel):
+    email_enabled: bool
+    telegram_enabled: bool
+    telegram_chat_id: Optional[str]
+    push_enabled: bool
+    alert_types: Dict[str, Any]
+    
+    class Config:
+        from_attributes = True
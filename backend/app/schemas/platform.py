@@ -47,8 +47,10 @@ class CampaignResponse(CampaignBase):
 
 
 class CampaignListResponse(BaseModel):
-    total: int
-    page: int
+    total: Optional[int]
+    total_is_estimate: bool = False
+    page: Optional[int]
     page_size: int
+    next_cursor: Optional[str] = None
     campaigns: list[CampaignResponse]
 
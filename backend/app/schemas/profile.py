@@ -0,0 +1,72 @@
+"""Profile schemas"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+# Identifiers accepted by one bulk lookup
+BULK_LOOKUP_LIMIT = 5000
+
+
+class PlatformProfileResponse(BaseModel):
+    id: UUID
+    platform_id: int
+    username: Optional[str] = None
+    display_name: Optional[str] = None
+    profile_url: Optional[str] = None
+    avatar_url: Optional[str] = None
+    total_points: Optional[Decimal] = None
+    global_rank: Optional[int] = None
+    level: Optional[int] = None
+    twitter_handle: Optional[str] = None
+    last_synced_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class LeaderboardEntry(BaseModel):
+    id: UUID
+    platform_id: int
+    username: Optional[str] = None
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    twitter_handle: Optional[str] = None
+    total_points: Optional[Decimal] = None
+    global_rank: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ShillScoreSummary(BaseModel):
+    score: Decimal
+    effectiveness_rating: Optional[str] = None
+    calculated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProfileLookupRequest(BaseModel):
+    wallets: List[str] = Field(default=[], max_length=BULK_LOOKUP_LIMIT)
+    usernames: List[str] = Field(default=[], max_length=BULK_LOOKUP_LIMIT)
+    twitter_handles: List[str] = Field(default=[], max_length=BULK_LOOKUP_LIMIT)
+    platform_id: Optional[int] = None
+
+
+class ProfileLookupEntry(PlatformProfileResponse):
+    shill_score: Optional[ShillScoreSummary] = None
+
+
+class ProfileLookupResult(BaseModel):
+    kind: str  # wallet, username, twitter
+    identifier: str
+    profiles: List[ProfileLookupEntry]
+
+
+class ProfileLookupResponse(BaseModel):
+    results: List[ProfileLookupResult]
+    invalid: List[str] = []
@@ -0,0 +1,36 @@
+"""Search schemas"""
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.platform import CampaignResponse
+from app.schemas.profile import PlatformProfileResponse
+
+
+class CampaignSearchResult(CampaignResponse):
+    score: float
+
+
+class ProfileSearchResult(PlatformProfileResponse):
+    score: float
+
+
+class TwitterProfileSearchResult(BaseModel):
+    id: int
+    twitter_handle: str
+    display_name: Optional[str] = None
+    followers_count: Optional[int] = None
+    is_verified: Optional[bool] = None
+    profile_image_url: Optional[str] = None
+    score: float
+
+
+class Suggestion(BaseModel):
+    kind: str  # campaign, profile, twitter
+    id: str
+    label: str
+
+
+class AutocompleteResponse(BaseModel):
+    suggestions: list[Suggestion]
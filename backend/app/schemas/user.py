@@ -21,7 +21,7 @@ class UserLogin(BaseModel):
 
 
 class WalletLogin(BaseModel):
-    wallet_address: str = Field(..., regex=r"^0x[a-fA-F0-9]{40}$")
+    wallet_address: str = Field(..., pattern=r"^0x[a-fA-F0-9]{40}$")
     signature: str
     message: str
 
@@ -46,7 +46,7 @@ class UserResponse(BaseModel):
 
 
 class UserWalletCreate(BaseModel):
-    wallet_address: str = Field(..., regex=r"^0x[a-fA-F0-9]{40}$")
+    wallet_address: str = Field(..., pattern=r"^0x[a-fA-F0-9]{40}$")
     chain: str = "ethereum"
     signature: str
     message: str
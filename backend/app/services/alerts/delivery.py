@@ -0,0 +1,273 @@
+"""
+Batched alert delivery
+
+Undelivered ``UserAlert`` rows are the queue. Each run picks users whose
+oldest pending alert has waited out the digest window (or who have a
+critical alert), coalesces their alerts into one digest per channel, sends
+the digests with bounded concurrency and a per-provider rate limit, and
+stamps ``delivered_at`` on everything that went out in a single UPDATE.
+
+An alert stays pending while any of its channels fails. The channels it
+did go out on are recorded in ``alert_deliveries``, so the retry only
+resends on the channel that failed. Each failed round counts an attempt and
+backs the alert off (``ALERT_DELIVERY_RETRY_SECONDS``, doubling); after
+``ALERT_DELIVERY_MAX_ATTEMPTS`` it is left undelivered and no longer tried.
+Users are served oldest pending alert first, so users whose alerts keep
+failing cannot crowd the others out of a batch.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select, update, func, or_, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.alert import AlertDelivery, UserAlert, UserAlertPreferences
+from app.models.user import User
+from app.services.alerts.email import EmailSender
+from app.services.alerts.telegram import TelegramSender
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ORDER = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Rows per INSERT, well below the asyncpg bind parameter limit
+INSERT_CHUNK_SIZE = 1000
+
+
+class TokenBucket:
+    """Async token bucket limiting calls to a provider"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class Digest:
+    """Alerts for one user coalesced into a single message on one channel"""
+    user_id: UUID
+    channel: str
+    address: str
+    alerts: List[UserAlert] = field(default_factory=list)
+
+
+@dataclass
+class DeliveryStats:
+    users: int = 0
+    alerts: int = 0
+    digests_sent: int = 0
+    digests_failed: int = 0
+    alerts_marked: int = 0
+    alerts_failed: int = 0
+
+
+def render_digest(digest: Digest) -> Tuple[str, str]:
+    """Subject and plain-text body for a digest"""
+    alerts = sorted(digest.alerts, key=lambda a: (PRIORITY_ORDER.get(a.priority, 2), a.created_at or datetime.min))
+    if len(alerts) == 1:
+        subject = alerts[0].title
+    else:
+        subject = f"InfoFi: {len(alerts)} new alerts"
+
+    lines = []
+    for alert in alerts:
+        line = f"- {alert.title}"
+        if alert.message:
+            line += f"\n  {alert.message}"
+        lines.append(line)
+    return subject, "\n".join(lines)
+
+
+def build_digests(
+    alerts: List[UserAlert],
+    preferences: Dict[UUID, UserAlertPreferences],
+    emails: Dict[UUID, Optional[str]],
+    senders: Dict[str, object],
+    delivered: Optional[Set[Tuple[int, str]]] = None
+) -> List[Digest]:
+    """Group pending alerts per user and enabled channel, minus the (alert id, channel) pairs already delivered"""
+    delivered = delivered or set()
+    by_user: Dict[UUID, List[UserAlert]] = {}
+    for alert in alerts:
+        by_user.setdefault(alert.user_id, []).append(alert)
+
+    digests = []
+    for user_id, user_alerts in by_user.items():
+        prefs = preferences.get(user_id)
+        addresses = {}
+        email_enabled = prefs.email_enabled if prefs is not None else True
+        if "email" in senders and email_enabled and emails.get(user_id):
+            addresses["email"] = emails[user_id]
+        if "telegram" in senders and prefs is not None and prefs.telegram_enabled and prefs.telegram_chat_id:
+            addresses["telegram"] = prefs.telegram_chat_id
+        for channel, address in addresses.items():
+            pending = [a for a in user_alerts if (a.id, channel) not in delivered]
+            if pending:
+                digests.append(Digest(user_id, channel, address, pending))
+    return digests
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff after an alert's ``attempts``-th failed round"""
+    return timedelta(seconds=settings.ALERT_DELIVERY_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def _sendable(now: datetime):
+    """Undelivered alerts that are neither backing off nor given up on"""
+    return (
+        UserAlert.delivered_at.is_(None)
+        & (UserAlert.delivery_attempts < settings.ALERT_DELIVERY_MAX_ATTEMPTS)
+        & or_(UserAlert.next_attempt_at.is_(None), UserAlert.next_attempt_at <= now)
+    )
+
+
+def _ids(values: List[int]):
+    """One array bind parameter of alert ids, for ``= ANY(...)`` regardless of how many"""
+    return any_(bindparam("ids", values, type_=ARRAY(Integer)))
+
+
+async def _due_user_ids(db: AsyncSession, now: datetime, limit: int) -> List[UUID]:
+    cutoff = now - timedelta(seconds=settings.ALERT_DIGEST_WINDOW_SECONDS)
+    oldest = func.min(UserAlert.created_at)
+    result = await db.execute(
+        select(UserAlert.user_id)
+        .where(_sendable(now))
+        .group_by(UserAlert.user_id)
+        .having(or_(oldest <= cutoff, func.bool_or(UserAlert.priority == 'critical')))
+        .order_by(oldest)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def deliver_pending(
+    db: AsyncSession,
+    client: Optional[httpx.AsyncClient] = None,
+    now: Optional[datetime] = None
+) -> DeliveryStats:
+    """Send one round of digests and mark the delivered alerts"""
+    now = now or datetime.utcnow()
+    stats = DeliveryStats()
+
+    user_ids = await _due_user_ids(db, now, settings.ALERT_DELIVERY_BATCH_SIZE)
+    if not user_ids:
+        return stats
+
+    result = await db.execute(
+        select(UserAlert).where(UserAlert.user_id.in_(user_ids), _sendable(now))
+    )
+    alerts = list(result.scalars().all())
+    result = await db.execute(
+        select(AlertDelivery.alert_id, AlertDelivery.channel)
+        .where(AlertDelivery.alert_id == _ids([a.id for a in alerts]))
+    )
+    delivered = set(result.all())
+
+    result = await db.execute(
+        select(UserAlertPreferences).where(UserAlertPreferences.user_id.in_(user_ids))
+    )
+    preferences = {p.user_id: p for p in result.scalars().all()}
+    result = await db.execute(select(User.id, User.email).where(User.id.in_(user_ids)))
+    emails = dict(result.all())
+
+    owns_client = client is None
+    client = client or httpx.AsyncClient(timeout=10)
+    try:
+        senders = {}
+        limits = {}
+        email_sender = EmailSender(client)
+        if email_sender.enabled:
+            senders["email"] = email_sender
+            limits["email"] = TokenBucket(settings.EMAIL_RATE_PER_SECOND)
+        telegram_sender = TelegramSender(client)
+        if telegram_sender.enabled:
+            senders["telegram"] = telegram_sender
+            limits["telegram"] = TokenBucket(settings.TELEGRAM_RATE_PER_SECOND)
+
+        digests = build_digests(alerts, preferences, emails, senders, delivered)
+        semaphore = asyncio.Semaphore(settings.ALERT_DELIVERY_CONCURRENCY)
+
+        async def send(digest: Digest) -> bool:
+            async with semaphore:
+                await limits[digest.channel].acquire()
+                subject, body = render_digest(digest)
+                try:
+                    await senders[digest.channel].send(digest.address, subject, body)
+                    return True
+                except Exception as e:
+                    logger.warning("Failed to send %s digest to user %s: %s", digest.channel, digest.user_id, e)
+                    return False
+
+        outcomes = await asyncio.gather(*(send(d) for d in digests))
+    finally:
+        if owns_client:
+            await client.aclose()
+
+    # An alert stays queued while one of its channels failed, and the channels
+    # that worked are recorded so the retry skips them; users with no external
+    # channel only see their alerts in-app
+    failed_ids = {a.id for d, ok in zip(digests, outcomes) if not ok for a in d.alerts}
+    partial = [
+        {"alert_id": a.id, "channel": d.channel, "delivered_at": now}
+        for d, ok in zip(digests, outcomes) if ok
+        for a in d.alerts if a.id in failed_ids
+    ]
+    for start in range(0, len(partial), INSERT_CHUNK_SIZE):
+        await db.execute(
+            insert(AlertDelivery).values(partial[start:start + INSERT_CHUNK_SIZE]).on_conflict_do_nothing()
+        )
+
+    # Failed alerts back off by how many rounds they have failed so far
+    retries: Dict[int, List[int]] = {}
+    for alert in alerts:
+        if alert.id in failed_ids:
+            retries.setdefault((alert.delivery_attempts or 0) + 1, []).append(alert.id)
+    for attempts, ids in retries.items():
+        if attempts >= settings.ALERT_DELIVERY_MAX_ATTEMPTS:
+            logger.warning("Giving up on %d alerts after %d failed deliveries", len(ids), attempts)
+        await db.execute(
+            update(UserAlert)
+            .where(UserAlert.id == _ids(ids))
+            .values(delivery_attempts=attempts, next_attempt_at=now + retry_delay(attempts))
+            .execution_options(synchronize_session=False)
+        )
+
+    delivered_ids = [a.id for a in alerts if a.id not in failed_ids]
+    if delivered_ids:
+        await db.execute(
+            update(UserAlert)
+            .where(UserAlert.id == _ids(delivered_ids))
+            .values(delivered_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    stats.users = len(user_ids)
+    stats.alerts = len(alerts)
+    stats.digests_sent = sum(outcomes)
+    stats.digests_failed = len(outcomes) - stats.digests_sent
+    stats.alerts_marked = len(delivered_ids)
+    stats.alerts_failed = len(failed_ids)
+    return stats
@@ -0,0 +1,128 @@
+"""Leaderboard snapshot diffing
+
+A snapshot maps a profile id to its ``(rank, points)`` after a crawl. Diffing
+two consecutive snapshots of one platform is a single pass over the current
+snapshot with O(1) lookups into the previous one.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.models.platform import Campaign
+from app.models.profile import PlatformProfile
+
+ProfileState = Tuple[Optional[int], Optional[Decimal]]
+Snapshot = Dict[str, ProfileState]
+
+
+@dataclass
+class DiffThresholds:
+    """Thresholds that turn snapshot changes into alerts"""
+    rank_change: int = settings.ALERT_RANK_CHANGE_THRESHOLD
+    whale_rank: int = settings.ALERT_WHALE_RANK
+    whale_points_delta: Decimal = Decimal(settings.ALERT_WHALE_POINTS_DELTA)
+
+
+@dataclass
+class AlertEvent:
+    """Platform-level change that may be delivered to users as a UserAlert"""
+    alert_type: str  # new_campaign, rank_change, whale_alert
+    platform_id: int
+    related_entity_type: str  # campaign, profile
+    related_entity_id: str
+    title: str
+    message: Optional[str] = None
+    priority: str = 'medium'
+    old_rank: Optional[int] = None
+    new_rank: Optional[int] = None
+
+
+def snapshot_of(profiles: Iterable[PlatformProfile]) -> Snapshot:
+    """Snapshot the current rank and points of profiles"""
+    return {str(p.id): (p.global_rank, p.total_points) for p in profiles}
+
+
+def _label(profile_id: str, names: Dict[str, str]) -> str:
+    return names.get(profile_id) or profile_id
+
+
+def diff_leaderboard(
+    platform_id: int,
+    previous: Snapshot,
+    current: Snapshot,
+    names: Optional[Dict[str, str]] = None,
+    thresholds: Optional[DiffThresholds] = None
+) -> List[AlertEvent]:
+    """Emit rank_change and whale_alert events between two snapshots of a platform"""
+    if not previous:
+        # First crawl of this leaderboard: nothing to compare against
+        return []
+
+    thresholds = thresholds or DiffThresholds()
+    names = names or {}
+    events = []
+
+    for profile_id, (new_rank, new_points) in current.items():
+        old_rank, old_points = previous.get(profile_id, (None, None))
+
+        if old_rank is not None and new_rank is not None:
+            delta = old_rank - new_rank
+            if abs(delta) >= thresholds.rank_change:
+                direction = "up" if delta > 0 else "down"
+                events.append(AlertEvent(
+                    alert_type='rank_change',
+                    platform_id=platform_id,
+                    related_entity_type='profile',
+                    related_entity_id=profile_id,
+                    title=f"{_label(profile_id, names)} moved {direction} {abs(delta)} places",
+                    message=f"Rank #{old_rank} -> #{new_rank}",
+                    priority='high' if abs(delta) >= thresholds.rank_change * 10 else 'medium',
+                    old_rank=old_rank,
+                    new_rank=new_rank,
+                ))
+
+        entered_top = (
+            new_rank is not None
+            and new_rank <= thresholds.whale_rank
+            and (old_rank is None or old_rank > thresholds.whale_rank)
+        )
+        points_jump = (
+            old_points is not None
+            and new_points is not None
+            and new_points - old_points >= thresholds.whale_points_delta
+        )
+        if entered_top or points_jump:
+            if entered_top:
+                message = f"Entered the top {thresholds.whale_rank} at #{new_rank}"
+            else:
+                message = f"Gained {new_points - old_points:,.0f} points in one crawl"
+            events.append(AlertEvent(
+                alert_type='whale_alert',
+                platform_id=platform_id,
+                related_entity_type='profile',
+                related_entity_id=profile_id,
+                title=f"Whale activity: {_label(profile_id, names)}",
+                message=message,
+                priority='high',
+                old_rank=old_rank,
+                new_rank=new_rank,
+            ))
+
+    return events
+
+
+def campaign_events(platform_id: int, new_campaigns: Iterable[Campaign]) -> List[AlertEvent]:
+    """Emit new_campaign events for newly discovered campaigns"""
+    return [
+        AlertEvent(
+            alert_type='new_campaign',
+            platform_id=platform_id,
+            related_entity_type='campaign',
+            related_entity_id=str(campaign.id),
+            title=f"New campaign: {campaign.name}"[:255],
+            message=campaign.description[:500] if campaign.description else None,
+        )
+        for campaign in new_campaigns
+    ]
@@ -0,0 +1,53 @@
+"""Email alert delivery"""
+
+import asyncio
+import smtplib
+from email.message import EmailMessage
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+
+class EmailSender:
+    """Send email through SendGrid, or plain SMTP when no API key is configured"""
+
+    channel = "email"
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.SENDGRID_API_KEY or settings.SMTP_HOST)
+
+    async def send(self, to: str, subject: str, body: str) -> None:
+        """Send one message, raising on failure"""
+        if settings.SENDGRID_API_KEY:
+            await self._send_sendgrid(to, subject, body)
+        else:
+            await asyncio.to_thread(self._send_smtp, to, subject, body)
+
+    async def _send_sendgrid(self, to: str, subject: str, body: str) -> None:
+        payload = {
+            "personalizations": [{"to": [{"email": to}]}],
+            "from": {"email": settings.FROM_EMAIL},
+            "subject": subject,
+            "content": [{"type": "text/plain", "value": body}],
+        }
+        response = await self.client.post(
+            settings.SENDGRID_API_URL,
+            json=payload,
+            headers={"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"},
+        )
+        response.raise_for_status()
+
+    def _send_smtp(self, to: str, subject: str, body: str) -> None:
+        message = EmailMessage()
+        message["From"] = settings.FROM_EMAIL
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=10) as smtp:
+            smtp.send_message(message)
@@ -0,0 +1,59 @@
+"""Alert generation"""
+
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import on_commit
+from app.models.alert import UserAlert
+from app.services.alerts.diff import AlertEvent
+from app.services.alerts.subscriptions import subscription_index
+from app.services.realtime import publish_events
+
+
+async def write_alerts(db: AsyncSession, events: List[AlertEvent]) -> int:
+    """Fan events out to their subscribers and insert the alerts in one statement"""
+    if not events:
+        return 0
+
+    await subscription_index.refresh(db)
+    recipients = subscription_index.match_many(events)
+    rows = [
+        {
+            "user_id": user_id,
+            "alert_type": event.alert_type,
+            "priority": event.priority,
+            "title": event.title,
+            "message": event.message,
+            "related_entity_type": event.related_entity_type,
+            "related_entity_id": event.related_entity_id,
+        }
+        for index, event in enumerate(events)
+        for user_id in recipients.get(index, ())
+    ]
+    if rows:
+        await db.execute(insert(UserAlert), rows)
+
+        # Push to connected clients once the alerts are committed
+        updates = [
+            (
+                f"alerts:{row['user_id']}",
+                {
+                    "type": "alert",
+                    "alert_type": row["alert_type"],
+                    "priority": row["priority"],
+                    "title": row["title"],
+                    "message": row["message"],
+                    "related_entity_type": row["related_entity_type"],
+                    "related_entity_id": row["related_entity_id"],
+                },
+            )
+            for row in rows
+        ]
+
+        async def publish():
+            await publish_events(updates)
+
+        on_commit(db, publish)
+    return len(rows)
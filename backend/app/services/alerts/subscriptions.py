@@ -0,0 +1,219 @@
+"""In-memory alert subscription index
+
+``UserAlertPreferences.alert_types`` maps an alert type to its subscription::
+
+    {
+        "rank_change": true,                       # own profiles, all platforms
+        "new_campaign": {"platforms": [2]},        # only these platforms
+        "whale_alert": {"platforms": [1, 3], "profiles": ["<profile id>"]}
+    }
+
+``profiles`` adds watched profiles on top of the user's own wallet-linked
+ones. A missing or false entry disables the type. Users without preferences
+(or with the empty default) get ``DEFAULT_ALERT_TYPES``.
+
+The index is inverted on (alert type, platform) for broadcast events and on
+(alert type, profile) for profile events, so matching an event costs
+O(recipients) instead of a scan over every user.
+
+``refresh`` re-indexes users whose preferences, wallets or linked profiles
+changed, which only sees additions and edits. A deleted wallet or an
+unlinked profile leaves no row to find, so the index is also rebuilt from
+scratch every ``ALERT_SUBSCRIPTIONS_RELOAD_SECONDS``.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.alert import UserAlertPreferences
+from app.models.profile import PlatformProfile
+from app.models.user import UserWallet
+from app.services.alerts.diff import AlertEvent
+
+ALERT_TYPES = ('new_campaign', 'rank_change', 'whale_alert')
+
+# Types sent to every subscriber of the event's platform, not only to the
+# owners and watchers of the profile involved
+BROADCAST_TYPES = frozenset({'new_campaign', 'whale_alert'})
+
+DEFAULT_ALERT_TYPES: Dict[str, Any] = {'rank_change': True}
+
+ALL_PLATFORMS = None
+
+PlatformKey = Tuple[str, Optional[int]]
+ProfileKey = Tuple[str, str]
+
+
+def _subscription(alert_types: Dict[str, Any], alert_type: str) -> Tuple[bool, Optional[Set[int]], Set[str]]:
+    """Decode one alert type entry into (enabled, platforms or None for all, watched profiles)"""
+    value = alert_types.get(alert_type)
+    if not value:
+        return False, set(), set()
+    if value is True:
+        return True, ALL_PLATFORMS, set()
+    if isinstance(value, dict):
+        if value.get('enabled') is False:
+            return False, set(), set()
+        platforms = value.get('platforms')
+        platform_set = {int(p) for p in platforms} if platforms else ALL_PLATFORMS
+        profiles = {str(p) for p in value.get('profiles') or ()}
+        return True, platform_set, profiles
+    return False, set(), set()
+
+
+class SubscriptionIndex:
+    """Inverted index from alert keys to subscribed users"""
+
+    def __init__(self):
+        self._by_platform: Dict[PlatformKey, Set[UUID]] = {}
+        self._by_profile: Dict[ProfileKey, Set[UUID]] = {}
+        self._user_keys: Dict[UUID, Tuple[List[PlatformKey], List[ProfileKey]]] = {}
+        self._preferences: Dict[UUID, Dict[str, Any]] = {}
+        self._owned: Dict[UUID, Dict[str, int]] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._user_keys)
+
+    def remove_user(self, user_id: UUID) -> None:
+        """Drop every subscription of a user"""
+        platform_keys, profile_keys = self._user_keys.pop(user_id, ((), ()))
+        for key in platform_keys:
+            users = self._by_platform.get(key)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._by_platform[key]
+        for key in profile_keys:
+            users = self._by_profile.get(key)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._by_profile[key]
+
+    def upsert_user(
+        self,
+        user_id: UUID,
+        alert_types: Optional[Dict[str, Any]] = None,
+        owned_profiles: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        (Re)index one user
+
+        ``owned_profiles`` maps the user's wallet-linked profile ids to their
+        platform. Arguments left as None keep the previously indexed value.
+        """
+        if alert_types is not None:
+            self._preferences[user_id] = alert_types
+        if owned_profiles is not None:
+            self._owned[user_id] = owned_profiles
+        alert_types = self._preferences.get(user_id) or DEFAULT_ALERT_TYPES
+        owned = self._owned.get(user_id, {})
+
+        self.remove_user(user_id)
+        platform_keys: List[PlatformKey] = []
+        profile_keys: List[ProfileKey] = []
+
+        for alert_type in ALERT_TYPES:
+            enabled, platforms, watched = _subscription(alert_types, alert_type)
+            if not enabled:
+                continue
+
+            if alert_type in BROADCAST_TYPES:
+                if platforms is ALL_PLATFORMS:
+                    platform_keys.append((alert_type, ALL_PLATFORMS))
+                else:
+                    platform_keys.extend((alert_type, p) for p in platforms)
+
+            for profile_id, platform_id in owned.items():
+                if platforms is ALL_PLATFORMS or platform_id in platforms:
+                    profile_keys.append((alert_type, profile_id))
+            profile_keys.extend((alert_type, profile_id) for profile_id in watched)
+
+        for key in platform_keys:
+            self._by_platform.setdefault(key, set()).add(user_id)
+        for key in profile_keys:
+            self._by_profile.setdefault(key, set()).add(user_id)
+        self._user_keys[user_id] = (platform_keys, profile_keys)
+
+    def match(self, event: AlertEvent) -> Set[UUID]:
+        """Users who should receive an event"""
+        recipients: Set[UUID] = set()
+        if event.alert_type in BROADCAST_TYPES:
+            recipients.update(self._by_platform.get((event.alert_type, ALL_PLATFORMS), ()))
+            recipients.update(self._by_platform.get((event.alert_type, event.platform_id), ()))
+        if event.related_entity_type == 'profile':
+            recipients.update(self._by_profile.get((event.alert_type, event.related_entity_id), ()))
+        return recipients
+
+    def match_many(self, events: Iterable[AlertEvent]) -> Dict[int, Set[UUID]]:
+        """Recipients of each event, by position"""
+        return {index: self.match(event) for index, event in enumerate(events)}
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the index from scratch"""
+        self.__init__()
+        refreshed_at = datetime.utcnow()
+        await self._reload_users(db, None)
+        self.refreshed_at = self.loaded_at = refreshed_at
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """
+        Re-index only users whose preferences, wallets or wallet-linked
+        profiles changed since the last load or refresh, or everyone once
+        the last full load is ``ALERT_SUBSCRIPTIONS_RELOAD_SECONDS`` old
+        """
+        reload_after = timedelta(seconds=settings.ALERT_SUBSCRIPTIONS_RELOAD_SECONDS)
+        if self.loaded_at is None or datetime.utcnow() - self.loaded_at >= reload_after:
+            await self.load(db)
+            return len(self)
+
+        since = self.refreshed_at
+        refreshed_at = datetime.utcnow()
+
+        changed = set((await db.execute(
+            select(UserAlertPreferences.user_id).where(UserAlertPreferences.updated_at >= since)
+        )).scalars().all())
+        changed |= set((await db.execute(
+            select(UserWallet.user_id)
+            .outerjoin(PlatformProfile, PlatformProfile.user_wallet_id == UserWallet.id)
+            .where(or_(
+                UserWallet.created_at >= since,
+                PlatformProfile.last_synced_at >= since
+            ))
+        )).scalars().all())
+
+        if changed:
+            await self._reload_users(db, changed)
+        self.refreshed_at = refreshed_at
+        return len(changed)
+
+    async def _reload_users(self, db: AsyncSession, user_ids: Optional[Set[UUID]]) -> None:
+        prefs_query = select(UserAlertPreferences.user_id, UserAlertPreferences.alert_types)
+        owned_query = (
+            select(UserWallet.user_id, PlatformProfile.id, PlatformProfile.platform_id)
+            .join(PlatformProfile, PlatformProfile.user_wallet_id == UserWallet.id)
+        )
+        if user_ids is not None:
+            prefs_query = prefs_query.where(UserAlertPreferences.user_id.in_(user_ids))
+            owned_query = owned_query.where(UserWallet.user_id.in_(user_ids))
+
+        preferences = {
+            user_id: alert_types or {}
+            for user_id, alert_types in (await db.execute(prefs_query)).all()
+        }
+        owned: Dict[UUID, Dict[str, int]] = {}
+        for user_id, profile_id, platform_id in (await db.execute(owned_query)).all():
+            owned.setdefault(user_id, {})[str(profile_id)] = platform_id
+
+        for user_id in set(preferences) | set(owned) | (user_ids or set()):
+            self.upsert_user(user_id, preferences.get(user_id, {}), owned.get(user_id, {}))
+
+
+subscription_index = SubscriptionIndex()
@@ -0,0 +1,32 @@
+"""Telegram alert delivery"""
+
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+
+class TelegramSender:
+    """Send messages through the Telegram Bot API"""
+
+    channel = "telegram"
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.ENABLE_TELEGRAM_ALERTS and settings.TELEGRAM_BOT_TOKEN)
+
+    async def send(self, chat_id: str, subject: str, body: str) -> None:
+        """Send one message, raising on failure"""
+        response = await self.client.post(
+            f"{settings.TELEGRAM_API_URL}/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+            json={
+                "chat_id": chat_id,
+                "text": f"{subject}\n\n{body}"[:4096],
+                "disable_web_page_preview": True,
+            },
+        )
+        response.raise_for_status()
@@ -0,0 +1,112 @@
+"""
+Per-worker browser pool
+
+Launching a browser costs seconds, so each worker process keeps
+``CRAWLER_BROWSERS_PER_WORKER`` crawlers running and hands them to page
+tasks in turn. A crawler is restarted after ``CRAWLER_PAGES_PER_BROWSER``
+pages (browsers leak memory over long sessions) or after it failed.
+
+Chrome locks its profile directory, so every process runs on its own copy
+of ``CHROME_PROFILE_PATH``; logins made in the shared profile carry over.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _profile_dir(slot: int) -> str:
+    """This process's copy of the shared browser profile"""
+    source = os.path.abspath(settings.CHROME_PROFILE_PATH)
+    target = f"{source}-worker-{os.getpid()}-{slot}"
+    if os.path.isdir(source) and not os.path.isdir(target):
+        shutil.copytree(source, target, ignore=shutil.ignore_patterns("Singleton*", "*.lock"))
+    os.makedirs(target, exist_ok=True)
+    return target
+
+
+def browser_config(slot: int = 0):
+    """Browser settings of the harvester, on this process's profile copy"""
+    from crawl4ai import BrowserConfig
+
+    return BrowserConfig(
+        headless=settings.CRAWLER_HEADLESS,
+        use_managed_browser=True,
+        user_data_dir=_profile_dir(slot),
+        enable_stealth=settings.CRAWLER_STEALTH,
+        viewport_width=1280,
+        viewport_height=800,
+        extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"],
+        verbose=False,
+    )
+
+
+class _Browser:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.crawler = None
+        self.pages = 0
+
+    async def start(self) -> None:
+        from crawl4ai import AsyncWebCrawler
+
+        self.crawler = AsyncWebCrawler(config=browser_config(self.slot))
+        await self.crawler.start()
+        self.pages = 0
+
+    async def close(self) -> None:
+        if self.crawler is not None:
+            try:
+                await self.crawler.close()
+            except Exception as e:
+                logger.warning("Closing browser %s failed: %s", self.slot, e)
+            self.crawler = None
+
+
+class BrowserPool:
+    """Running crawlers shared by the page tasks of one worker process"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: Optional[asyncio.Queue] = None
+        self._browsers: List[_Browser] = []
+
+    def _ensure(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._browsers = [_Browser(slot) for slot in range(self.size)]
+            for browser in self._browsers:
+                self._idle.put_nowait(browser)
+        return self._idle
+
+    @asynccontextmanager
+    async def crawler(self) -> AsyncIterator:
+        """A started crawler, returned to the pool afterwards"""
+        idle = self._ensure()
+        browser = await idle.get()
+        try:
+            if browser.crawler is None or browser.pages >= settings.CRAWLER_PAGES_PER_BROWSER:
+                await browser.close()
+                await browser.start()
+            browser.pages += 1
+            yield browser.crawler
+        except Exception:
+            # A failed page may have left the browser wedged; start afresh next time
+            await browser.close()
+            raise
+        finally:
+            idle.put_nowait(browser)
+
+    async def close(self) -> None:
+        for browser in self._browsers:
+            await browser.close()
+
+
+browser_pool = BrowserPool(settings.CRAWLER_BROWSERS_PER_WORKER)
@@ -0,0 +1,61 @@
+"""
+Crawl sharding and per-site politeness
+
+Every page task is routed to the queue of its domain's shard
+(``crawler.<n>``), so one site's pages are always served by the same
+workers and their warm browsers. Workers pick their shards with
+``CRAWLER_WORKER_SHARDS``; adding worker containers for other shards adds
+throughput without two shards ever crawling the same site.
+
+Politeness is enforced in Redis rather than by queue topology: a page may
+only be fetched once ``CRAWLER_DOMAIN_DELAY_SECONDS`` have passed since the
+previous fetch from the same domain, whichever worker made it.
+"""
+
+import zlib
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.core.cache import get_redis
+
+CRAWLER_QUEUE = "crawler"
+
+
+def normalize_domain(url_or_host: str) -> str:
+    """Lowercase host of a URL (or host), without ``www.``"""
+    host = urlsplit(url_or_host).hostname if "//" in url_or_host else url_or_host
+    host = (host or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def shard_for(domain: str) -> int:
+    """Stable shard of a domain"""
+    return zlib.crc32(normalize_domain(domain).encode()) % settings.CRAWLER_SHARDS
+
+
+def queue_for(url: str) -> str:
+    """Worker queue for the pages of a URL's domain"""
+    return f"{CRAWLER_QUEUE}.{shard_for(normalize_domain(url))}"
+
+
+def shard_queues() -> list:
+    """Queues this worker consumes: the shared queue plus its domain shards"""
+    shards = settings.CRAWLER_WORKER_SHARDS or range(settings.CRAWLER_SHARDS)
+    return [CRAWLER_QUEUE] + [f"{CRAWLER_QUEUE}.{n}" for n in shards]
+
+
+async def acquire_fetch_slot(domain: str) -> Optional[float]:
+    """
+    Claim the next fetch from ``domain``
+
+    Returns None when the page may be fetched now, otherwise the seconds to
+    wait before asking again.
+    """
+    key = f"crawl:polite:{normalize_domain(domain)}"
+    delay_ms = int(settings.CRAWLER_DOMAIN_DELAY_SECONDS * 1000)
+    redis = get_redis()
+    if await redis.set(key, b"1", nx=True, px=delay_ms):
+        return None
+    remaining_ms = await redis.pttl(key)
+    return max(remaining_ms, 50) / 1000
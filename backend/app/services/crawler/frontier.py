@@ -0,0 +1,184 @@
+"""
+Best-first crawl frontier
+
+Instead of expanding every matching link breadth-first, each seed URL of a
+harvest gets a frontier: a Redis sorted set of candidate URLs scored
+locally, without fetching anything, from
+
+- the tokens of the URL path and query, against keyword weights
+  (leaderboards and profiles up, legal and marketing pages down);
+- the link's anchor text, against the same weights;
+- the harvest's ``url_patterns``, as a bonus rather than a filter;
+- the historical yield of similar URLs on the platform: users extracted
+  per page, per URL shape (``/user/*``, ``/leaderboard?page``), kept in
+  Redis across harvests, relative to the platform's average. Shapes not
+  crawled yet score as average, so new kinds of pages still get tried;
+- a penalty per level of depth.
+
+Links scoring below ``MIN_SCORE`` (legal pages, shapes that never yielded)
+are not queued at all.
+
+Each seed crawls its best candidate next, one page at a time (sites are
+crawled at the politeness delay anyway), until ``CRAWLER_PAGES_PER_SEED``
+pages have been crawled, the frontier is empty, or the last
+``CRAWLER_STOP_AFTER_BARREN_PAGES`` pages yielded no users.
+"""
+
+import fnmatch
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from app.config import settings
+from app.core.cache import get_redis
+
+TOKEN_WEIGHTS = {
+    "leaderboard": 3.0, "leaderboards": 3.0, "ranking": 2.5, "rankings": 2.5, "rank": 2.0,
+    "top": 1.0, "profile": 2.0, "profiles": 2.0, "user": 1.5, "users": 1.5, "address": 1.5,
+    "wallet": 1.0, "points": 1.5, "score": 1.0, "stats": 1.0, "xp": 1.0, "season": 1.0,
+    "quest": 0.5, "quests": 0.5, "campaign": 0.5, "campaigns": 0.5, "mission": 0.5, "page": 0.5,
+    "about": -2.0, "blog": -2.0, "docs": -2.0, "help": -2.0, "faq": -2.0, "press": -2.0,
+    "careers": -3.0, "jobs": -3.0, "terms": -3.0, "privacy": -3.0, "legal": -3.0, "cookies": -3.0,
+    "login": -2.0, "signin": -2.0, "signup": -2.0, "register": -2.0,
+}
+ANCHOR_WEIGHT = 0.5
+PATTERN_BONUS = 1.0
+YIELD_WEIGHT = 1.5
+DEPTH_PENALTY = 0.5
+MIN_SCORE = -2.0
+# Pages of a shape before its own yield outweighs the platform average
+YIELD_SMOOTHING = 2.0
+# Candidates kept per frontier; the rest would never fit in the budget
+FRONTIER_SIZE = 1000
+FRONTIER_TTL = 86400
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_ID_SEGMENT_RE = re.compile(r"^(\d+|0x[0-9a-f]+|[0-9a-f]{16,}|[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12})$")
+
+
+@dataclass
+class Link:
+    url: str
+    text: str = ""
+
+
+def url_shape(url: str) -> str:
+    """URL pattern shared by similar pages: ids replaced by ``*``, query values dropped"""
+    parts = urlsplit(url.lower())
+    segments = ["*" if _ID_SEGMENT_RE.match(s) else s for s in parts.path.split("/") if s]
+    shape = "/" + "/".join(segments)
+    keys = sorted({k for k, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return f"{shape}?{'&'.join(keys)}" if keys else shape
+
+
+def _weight(text: str) -> float:
+    return sum(TOKEN_WEIGHTS.get(token, 0.0) for token in set(_TOKEN_RE.findall(text.lower())))
+
+
+def seed_id(url: str) -> str:
+    return hashlib.sha1(url.encode()).hexdigest()[:10]
+
+
+def seen_key(harvest_id: str, platform_id: int) -> str:
+    """URLs a harvest has queued on a platform, across its seeds"""
+    return f"crawl:harvest:{harvest_id}:{platform_id}:seen"
+
+
+def _yield_key(platform_id: int) -> str:
+    return f"crawl:yield:{platform_id}"
+
+
+async def load_yields(platform_id: int) -> Dict[str, Tuple[float, float]]:
+    """(pages, users) crawled per URL shape of a platform"""
+    raw = await get_redis().hgetall(_yield_key(platform_id))
+    yields: Dict[str, List[float]] = {}
+    for field, value in raw.items():
+        shape, _, kind = field.decode().rpartition("|")
+        yields.setdefault(shape, [0.0, 0.0])[kind == "users"] = float(value)
+    return {shape: (pages, users) for shape, (pages, users) in yields.items()}
+
+
+async def record_yield(platform_id: int, url: str, users: int) -> None:
+    shape = url_shape(url)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hincrby(_yield_key(platform_id), f"{shape}|pages", 1)
+    pipe.hincrby(_yield_key(platform_id), f"{shape}|users", users)
+    await pipe.execute()
+
+
+class LinkScorer:
+    """Scores candidate links of one platform without fetching them"""
+
+    def __init__(self, patterns: Iterable[str], yields: Dict[str, Tuple[float, float]]):
+        self.patterns = list(patterns)
+        self.yields = yields
+        pages = sum(p for p, _ in yields.values())
+        self.mean_yield = sum(u for _, u in yields.values()) / pages if pages else 1.0
+
+    def expected_yield(self, url: str) -> float:
+        pages, users = self.yields.get(url_shape(url), (0.0, 0.0))
+        return (users + self.mean_yield * YIELD_SMOOTHING) / (pages + YIELD_SMOOTHING)
+
+    def score(self, link: Link, depth: int) -> float:
+        parts = urlsplit(link.url)
+        score = _weight(f"{parts.path} {parts.query}") + ANCHOR_WEIGHT * _weight(link.text)
+        if any(fnmatch.fnmatch(link.url.lower(), p) for p in self.patterns):
+            score += PATTERN_BONUS
+        score += YIELD_WEIGHT * (math.log1p(self.expected_yield(link.url)) - math.log1p(self.mean_yield))
+        return score - DEPTH_PENALTY * depth
+
+    def rank(self, links: Iterable[Link], depth: int) -> List[Tuple[float, Link]]:
+        """Links worth queueing, best first"""
+        scored = [(self.score(link, depth), link) for link in links]
+        return sorted((s for s in scored if s[0] > MIN_SCORE), key=lambda s: s[0], reverse=True)
+
+
+class Frontier:
+    """Candidate URLs and crawl progress of one seed of a harvest"""
+
+    def __init__(self, harvest_id: str, platform_id: int, seed: str):
+        base = f"crawl:frontier:{harvest_id}:{platform_id}:{seed}"
+        self.queue_key = base
+        self.stats_key = f"{base}:stats"
+        self.seen_key = seen_key(harvest_id, platform_id)
+
+    async def push(self, scored: Iterable[Tuple[float, Link]], depth: int) -> int:
+        """Add links no seed of this harvest has seen yet"""
+        redis = get_redis()
+        added = 0
+        for score, link in scored:
+            if await redis.sadd(self.seen_key, link.url):
+                await redis.zadd(self.queue_key, {f"{depth} {link.url}": score})
+                added += 1
+        if added:
+            # Keep only the best candidates
+            await redis.zremrangebyrank(self.queue_key, 0, -FRONTIER_SIZE - 1)
+        for key in (self.queue_key, self.seen_key):
+            await redis.expire(key, FRONTIER_TTL)
+        return added
+
+    async def pop(self) -> Optional[Tuple[str, int]]:
+        """Best candidate as (url, depth)"""
+        popped = await get_redis().zpopmax(self.queue_key)
+        if not popped:
+            return None
+        depth, _, url = popped[0][0].decode().partition(" ")
+        return url, int(depth)
+
+    async def record_page(self, users: int) -> bool:
+        """Count a crawled page; True when the seed should stop"""
+        redis = get_redis()
+        pages = await redis.hincrby(self.stats_key, "pages", 1)
+        if users:
+            await redis.hset(self.stats_key, "barren", 0)
+            barren = 0
+        else:
+            barren = await redis.hincrby(self.stats_key, "barren", 1)
+        await redis.expire(self.stats_key, FRONTIER_TTL)
+        return pages >= settings.CRAWLER_PAGES_PER_SEED or barren >= settings.CRAWLER_STOP_AFTER_BARREN_PAGES
+
+    async def close(self) -> None:
+        await get_redis().delete(self.queue_key)
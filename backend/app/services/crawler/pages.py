@@ -0,0 +1,169 @@
+"""
+Single-page crawling
+
+The extraction setup of ``harvest_research_data.py``, split so that one
+call fetches one page: the LLM extracts the users on it and its same-site
+links, with their anchor text, are returned for the caller's frontier to
+score, instead of a deep crawl walking the whole site inside one browser
+session.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urldefrag, urljoin
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.services.crawler.browser import browser_pool
+from app.services.crawler.domains import normalize_domain
+from app.services.crawler.frontier import Link
+
+# Paths likely to hold leaderboards, profiles or quests; boosts the frontier's link scores
+DEFAULT_URL_PATTERNS = [
+    "*quest*", "*user*", "*profile*", "*leaderboard*", "*stats*", "*score*",
+    "*points*", "*campaign*", "*mission*", "*dashboard*",
+]
+
+EXTRACTION_INSTRUCTION = """
+Analyze the page content.
+If it's a leaderboard, extract ALL user rows with their ranks, usernames, scores, and wallet addresses.
+If it's a single user profile, extract their details.
+
+Look for specific 'Twitter' or 'X' engagement metrics IF displayed, and put
+them into 'additional_info' (connected X account, tweet counts, referrals).
+
+Look specifically for: 'Rank', 'Position', '#', 'Points', 'Score', 'XP', 'Address', 'User'.
+"""
+
+# Scroll lazy lists and press "load more" until nothing changes
+EXPAND_PAGE_JS = """
+(async () => {
+    for (let i = 0; i < 20; i++) {
+        window.scrollBy(0, 500);
+        await new Promise(r => setTimeout(r, 500));
+    }
+    const selectors = [".load-more-btn", "[aria-label='Load more']", "[aria-label='Next page']", ".pagination-next"];
+    for (let i = 0; i < 5; i++) {
+        const button = selectors.map(s => document.querySelector(s)).find(b => b && b.offsetParent !== null);
+        if (!button) break;
+        button.scrollIntoView();
+        button.click();
+        await new Promise(r => setTimeout(r, 2000));
+    }
+})();
+"""
+
+
+class UserProfile(BaseModel):
+    """One user as extracted from a page"""
+    username: Optional[str] = Field(None, description="The username or handle of the user.")
+    user_id: Optional[str] = Field(None, description="The unique identifier or ID of the user.")
+    wallet_address: Optional[str] = Field(None, description="The on-chain wallet address (e.g., starting with 0x).")
+    points_or_score: Optional[str] = Field(None, description="The user's score, points, XP, or reputation.")
+    leaderboard_rank: Optional[str] = Field(None, description="The user's rank or position on a leaderboard (e.g., #1, 1st, 50).")
+    twitter_handle: Optional[str] = Field(None, description="The user's Twitter/X handle (e.g. @username) if found.")
+    additional_info: Dict[str, Any] = Field({}, description="Any other relevant metrics like level, quests completed, etc.")
+
+
+class PageData(BaseModel):
+    """Everything extracted from one page"""
+    users: List[UserProfile] = Field(default_factory=list, description="List of user profiles found on the page.")
+    page_summary: Optional[str] = Field(None, description="Brief summary of what this page is (e.g., 'Leaderboard', 'User Profile', 'Quest Page').")
+
+
+@dataclass
+class PageResult:
+    url: str
+    users: List[Dict[str, Any]] = field(default_factory=list)
+    links: List[Link] = field(default_factory=list)
+
+
+class CrawlError(Exception):
+    """A page could not be fetched"""
+
+
+def run_config():
+    """Per-page crawl settings: LLM extraction over pruned markdown, no deep crawl"""
+    from crawl4ai import CrawlerRunConfig, LLMConfig, VirtualScrollConfig
+    from crawl4ai.content_filter_strategy import PruningContentFilter
+    from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+    from crawl4ai.extraction_strategy import LLMExtractionStrategy
+    from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+    llm_config = LLMConfig(
+        provider=f"ollama/{settings.OLLAMA_MODEL}",
+        api_token="no-token",
+        base_url=settings.OLLAMA_HOST,
+    )
+    return CrawlerRunConfig(
+        extraction_strategy=LLMExtractionStrategy(
+            llm_config=llm_config,
+            schema=PageData.model_json_schema(),
+            extraction_type="schema",
+            input_format="fit_markdown",
+            instruction=EXTRACTION_INSTRUCTION,
+        ),
+        # Heuristic pruning instead of a second LLM pass per page
+        markdown_generator=DefaultMarkdownGenerator(content_filter=PruningContentFilter()),
+        scraping_strategy=LXMLWebScrapingStrategy(),
+        virtual_scroll_config=VirtualScrollConfig(
+            scroll_count=20,
+            scroll_by="container_height",
+            wait_after_scroll=1.0,
+            container_selector="body",
+        ),
+        js_code=[EXPAND_PAGE_JS],
+        cache_mode="bypass",
+    )
+
+
+def extracted_users(content: Optional[str]) -> List[Dict[str, Any]]:
+    """User records from the extraction output, which is a list of per-chunk results"""
+    if not content:
+        return []
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return []
+    chunks = data if isinstance(data, list) else [data]
+    users = []
+    for chunk in chunks:
+        if not isinstance(chunk, dict) or chunk.get("error"):
+            continue
+        if "users" in chunk:
+            users.extend(u for u in chunk["users"] or () if isinstance(u, dict))
+        elif chunk.get("username") or chunk.get("user_id"):
+            users.append(chunk)
+    return users
+
+
+def site_links(page_url: str, links: List[Dict[str, Any]]) -> List[Link]:
+    """Same-site links with their anchor text, absolute and without fragments"""
+    domain = normalize_domain(page_url)
+    found: Dict[str, Link] = {}
+    for link in links:
+        href = link.get("href") if isinstance(link, dict) else link
+        if not href:
+            continue
+        url, _ = urldefrag(urljoin(page_url, href))
+        if not url.startswith(("http://", "https://")) or normalize_domain(url) != domain:
+            continue
+        text = (link.get("text") or "").strip() if isinstance(link, dict) else ""
+        if url not in found or (text and not found[url].text):
+            found[url] = Link(url, text)
+    return list(found.values())
+
+
+async def crawl_page(url: str) -> PageResult:
+    """Fetch one page on a pooled browser and extract its users and links"""
+    async with browser_pool.crawler() as crawler:
+        result = await crawler.arun(url=url, config=run_config())
+    if not result.success:
+        raise CrawlError(f"{url}: {result.error_message}")
+    return PageResult(
+        url=result.url or url,
+        users=extracted_users(result.extracted_content),
+        links=site_links(result.url or url, (result.links or {}).get("internal", [])),
+    )
@@ -0,0 +1,191 @@
+"""
+Adaptive recrawl scheduling
+
+Every crawled URL becomes a ``CrawlTarget``. Each visit compares a
+fingerprint of the data extracted from the page (not its markup, which
+changes with every render) with the previous one. The page's changes are
+modelled as a Poisson process. Its rate is estimated from the decayed
+counts of visits and detected changes, with the Cho & Garcia-Molina
+estimator ``-ln((n - X + 0.5) / (n + 0.5)) / mean interval``. That
+estimator stays finite when every visit saw a change, and the decay lets it
+follow pages that speed up or settle down.
+
+The next visit is due when the page has changed with probability
+``CRAWLER_REVISIT_CHANGE_PROBABILITY``, ``-ln(1 - p) / rate``, clamped to
+the min/max revisit settings. Each scheduler run spends a platform's
+hourly budget on its due targets, most-likely-changed first. The budget is
+paced over the hour, so unused budget carries forward but never arrives
+all at once.
+"""
+
+import hashlib
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import get_redis
+from app.models.crawler import CrawlTarget
+from app.models.platform import Platform
+
+# Weight of past visits per new one, so the estimate follows pages that change pace
+DECAY = 0.9
+# Prior for a new URL: as if seen once, half changed, over an hour
+PRIOR_VISITS = 1.0
+PRIOR_CHANGES = 0.5
+PRIOR_SECONDS = 3600.0
+
+
+def fingerprint(users: List[Dict[str, Any]], links: Iterable[str] = ()) -> str:
+    """Hash of what a page yielded; link lists stand in on pages without users"""
+    if users:
+        payload = sorted(json.dumps(u, sort_keys=True, default=str) for u in users)
+    else:
+        payload = sorted(links)
+    return hashlib.sha1("\n".join(payload).encode()).hexdigest()
+
+
+def estimate_change_rate(visits: float, changes: float, observed_seconds: float) -> float:
+    """Poisson change rate per hour from (decayed) visit and change counts"""
+    if visits <= 0 or observed_seconds <= 0:
+        return PRIOR_CHANGES / (PRIOR_SECONDS / 3600)
+    mean_interval_hours = observed_seconds / visits / 3600
+    unchanged = max(visits - changes, 0.0)
+    return -math.log((unchanged + 0.5) / (visits + 0.5)) / mean_interval_hours
+
+
+def revisit_interval(change_rate: float) -> float:
+    """Seconds until a page changing at ``change_rate`` per hour has probably changed"""
+    if change_rate <= 0:
+        return float(settings.CRAWLER_MAX_REVISIT_SECONDS)
+    seconds = -math.log(1 - settings.CRAWLER_REVISIT_CHANGE_PROBABILITY) / change_rate * 3600
+    return min(max(seconds, settings.CRAWLER_MIN_REVISIT_SECONDS), settings.CRAWLER_MAX_REVISIT_SECONDS)
+
+
+def _observe(target: CrawlTarget, digest: str, now: datetime) -> None:
+    changed = digest != target.fingerprint
+    interval = (now - target.last_crawled_at).total_seconds() if target.last_crawled_at else PRIOR_SECONDS
+    target.visits = (target.visits or 0) * DECAY + 1
+    target.changes = (target.changes or 0) * DECAY + (1 if changed else 0)
+    target.observed_seconds = (target.observed_seconds or 0) * DECAY + max(interval, 1.0)
+    target.change_rate = estimate_change_rate(target.visits, target.changes, target.observed_seconds)
+    if changed:
+        target.fingerprint = digest
+        target.last_changed_at = now
+    target.last_crawled_at = now
+    target.next_crawl_at = now + timedelta(seconds=revisit_interval(target.change_rate))
+
+
+async def record_visit(
+    db: AsyncSession,
+    platform_id: int,
+    url: str,
+    digest: str,
+    depth: int = 0,
+    now: Optional[datetime] = None
+) -> None:
+    """Fold one visit of a URL into its change estimate and reschedule it"""
+    now = now or datetime.utcnow()
+    rate = estimate_change_rate(PRIOR_VISITS, PRIOR_CHANGES, PRIOR_SECONDS)
+    inserted = await db.execute(
+        insert(CrawlTarget)
+        .values(
+            platform_id=platform_id, url=url, depth=depth, fingerprint=digest,
+            visits=PRIOR_VISITS, changes=PRIOR_CHANGES, observed_seconds=PRIOR_SECONDS,
+            change_rate=rate, last_crawled_at=now, last_changed_at=now,
+            next_crawl_at=now + timedelta(seconds=revisit_interval(rate)),
+        )
+        .on_conflict_do_nothing(constraint="uq_crawl_targets_platform_url")
+        .returning(CrawlTarget.id)
+    )
+    if inserted.scalar() is not None:
+        return
+
+    result = await db.execute(
+        select(CrawlTarget)
+        .where(CrawlTarget.platform_id == platform_id, CrawlTarget.url == url)
+        .with_for_update()
+    )
+    _observe(result.scalar_one(), digest, now)
+
+
+async def known_urls(db: AsyncSession, platform_id: int, urls: List[str]) -> set:
+    """The URLs among ``urls`` that are already scheduled"""
+    if not urls:
+        return set()
+    result = await db.execute(
+        select(CrawlTarget.url).where(CrawlTarget.platform_id == platform_id, CrawlTarget.url.in_(urls))
+    )
+    return set(result.scalars())
+
+
+def _budget_key(platform_id: int, hour: int) -> str:
+    return f"crawl:budget:{platform_id}:{hour}"
+
+
+async def budget_allowance(platform_id: int, budget_per_hour: int) -> int:
+    """Revisits a platform may still start now, pacing its budget over the hour"""
+    now = time.time()
+    hour, elapsed = divmod(now, 3600)
+    # Allow for the scheduler's own interval so the last run of an hour is not starved
+    paced = math.ceil(budget_per_hour * min(1.0, (elapsed + settings.CRAWLER_SCHEDULE_INTERVAL_SECONDS) / 3600))
+    used = int(await get_redis().get(_budget_key(platform_id, int(hour))) or 0)
+    return max(0, paced - used)
+
+
+async def spend_budget(platform_id: int, pages: int) -> None:
+    key = _budget_key(platform_id, int(time.time() // 3600))
+    redis = get_redis()
+    await redis.incrby(key, pages)
+    await redis.expire(key, 7200)
+
+
+def platform_budget(platform: Platform) -> int:
+    return int((platform.crawler_config or {}).get("budget_per_hour") or settings.CRAWLER_BUDGET_PER_HOUR)
+
+
+async def claim_due_targets(db: AsyncSession, platform_id: int, limit: int) -> List[CrawlTarget]:
+    """
+    Due targets of a platform, most likely changed first, leased until they run
+
+    Claimed targets are pushed ``CRAWLER_MIN_REVISIT_SECONDS`` ahead so the
+    next scheduler run does not queue them again while they wait their turn;
+    the visit sets their real next time. The caller commits.
+    """
+    if limit <= 0:
+        return []
+    now = datetime.utcnow()
+    hours_since = func.extract("epoch", now - CrawlTarget.last_crawled_at) / 3600
+    changed_probability = 1 - func.exp(-func.coalesce(CrawlTarget.change_rate, 0) * hours_since)
+    result = await db.execute(
+        select(CrawlTarget)
+        .where(CrawlTarget.platform_id == platform_id, CrawlTarget.next_crawl_at <= now)
+        .order_by(changed_probability.desc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    targets = list(result.scalars())
+    lease = now + timedelta(seconds=settings.CRAWLER_MIN_REVISIT_SECONDS)
+    for target in targets:
+        target.next_crawl_at = lease
+    return targets
+
+
+async def unscheduled_platforms(db: AsyncSession) -> List[Platform]:
+    """Active platforms without targets yet whose last crawl is missing or stale"""
+    stale = datetime.utcnow() - timedelta(seconds=settings.CRAWLER_MAX_REVISIT_SECONDS)
+    has_targets = select(CrawlTarget.id).where(CrawlTarget.platform_id == Platform.id).exists()
+    result = await db.execute(
+        select(Platform).where(
+            Platform.is_active == True,
+            ~has_targets,
+            (Platform.last_crawled_at.is_(None)) | (Platform.last_crawled_at < stale),
+        )
+    )
+    return list(result.scalars())
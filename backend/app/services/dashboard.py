@@ -0,0 +1,152 @@
+"""
+Precomputed dashboard stats
+
+``UserDashboardStats`` holds each user's dashboard aggregates so the
+dashboard endpoint is a primary-key lookup. Rows are recomputed in SQL for
+just the users whose profiles a crawl or scoring run touched; anything that
+writes ``PlatformProfile``, ``ShillScore``, ``CampaignParticipation`` or
+``ROIPrediction`` rows for known profiles should call ``refresh_for_profiles``
+in the same transaction, and linking a wallet to a user refreshes that user.
+Reads never write: a user without a row yet gets figures computed on the fly.
+"""
+
+from typing import Dict, Iterable, List
+from uuid import UUID
+
+from sqlalchemy import select, func, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import ShillScore, ROIPrediction, UserDashboardStats
+from app.models.platform import Campaign, CampaignParticipation
+from app.models.profile import PlatformProfile
+from app.models.user import UserWallet
+
+REFRESH_CHUNK_SIZE = 1000
+
+
+def _owned_profiles(user_ids: List[UUID]):
+    return (
+        select(UserWallet.user_id, PlatformProfile.id.label("profile_id"))
+        .join(PlatformProfile, PlatformProfile.user_wallet_id == UserWallet.id)
+        .where(UserWallet.user_id.in_(user_ids))
+        .subquery()
+    )
+
+
+async def _compute(db: AsyncSession, user_ids: List[UUID]) -> Dict[UUID, dict]:
+    """Aggregate every dashboard figure for a chunk of users"""
+    stats = {
+        user_id: {
+            "user_id": user_id,
+            "profiles_count": 0,
+            "avg_rank": None,
+            "total_points": 0,
+            "shill_score": None,
+            "estimated_value_usd": 0,
+        }
+        for user_id in user_ids
+    }
+    owned = _owned_profiles(user_ids)
+
+    result = await db.execute(
+        select(
+            owned.c.user_id,
+            func.count(PlatformProfile.id),
+            func.avg(PlatformProfile.global_rank),
+            func.coalesce(func.sum(PlatformProfile.total_points), 0),
+        )
+        .join(PlatformProfile, PlatformProfile.id == owned.c.profile_id)
+        .group_by(owned.c.user_id)
+    )
+    for user_id, profiles_count, avg_rank, total_points in result.all():
+        stats[user_id]["profiles_count"] = profiles_count
+        stats[user_id]["avg_rank"] = int(avg_rank) if avg_rank is not None else None
+        stats[user_id]["total_points"] = total_points
+
+    # Latest score of each profile, averaged per user
+    latest_scores = (
+        select(ShillScore.platform_profile_id, ShillScore.score)
+        .join(owned, owned.c.profile_id == ShillScore.platform_profile_id)
+        .distinct(ShillScore.platform_profile_id)
+        .order_by(ShillScore.platform_profile_id, ShillScore.calculated_at.desc())
+        .subquery()
+    )
+    result = await db.execute(
+        select(owned.c.user_id, func.avg(latest_scores.c.score))
+        .join(latest_scores, latest_scores.c.platform_profile_id == owned.c.profile_id)
+        .group_by(owned.c.user_id)
+    )
+    for user_id, shill_score in result.all():
+        stats[user_id]["shill_score"] = shill_score
+
+    # Even share of the latest predicted airdrop of every campaign the user's
+    # profiles take part in; the latest prediction is one probe of
+    # ix_roi_predictions_campaign_created per participation
+    latest_prediction = (
+        select(ROIPrediction.predicted_airdrop_value_usd)
+        .where(ROIPrediction.campaign_id == Campaign.id)
+        .order_by(ROIPrediction.created_at.desc())
+        .limit(1)
+        .lateral()
+    )
+    share = latest_prediction.c.predicted_airdrop_value_usd / func.greatest(Campaign.total_participants, 1)
+    result = await db.execute(
+        select(owned.c.user_id, func.coalesce(func.sum(share), 0))
+        .join(CampaignParticipation, CampaignParticipation.platform_profile_id == owned.c.profile_id)
+        .join(Campaign, Campaign.id == CampaignParticipation.campaign_id)
+        .join(latest_prediction, true())
+        .group_by(owned.c.user_id)
+    )
+    for user_id, estimated_value in result.all():
+        stats[user_id]["estimated_value_usd"] = estimated_value
+
+    return stats
+
+
+async def refresh_dashboard_stats(db: AsyncSession, user_ids: Iterable[UUID]) -> int:
+    """Recompute and upsert the dashboard rows of these users"""
+    user_ids = list(set(user_ids))
+    for start in range(0, len(user_ids), REFRESH_CHUNK_SIZE):
+        chunk = user_ids[start:start + REFRESH_CHUNK_SIZE]
+        rows = list((await _compute(db, chunk)).values())
+        statement = insert(UserDashboardStats).values(rows)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserDashboardStats.user_id],
+                set_={
+                    "profiles_count": statement.excluded.profiles_count,
+                    "avg_rank": statement.excluded.avg_rank,
+                    "total_points": statement.excluded.total_points,
+                    "shill_score": statement.excluded.shill_score,
+                    "estimated_value_usd": statement.excluded.estimated_value_usd,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+    return len(user_ids)
+
+
+async def refresh_for_profiles(db: AsyncSession, profile_ids: Iterable[UUID]) -> int:
+    """Refresh the users who own any of these profiles"""
+    profile_ids = list(profile_ids)
+    if not profile_ids:
+        return 0
+    user_ids = set()
+    for start in range(0, len(profile_ids), REFRESH_CHUNK_SIZE):
+        result = await db.execute(
+            select(UserWallet.user_id)
+            .join(PlatformProfile, PlatformProfile.user_wallet_id == UserWallet.id)
+            .where(PlatformProfile.id.in_(profile_ids[start:start + REFRESH_CHUNK_SIZE]))
+            .distinct()
+        )
+        user_ids.update(result.scalars().all())
+    return await refresh_dashboard_stats(db, user_ids)
+
+
+async def get_dashboard_stats(db: AsyncSession, user_id: UUID) -> UserDashboardStats:
+    """A user's stats row, computed without storing it if it does not exist yet"""
+    stats = await db.get(UserDashboardStats, user_id)
+    if stats is None:
+        stats = UserDashboardStats(**(await _compute(db, [user_id]))[user_id])
+    return stats
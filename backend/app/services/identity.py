@@ -0,0 +1,326 @@
+"""Cross-platform identity resolution
+
+Wallets, twitter handles, platform usernames and profile ids are normalized
+into ``(kind, value)`` keys and merged with a union-find. Resolved clusters are
+materialized into ``identity_members`` with every key pointing straight at its
+root, so "all profiles of this person" is one indexed lookup.
+"""
+
+import re
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select, update, func, tuple_, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.analytics import ShillScore
+from app.models.identity import IdentityMember
+from app.models.profile import PlatformProfile
+from app.models.twitter import TwitterProfile
+
+IdentityKey = Tuple[str, str]
+
+# Keep IN (...) lists well below the asyncpg bind parameter limit
+LOOKUP_CHUNK_SIZE = 1000
+
+_WALLET_RE = re.compile(r"^0x[0-9a-f]{40}$")
+_TWITTER_RE = re.compile(r"^[a-z0-9_]{1,15}$")
+_TWITTER_PREFIXES = (
+    "https://twitter.com/", "http://twitter.com/", "https://x.com/", "http://x.com/",
+    "https://www.twitter.com/", "https://www.x.com/", "twitter.com/", "x.com/",
+)
+
+
+def normalize_wallet(address: Optional[str]) -> Optional[str]:
+    """Normalize an EVM wallet address, or None if it is not one"""
+    if not address:
+        return None
+    address = address.strip().lower()
+    return address if _WALLET_RE.match(address) else None
+
+
+def normalize_twitter_handle(handle: Optional[str]) -> Optional[str]:
+    """Normalize a twitter handle or profile URL, or None if it is not one"""
+    if not handle:
+        return None
+    handle = handle.strip().lower()
+    for prefix in _TWITTER_PREFIXES:
+        if handle.startswith(prefix):
+            handle = handle[len(prefix):]
+            break
+    handle = handle.split("?")[0].strip("/").lstrip("@")
+    return handle if _TWITTER_RE.match(handle) else None
+
+
+def normalize_username(platform_id: int, username: Optional[str]) -> Optional[str]:
+    """Normalize a platform username (usernames are only unique per platform)"""
+    if not username or not username.strip():
+        return None
+    return f"{platform_id}:{username.strip().lower()}"
+
+
+def profile_keys(profile: PlatformProfile, wallet_address: Optional[str] = None) -> List[IdentityKey]:
+    """Identity keys observed on a platform profile"""
+    keys = [("platform_profile", str(profile.id))]
+
+    wallet = normalize_wallet(wallet_address)
+    if wallet:
+        keys.append(("wallet", wallet))
+    if profile.user_wallet_id:
+        keys.append(("user_wallet", str(profile.user_wallet_id)))
+
+    twitter = normalize_twitter_handle(profile.twitter_handle)
+    if twitter:
+        keys.append(("twitter", twitter))
+
+    username = normalize_username(profile.platform_id, profile.username)
+    if username:
+        keys.append(("username", username))
+
+    return keys
+
+
+def twitter_profile_keys(profile: TwitterProfile) -> List[IdentityKey]:
+    """Identity keys observed on a twitter profile"""
+    keys = [("twitter_profile", str(profile.id))]
+    twitter = normalize_twitter_handle(profile.twitter_handle)
+    if twitter:
+        keys.append(("twitter", twitter))
+    return keys
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size"""
+
+    def __init__(self):
+        self.parent: Dict[IdentityKey, IdentityKey] = {}
+        self.size: Dict[IdentityKey, int] = {}
+
+    def add(self, key: IdentityKey) -> None:
+        if key not in self.parent:
+            self.parent[key] = key
+            self.size[key] = 1
+
+    def find(self, key: IdentityKey) -> IdentityKey:
+        self.add(key)
+        parent = self.parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(self, a: IdentityKey, b: IdentityKey) -> IdentityKey:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    def groups(self) -> List[List[IdentityKey]]:
+        """Connected components"""
+        components: Dict[IdentityKey, List[IdentityKey]] = {}
+        for key in self.parent:
+            components.setdefault(self.find(key), []).append(key)
+        return list(components.values())
+
+
+def _chunks(items: Sequence, size: int = LOOKUP_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def resolve_identities(
+    db: AsyncSession,
+    groups: Iterable[Sequence[IdentityKey]]
+) -> Dict[IdentityKey, uuid.UUID]:
+    """
+    Link each group of keys into one identity and persist the result
+
+    Groups are merged in memory first, then each component is reconciled
+    with the stored clusters it touches: smaller stored clusters are
+    re-pointed at the largest one and unseen keys are inserted. The caller
+    owns the transaction.
+    """
+    uf = UnionFind()
+    for group in groups:
+        group = list(group)
+        if not group:
+            continue
+        uf.add(group[0])
+        for key in group[1:]:
+            uf.union(group[0], key)
+
+    keys = list(uf.parent)
+    if not keys:
+        return {}
+
+    stored: Dict[IdentityKey, uuid.UUID] = {}
+    for chunk in _chunks(keys):
+        result = await db.execute(
+            select(IdentityMember.kind, IdentityMember.value, IdentityMember.identity_id).where(
+                tuple_(IdentityMember.kind, IdentityMember.value).in_(chunk)
+            )
+        )
+        for kind, value, identity_id in result:
+            stored[(kind, value)] = identity_id
+
+    components = uf.groups()
+    merging: Set[uuid.UUID] = set()
+    for component in components:
+        ids = {stored[key] for key in component if key in stored}
+        if len(ids) > 1:
+            merging |= ids
+
+    # Union by size against the stored clusters so merges move the fewest rows
+    cluster_sizes: Dict[uuid.UUID, int] = {}
+    if merging:
+        for chunk in _chunks(list(merging)):
+            result = await db.execute(
+                select(IdentityMember.identity_id, func.count())
+                .where(IdentityMember.identity_id.in_(chunk))
+                .group_by(IdentityMember.identity_id)
+            )
+            cluster_sizes.update(result.all())
+
+    resolved: Dict[IdentityKey, uuid.UUID] = {}
+    new_rows = []
+    for component in components:
+        ids = {stored[key] for key in component if key in stored}
+        if not ids:
+            root = uuid.uuid4()
+        else:
+            root = max(ids, key=lambda i: (cluster_sizes.get(i, 0), str(i)))
+            losers = [i for i in ids if i != root]
+            if losers:
+                await db.execute(
+                    update(IdentityMember)
+                    .where(IdentityMember.identity_id.in_(losers))
+                    .values(identity_id=root)
+                )
+
+        for key in component:
+            resolved[key] = root
+            if key not in stored:
+                kind, value = key
+                new_rows.append({
+                    "identity_id": root,
+                    "kind": kind,
+                    "value": value,
+                    "platform_profile_id": uuid.UUID(value) if kind == "platform_profile" else None,
+                })
+
+    for chunk in _chunks(new_rows, LOOKUP_CHUNK_SIZE // 5):
+        await db.execute(
+            insert(IdentityMember).values(chunk).on_conflict_do_nothing(
+                constraint="uq_identity_members_kind_value"
+            )
+        )
+
+    return resolved
+
+
+async def get_identity_id(db: AsyncSession, kind: str, value: str) -> Optional[uuid.UUID]:
+    """Identity id for a normalized key"""
+    result = await db.execute(
+        select(IdentityMember.identity_id).where(
+            IdentityMember.kind == kind,
+            IdentityMember.value == value
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_linked_profiles(db: AsyncSession, kind: str, value: str) -> List[PlatformProfile]:
+    """All platform profiles resolved to the same identity as a normalized key"""
+    anchor = select(IdentityMember.identity_id).where(
+        IdentityMember.kind == kind,
+        IdentityMember.value == value
+    ).scalar_subquery()
+
+    result = await db.execute(
+        select(PlatformProfile)
+        .join(IdentityMember, IdentityMember.platform_profile_id == PlatformProfile.id)
+        .where(IdentityMember.identity_id == anchor)
+    )
+    return list(result.scalars().all())
+
+
+async def link_user_wallet(db: AsyncSession, user_wallet_id: int, wallet_address: str) -> List[uuid.UUID]:
+    """Attach a verified wallet to the unclaimed profiles resolved to its address; ids of those profiles"""
+    wallet = normalize_wallet(wallet_address)
+    if not wallet:
+        return []
+    linked = []
+    for profile in await get_linked_profiles(db, "wallet", wallet):
+        if profile.user_wallet_id is None:
+            profile.user_wallet_id = user_wallet_id
+            linked.append(profile.id)
+    return linked
+
+
+def _array(name: str, values: Sequence, item_type=String):
+    """One array bind parameter, for ``= ANY(...)`` regardless of how many values"""
+    return bindparam(name, list(values), type_=ARRAY(item_type))
+
+
+async def bulk_lookup_profiles(
+    db: AsyncSession,
+    wallets: Sequence[str] = (),
+    twitter_handles: Sequence[str] = (),
+    usernames: Sequence[str] = (),
+    platform_id: Optional[int] = None,
+) -> Dict[IdentityKey, List[PlatformProfile]]:
+    """
+    Profiles for many normalized identifiers in a few set-based queries
+
+    Wallets and twitter handles resolve through their identities, so they
+    find every linked profile; usernames match profiles directly (on any
+    platform unless ``platform_id`` is given). Each kind is one query with a
+    single array parameter, whatever the number of identifiers.
+    """
+    found: Dict[IdentityKey, List[PlatformProfile]] = {}
+    anchor = aliased(IdentityMember)
+    member = aliased(IdentityMember)
+
+    for kind, values in (("wallet", wallets), ("twitter", twitter_handles)):
+        if not values:
+            continue
+        query = (
+            select(anchor.value, PlatformProfile)
+            .join(member, member.identity_id == anchor.identity_id)
+            .join(PlatformProfile, PlatformProfile.id == member.platform_profile_id)
+            .where(anchor.kind == kind, anchor.value == any_(_array("values", values)))
+        )
+        if platform_id:
+            query = query.where(PlatformProfile.platform_id == platform_id)
+        for value, profile in await db.execute(query):
+            found.setdefault((kind, value), []).append(profile)
+
+    if usernames:
+        # Compared in the C collation to use ix_platform_profiles_username_prefix
+        username = func.lower(PlatformProfile.username).collate("C")
+        query = select(username, PlatformProfile).where(username == any_(_array("values", usernames)))
+        if platform_id:
+            query = query.where(PlatformProfile.platform_id == platform_id)
+        for value, profile in await db.execute(query):
+            found.setdefault(("username", value), []).append(profile)
+
+    return found
+
+
+async def latest_shill_scores(db: AsyncSession, profile_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, ShillScore]:
+    """Most recent shill score of each profile"""
+    if not profile_ids:
+        return {}
+    result = await db.execute(
+        select(ShillScore)
+        .where(ShillScore.platform_profile_id == any_(_array("ids", profile_ids, PG_UUID(as_uuid=True))))
+        .distinct(ShillScore.platform_profile_id)
+        .order_by(ShillScore.platform_profile_id, ShillScore.calculated_at.desc())
+    )
+    return {s.platform_profile_id: s for s in result.scalars()}
@@ -0,0 +1,387 @@
+"""Crawl result ingestion"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import bump_versions, on_commit
+from app.models.platform import Platform, Campaign
+from app.models.profile import PlatformProfile
+from app.models.twitter import TwitterProfile
+from app.models.user import UserWallet
+from app.services.identity import (
+    normalize_wallet, normalize_twitter_handle,
+    profile_keys, twitter_profile_keys, resolve_identities
+)
+from app.services.alerts.diff import (
+    Snapshot, AlertEvent, snapshot_of, diff_leaderboard, campaign_events
+)
+from app.services.alerts.manager import write_alerts
+from app.services.leaderboard import to_entry, update_leaderboards
+from app.services.dashboard import refresh_for_profiles
+from app.services.realtime import publish_events
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+# Scraped date formats tried after ISO 8601
+_DATE_FORMATS = ("%Y/%m/%d", "%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y")
+
+# Rank changes included in one leaderboard_updated message
+LIVE_CHANGES_LIMIT = 500
+
+
+@dataclass
+class ProfileIngestResult:
+    """Profiles touched by an ingest and their state before it"""
+    profiles: List[PlatformProfile] = field(default_factory=list)
+    previous: Snapshot = field(default_factory=dict)
+
+
+@dataclass
+class CrawlIngestResult:
+    """Outcome of ingesting one platform crawl"""
+    profiles: List[PlatformProfile] = field(default_factory=list)
+    new_campaigns: List[Campaign] = field(default_factory=list)
+    events: List[AlertEvent] = field(default_factory=list)
+    alerts_written: int = 0
+
+
+def parse_rank(value: Any) -> Optional[int]:
+    """Parse a scraped rank such as '#12', '12th' or 12"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    match = _NUMBER_RE.search(str(value).replace(",", ""))
+    return int(float(match.group())) if match else None
+
+
+def parse_points(value: Any) -> Optional[Decimal]:
+    """Parse a scraped score such as '1,234 XP' or '5.2k'"""
+    if value is None:
+        return None
+    text = str(value).replace(",", "").strip().lower()
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+    try:
+        points = Decimal(match.group())
+    except InvalidOperation:
+        return None
+    suffix = text[match.end():match.end() + 1]
+    if suffix == "k":
+        points *= 1000
+    elif suffix == "m":
+        points *= 1000000
+    return points
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """Parse a scraped date (ISO 8601, a common written form or a unix timestamp) as naive UTC"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)):
+        # Millisecond timestamps are common in JSON APIs
+        seconds = value / 1000 if abs(value) > 1e11 else value
+        try:
+            parsed = datetime.fromtimestamp(seconds, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for fmt in _DATE_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _external_id(record: Dict[str, Any]) -> Optional[str]:
+    external_id = record.get("user_id") or record.get("username")
+    return str(external_id).strip()[:255] if external_id else None
+
+
+async def ingest_profiles(
+    db: AsyncSession,
+    platform_id: int,
+    records: List[Dict[str, Any]]
+) -> ProfileIngestResult:
+    """
+    Upsert extracted user records (``UserProfile`` dicts from the harvester)
+    into platform profiles and fold their identifiers into the identity index
+
+    The caller owns the transaction.
+    """
+    records = [r for r in records if _external_id(r)]
+    if not records:
+        return ProfileIngestResult()
+
+    external_ids = list({_external_id(r) for r in records})
+    result = await db.execute(
+        select(PlatformProfile).where(
+            PlatformProfile.platform_id == platform_id,
+            PlatformProfile.external_user_id.in_(external_ids)
+        )
+    )
+    by_external_id = {p.external_user_id: p for p in result.scalars().all()}
+    previous = snapshot_of(by_external_id.values())
+
+    wallets = {normalize_wallet(r.get("wallet_address")) for r in records} - {None}
+    wallet_ids: Dict[str, int] = {}
+    if wallets:
+        result = await db.execute(
+            select(func.lower(UserWallet.wallet_address), UserWallet.id).where(
+                func.lower(UserWallet.wallet_address).in_(wallets)
+            )
+        )
+        wallet_ids = dict(result.all())
+
+    now = datetime.utcnow()
+    touched: Dict[str, tuple] = {}
+    for record in records:
+        external_id = _external_id(record)
+        profile = by_external_id.get(external_id)
+        if profile is None:
+            profile = PlatformProfile(platform_id=platform_id, external_user_id=external_id)
+            db.add(profile)
+            by_external_id[external_id] = profile
+
+        if record.get("username"):
+            profile.username = str(record["username"])[:255]
+        if record.get("twitter_handle"):
+            profile.twitter_handle = str(record["twitter_handle"])[:100]
+
+        points = parse_points(record.get("points_or_score"))
+        if points is not None:
+            profile.total_points = points
+        rank = parse_rank(record.get("leaderboard_rank"))
+        if rank is not None:
+            profile.global_rank = rank
+
+        wallet = normalize_wallet(record.get("wallet_address"))
+        if wallet in wallet_ids and profile.user_wallet_id is None:
+            profile.user_wallet_id = wallet_ids[wallet]
+
+        profile.last_synced_at = now
+        touched[external_id] = (profile, wallet)
+
+    twitter_profiles = await _upsert_twitter_profiles(db, records, now)
+
+    # Assign primary keys before they are used as identity keys
+    await db.flush()
+
+    groups = [profile_keys(p, wallet) for p, wallet in touched.values()]
+    groups.extend(twitter_profile_keys(tp) for tp in twitter_profiles)
+    await resolve_identities(db, groups)
+
+    return ProfileIngestResult(
+        profiles=[profile for profile, _ in touched.values()],
+        previous=previous,
+    )
+
+
+def _campaign_key(record: Dict[str, Any]) -> Optional[str]:
+    key = record.get("external_id") or record.get("url")
+    return str(key).strip()[:255] if key else None
+
+
+async def ingest_campaigns(
+    db: AsyncSession,
+    platform_id: int,
+    records: List[Dict[str, Any]]
+) -> List[Campaign]:
+    """Upsert extracted campaign records and return the newly discovered ones"""
+    records = [r for r in records if _campaign_key(r) and r.get("name")]
+    if not records:
+        return []
+
+    keys = list({_campaign_key(r) for r in records})
+    result = await db.execute(
+        select(Campaign).where(
+            Campaign.platform_id == platform_id,
+            Campaign.external_id.in_(keys)
+        )
+    )
+    by_key = {c.external_id: c for c in result.scalars().all()}
+
+    new_campaigns = []
+    for record in records:
+        key = _campaign_key(record)
+        campaign = by_key.get(key)
+        if campaign is None:
+            campaign = Campaign(platform_id=platform_id, external_id=key)
+            db.add(campaign)
+            by_key[key] = campaign
+            new_campaigns.append(campaign)
+
+        campaign.name = str(record["name"])[:500]
+        for column in ("description", "url", "campaign_type", "status"):
+            if record.get(column) is not None:
+                setattr(campaign, column, record[column])
+        for column in ("start_date", "end_date"):
+            value = parse_date(record.get(column))
+            if value is not None:
+                setattr(campaign, column, value)
+        participants = parse_rank(record.get("total_participants"))
+        if participants is not None:
+            campaign.total_participants = participants
+        rewards = parse_points(record.get("total_rewards_usd"))
+        if rewards is not None:
+            campaign.total_rewards_usd = rewards
+
+    await db.flush()
+    return new_campaigns
+
+
+def live_updates(
+    platform_id: int,
+    events: List[AlertEvent],
+    new_campaigns: List[Campaign],
+    profiles_updated: int
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Live-update messages announcing a committed crawl"""
+    changes = [
+        {
+            "profile_id": e.related_entity_id,
+            "alert_type": e.alert_type,
+            "old_rank": e.old_rank,
+            "new_rank": e.new_rank,
+        }
+        for e in events
+        if e.related_entity_type == 'profile'
+    ]
+    updates = [(
+        f"leaderboard:{platform_id}",
+        {
+            "type": "leaderboard_updated",
+            "platform_id": platform_id,
+            "profiles_updated": profiles_updated,
+            "changes": changes[:LIVE_CHANGES_LIMIT],
+        },
+    )]
+    updates.extend(
+        (
+            f"campaigns:{platform_id}",
+            {
+                "type": "new_campaign",
+                "platform_id": platform_id,
+                "campaign": {
+                    "id": str(c.id),
+                    "name": c.name,
+                    "url": c.url,
+                    "campaign_type": c.campaign_type,
+                    "status": c.status,
+                },
+            },
+        )
+        for c in new_campaigns
+    )
+    return updates
+
+
+async def ingest_crawl(
+    db: AsyncSession,
+    platform_id: int,
+    users: List[Dict[str, Any]],
+    campaigns: Optional[List[Dict[str, Any]]] = None
+) -> CrawlIngestResult:
+    """
+    Ingest one platform crawl: upsert profiles and campaigns, diff the
+    leaderboard against its previous state, write the resulting alerts and
+    refresh the dashboards of the users who own the crawled profiles
+
+    The caller owns the transaction.
+    """
+    profile_result = await ingest_profiles(db, platform_id, users)
+    new_campaigns = await ingest_campaigns(db, platform_id, campaigns or [])
+
+    names = {str(p.id): p.display_name or p.username for p in profile_result.profiles}
+    events = diff_leaderboard(
+        platform_id,
+        profile_result.previous,
+        snapshot_of(profile_result.profiles),
+        names=names,
+    )
+    events.extend(campaign_events(platform_id, new_campaigns))
+    alerts_written = await write_alerts(db, events)
+
+    # Only wallet-linked profiles feed a user's dashboard
+    await refresh_for_profiles(db, [p.id for p in profile_result.profiles if p.user_wallet_id])
+
+    platform = await db.get(Platform, platform_id)
+    if platform is not None:
+        platform.last_crawled_at = datetime.utcnow()
+
+    # Snapshot everything now; the callback runs after the request may have closed the session
+    entries = [to_entry(p) for p in profile_result.profiles]
+    updates = live_updates(platform_id, events, new_campaigns, len(entries))
+
+    async def after_commit():
+        await update_leaderboards(platform_id, entries)
+        # Cached reads of this platform go stale once its board is current
+        await bump_versions([platform_id])
+        await publish_events(updates)
+
+    on_commit(db, after_commit)
+
+    return CrawlIngestResult(
+        profiles=profile_result.profiles,
+        new_campaigns=new_campaigns,
+        events=events,
+        alerts_written=alerts_written,
+    )
+
+
+async def _upsert_twitter_profiles(
+    db: AsyncSession,
+    records: List[Dict[str, Any]],
+    now: datetime
+) -> List[TwitterProfile]:
+    """Upsert the twitter stats the harvester attached to user records"""
+    stats_by_handle: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        handle = normalize_twitter_handle(record.get("twitter_handle"))
+        if handle and record.get("twitter_stats"):
+            stats_by_handle[handle] = record["twitter_stats"]
+    if not stats_by_handle:
+        return []
+
+    result = await db.execute(
+        select(TwitterProfile).where(
+            func.lower(TwitterProfile.twitter_handle).in_(list(stats_by_handle))
+        )
+    )
+    existing = {tp.twitter_handle.lower(): tp for tp in result.scalars().all()}
+
+    profiles = []
+    for handle, stats in stats_by_handle.items():
+        twitter_profile = existing.get(handle)
+        if twitter_profile is None:
+            twitter_profile = TwitterProfile(twitter_handle=handle)
+            db.add(twitter_profile)
+        twitter_profile.followers_count = stats.get("followers") or 0
+        twitter_profile.following_count = stats.get("following") or 0
+        twitter_profile.tweets_count = stats.get("tweets") or 0
+        twitter_profile.is_verified = bool(stats.get("verified"))
+        if stats.get("description"):
+            twitter_profile.bio = stats["description"]
+        twitter_profile.last_synced_at = now
+        profiles.append(twitter_profile)
+
+    return profiles
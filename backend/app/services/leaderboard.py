@@ -0,0 +1,257 @@
+"""
+Redis sorted-set leaderboards
+
+Each platform keeps a ZSET of profile ids scored by ``global_rank`` plus a
+hash of slim entry payloads, so top-N, rank-of-profile and the ±k
+neighbourhood of a profile are O(log n) Redis reads. ``leaderboard:all``
+mirrors every platform for the unfiltered global board. Ingestion updates
+both in bulk after a crawl commits.
+
+Incremental updates alone only ever hold the profiles crawled since the
+board was created, so a board is read only once a rebuild from Postgres
+has marked it complete; until then, and on Redis errors, reads fall back
+to Postgres. ``backfill_leaderboards`` runs from beat and rebuilds boards
+that are not complete, such as after Redis lost them.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.models.platform import Platform
+from app.models.profile import PlatformProfile
+from app.schemas.profile import LeaderboardEntry
+from app.utils.fields import load_only_fields
+
+logger = logging.getLogger(__name__)
+
+ALL_PLATFORMS_KEY = "all"
+REBUILD_BATCH_SIZE = 5000
+
+
+def _board_key(platform_id: Optional[int]) -> str:
+    return f"leaderboard:{platform_id or ALL_PLATFORMS_KEY}"
+
+
+def _entries_key(platform_id: Optional[int]) -> str:
+    return f"leaderboard:{platform_id or ALL_PLATFORMS_KEY}:entries"
+
+
+def _complete_key(platform_id: Optional[int]) -> str:
+    return f"leaderboard:{platform_id or ALL_PLATFORMS_KEY}:complete"
+
+
+ENTRY_FIELDS = tuple(LeaderboardEntry.model_fields)
+
+
+def to_entry(profile: PlatformProfile, fields: Sequence[str] = ENTRY_FIELDS) -> Dict[str, Any]:
+    """Slim leaderboard payload for a profile, limited to ``fields``"""
+    entry = {f: getattr(profile, f) for f in fields}
+    if "id" in entry:
+        entry["id"] = str(entry["id"])
+    if entry.get("total_points") is not None:
+        entry["total_points"] = str(entry["total_points"])
+    return entry
+
+
+def _select(entries: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    if len(fields) == len(ENTRY_FIELDS):
+        return entries
+    return [{f: e.get(f) for f in fields} for e in entries]
+
+
+async def update_leaderboards(platform_id: int, entries: Iterable[Dict[str, Any]]) -> None:
+    """Write ranked entries to the platform and global boards and drop unranked ones"""
+    ranked = {}
+    unranked = []
+    for entry in entries:
+        if entry["global_rank"] is None:
+            unranked.append(entry["id"])
+        else:
+            ranked[entry["id"]] = entry
+    if not ranked and not unranked:
+        return
+
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for board in (platform_id, None):
+            if ranked:
+                pipe.zadd(_board_key(board), {pid: e["global_rank"] for pid, e in ranked.items()})
+                pipe.hset(_entries_key(board), mapping={pid: json.dumps(e) for pid, e in ranked.items()})
+            if unranked:
+                pipe.zrem(_board_key(board), *unranked)
+                pipe.hdel(_entries_key(board), *unranked)
+        await pipe.execute()
+
+
+async def rebuild_leaderboard(db: AsyncSession, platform_id: int) -> int:
+    """Reload a platform's board from Postgres, replacing its entries on the global board too"""
+    redis = get_redis()
+    await redis.delete(_complete_key(platform_id))
+    stale = [i.decode() for i in await redis.zrange(_board_key(platform_id), 0, -1)]
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        chunk = stale[start:start + REBUILD_BATCH_SIZE]
+        await redis.zrem(_board_key(None), *chunk)
+        await redis.hdel(_entries_key(None), *chunk)
+    await redis.delete(_board_key(platform_id), _entries_key(platform_id))
+
+    count = 0
+    batch = []
+    result = await db.stream(
+        select(PlatformProfile).where(
+            PlatformProfile.platform_id == platform_id,
+            PlatformProfile.global_rank.isnot(None)
+        ).execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    async for profile in result.scalars():
+        batch.append(to_entry(profile))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await update_leaderboards(platform_id, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        await update_leaderboards(platform_id, batch)
+        count += len(batch)
+    await redis.set(_complete_key(platform_id), b"1")
+    return count
+
+
+async def backfill_leaderboards(db: AsyncSession) -> int:
+    """Rebuild the boards not marked complete; the global board needs every platform rebuilt"""
+    redis = get_redis()
+    rebuild_all = not await redis.exists(_complete_key(None))
+    platform_ids = (await db.execute(select(Platform.id))).scalars().all()
+    due = [pid for pid in platform_ids if rebuild_all or not await redis.exists(_complete_key(pid))]
+    if not due:
+        return 0
+
+    # The global board misses a platform's entries while that platform rebuilds
+    await redis.delete(_complete_key(None))
+    if rebuild_all:
+        await redis.delete(_board_key(None), _entries_key(None))
+    for platform_id in due:
+        count = await rebuild_leaderboard(db, platform_id)
+        logger.info("Rebuilt leaderboard of platform %s with %d entries", platform_id, count)
+    await redis.set(_complete_key(None), b"1")
+    return len(due)
+
+
+async def _entries(platform_id: Optional[int], profile_ids: List[str]) -> List[Dict[str, Any]]:
+    if not profile_ids:
+        return []
+    payloads = await get_redis().hmget(_entries_key(platform_id), profile_ids)
+    return [json.loads(p) for p in payloads if p is not None]
+
+
+async def _from_redis(action):
+    try:
+        return await action()
+    except RedisError as e:
+        logger.warning("Leaderboard unavailable in Redis, using Postgres: %s", e)
+        return None
+
+
+async def get_top(
+    db: AsyncSession,
+    platform_id: Optional[int],
+    limit: int,
+    fields: Sequence[str] = ENTRY_FIELDS
+) -> List[Dict[str, Any]]:
+    """Top ``limit`` entries of a board"""
+
+    async def from_redis():
+        if not await get_redis().exists(_complete_key(platform_id)):
+            return None
+        ids = await get_redis().zrange(_board_key(platform_id), 0, limit - 1)
+        return await _entries(platform_id, [i.decode() for i in ids])
+
+    entries = await _from_redis(from_redis)
+    if entries is not None:
+        return _select(entries, fields)
+
+    query = (
+        select(PlatformProfile)
+        .options(load_only_fields(PlatformProfile, fields))
+        .where(PlatformProfile.global_rank.isnot(None))
+    )
+    if platform_id:
+        query = query.where(PlatformProfile.platform_id == platform_id)
+    result = await db.execute(query.order_by(PlatformProfile.global_rank).limit(limit))
+    return [to_entry(p, fields) for p in result.scalars().all()]
+
+
+async def get_standing(db: AsyncSession, platform_id: int, profile_id: UUID) -> Optional[Dict[str, Any]]:
+    """Rank and board position (0-based) of a profile, or None if it is unranked"""
+
+    async def from_redis():
+        if not await get_redis().exists(_complete_key(platform_id)):
+            return None
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.zrank(_board_key(platform_id), str(profile_id))
+            pipe.zscore(_board_key(platform_id), str(profile_id))
+            pipe.zcard(_board_key(platform_id))
+            position, score, total = await pipe.execute()
+        if position is None:
+            return {}
+        return {"position": position, "global_rank": int(score), "total": total}
+
+    standing = await _from_redis(from_redis)
+    if standing is not None:
+        return standing or None
+
+    profile = await db.get(PlatformProfile, profile_id)
+    if profile is None or profile.platform_id != platform_id or profile.global_rank is None:
+        return None
+    ranked = select(func.count()).select_from(PlatformProfile).where(
+        PlatformProfile.platform_id == platform_id,
+        PlatformProfile.global_rank.isnot(None)
+    )
+    position = await db.execute(ranked.where(PlatformProfile.global_rank < profile.global_rank))
+    total = await db.execute(ranked)
+    return {"position": position.scalar(), "global_rank": profile.global_rank, "total": total.scalar()}
+
+
+async def get_neighborhood(
+    db: AsyncSession,
+    platform_id: int,
+    profile_id: UUID,
+    k: int
+) -> Optional[List[Dict[str, Any]]]:
+    """The profile and up to ``k`` entries on either side of it"""
+
+    async def from_redis():
+        if not await get_redis().exists(_complete_key(platform_id)):
+            return None
+        position = await get_redis().zrank(_board_key(platform_id), str(profile_id))
+        if position is None:
+            return []
+        ids = await get_redis().zrange(_board_key(platform_id), max(position - k, 0), position + k)
+        return await _entries(platform_id, [i.decode() for i in ids])
+
+    entries = await _from_redis(from_redis)
+    if entries is not None:
+        return entries or None
+
+    profile = await db.get(PlatformProfile, profile_id)
+    if profile is None or profile.platform_id != platform_id or profile.global_rank is None:
+        return None
+    board = select(PlatformProfile).where(
+        PlatformProfile.platform_id == platform_id,
+        PlatformProfile.global_rank.isnot(None),
+        PlatformProfile.id != profile.id
+    )
+    above = await db.execute(
+        board.where(PlatformProfile.global_rank <= profile.global_rank)
+        .order_by(PlatformProfile.global_rank.desc()).limit(k)
+    )
+    below = await db.execute(
+        board.where(PlatformProfile.global_rank > profile.global_rank)
+        .order_by(PlatformProfile.global_rank).limit(k)
+    )
+    rows = list(reversed(above.scalars().all())) + [profile] + list(below.scalars().all())
+    return [to_entry(p) for p in rows]
@@ -0,0 +1,151 @@
+"""
+Live updates over Redis pub/sub
+
+Ingestion and alert jobs publish events to Redis channels once their
+transaction commits. Every API worker runs one ``LiveHub`` that subscribes
+only to the channels its WebSocket clients follow and fans each message out
+to their per-connection queues.
+
+Channels:
+    leaderboard:{platform_id}   ranks changed after a crawl
+    campaigns:{platform_id}     new campaigns discovered
+    alerts:{user_id}            alerts written for one user
+
+Queues are bounded. A client that falls behind loses its oldest pending
+messages and is sent a ``lagged`` notice with the count instead of stalling
+the fan-out for everyone else.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.core.cache import get_redis
+from app.core.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "live:"
+CHANNEL_RE = re.compile(r"^(leaderboard|campaigns):\d+$|^alerts:[0-9a-f-]{36}$")
+RECONNECT_DELAY = 1.0
+
+
+def is_valid_channel(channel: str) -> bool:
+    return bool(CHANNEL_RE.match(channel))
+
+
+async def publish_events(events: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """Publish (channel, event) pairs in one round trip"""
+    events = list(events)
+    if not events:
+        return 0
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for channel, event in events:
+            pipe.publish(CHANNEL_PREFIX + channel, dumps({"channel": channel, **event}))
+        await pipe.execute()
+    return len(events)
+
+
+class LiveConnection:
+    """Bounded outbound queue of one WebSocket client"""
+
+    def __init__(self, user_id: str, max_size: Optional[int] = None):
+        self.user_id = user_id
+        self.channels: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size or settings.WS_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, payload: bytes) -> None:
+        """Enqueue without blocking, dropping the oldest message when full"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+    async def next_message(self) -> bytes:
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return dumps({"type": "lagged", "dropped": dropped})
+        return await self.queue.get()
+
+
+class LiveHub:
+    """Per-worker fan-out from Redis pub/sub to local connections"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[LiveConnection]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def channels(self) -> List[str]:
+        return list(self._subscribers)
+
+    async def subscribe(self, connection: LiveConnection, channel: str) -> None:
+        async with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                if self._pubsub is None:
+                    self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(CHANNEL_PREFIX + channel)
+                subscribers = self._subscribers[channel] = set()
+            subscribers.add(connection)
+            connection.channels.add(channel)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._run())
+
+    async def unsubscribe(self, connection: LiveConnection, channel: str) -> None:
+        async with self._lock:
+            connection.channels.discard(channel)
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                return
+            subscribers.discard(connection)
+            if not subscribers:
+                del self._subscribers[channel]
+                try:
+                    await self._pubsub.unsubscribe(CHANNEL_PREFIX + channel)
+                except RedisError as e:
+                    logger.warning("Live unsubscribe failed: %s", e)
+
+    async def disconnect(self, connection: LiveConnection) -> None:
+        for channel in list(connection.channels):
+            await self.unsubscribe(connection, channel)
+
+    def dispatch(self, channel: str, payload: bytes) -> int:
+        """Hand a message to every local subscriber of a channel"""
+        subscribers = self._subscribers.get(channel, ())
+        for connection in subscribers:
+            connection.offer(payload)
+        return len(subscribers)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except RedisError as e:
+                # The pubsub connection re-subscribes to its channels when it reconnects
+                logger.warning("Live updates connection lost, retrying: %s", e)
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"].decode()[len(CHANNEL_PREFIX):]
+            self.dispatch(channel, message["data"])
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+        self._subscribers.clear()
+
+
+live_hub = LiveHub()
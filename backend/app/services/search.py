@@ -0,0 +1,169 @@
+"""
+Campaign and profile search
+
+Every query here is shaped to be answered from an index, so latency stays
+flat as the tables grow:
+
+- campaigns match the ``simple`` text search document over name and
+  description (``ix_campaigns_search``) or are trigram-similar by name;
+- profiles are trigram-similar by username, display name or twitter handle;
+- twitter profiles are trigram-similar by handle
+  (``ix_twitter_profiles_handle_trgm``);
+- autocomplete reads ``lower(col) COLLATE "C"`` indexes as the range
+  ``>= prefix AND < next prefix`` and returns rows in index order, so it
+  never sorts. Byte order is what makes a prefix a contiguous range.
+
+Ranks combine ``ts_rank_cd`` and ``similarity`` (both 0..1) and add 1 for a
+prefix match, so prefix hits come first.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.platform import CAMPAIGN_SEARCH_DOCUMENT, Campaign
+from app.models.profile import PlatformProfile
+from app.models.twitter import TwitterProfile
+
+SEARCH_CONFIG = literal_column("'simple'")
+
+
+def _prefix_upper(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``"""
+    last = ord(prefix[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:
+        # Surrogates cannot be encoded; nothing sorts between them anyway
+        last = 0xE000
+    return prefix[:-1] + chr(last)
+
+
+def _byte_order(column):
+    return func.lower(column).collate("C")
+
+
+def prefix_match(column, prefix: str):
+    """``lower(column)`` starts with ``prefix``, as a range its C-collated index serves"""
+    lowered = _byte_order(column)
+    return (lowered >= prefix) & (lowered < _prefix_upper(prefix))
+
+
+def normalize_query(q: str) -> str:
+    """Lowercase ``q`` and collapse its whitespace"""
+    return " ".join(q.split()).lower()
+
+
+def campaign_search_query(q: str, platform_id: Optional[int] = None, status: Optional[str] = None, limit: int = 20):
+    """Campaigns matching ``q`` with their scores, best first"""
+    term = normalize_query(q)
+    document = literal_column(CAMPAIGN_SEARCH_DOCUMENT)
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+    name = func.lower(Campaign.name)
+    score = func.greatest(func.ts_rank_cd(document, query), func.similarity(name, term)) + case(
+        (prefix_match(Campaign.name, term), 1.0), else_=0.0
+    )
+
+    stmt = (
+        select(Campaign, score.label("score"))
+        .options(selectinload(Campaign.platform))
+        .where(or_(document.op("@@")(query), name.op("%")(term)))
+    )
+    if platform_id:
+        stmt = stmt.where(Campaign.platform_id == platform_id)
+    if status:
+        stmt = stmt.where(Campaign.status == status)
+    return stmt.order_by(score.desc(), Campaign.discovered_at.desc()).limit(limit)
+
+
+def profile_search_query(q: str, platform_id: Optional[int] = None, limit: int = 20):
+    """Profiles whose username, display name or twitter handle match ``q``, best first"""
+    term = normalize_query(q).lstrip("@")
+    username = func.lower(PlatformProfile.username)
+    display_name = func.lower(PlatformProfile.display_name)
+    twitter_handle = func.lower(PlatformProfile.twitter_handle)
+    # similarity() of a NULL column is NULL, which greatest() skips
+    score = func.greatest(
+        func.similarity(username, term),
+        func.similarity(display_name, term),
+        func.similarity(twitter_handle, term),
+    ) + case((prefix_match(PlatformProfile.username, term), 1.0), else_=0.0)
+
+    stmt = select(PlatformProfile, score.label("score")).where(
+        or_(
+            username.op("%")(term),
+            display_name.op("%")(term),
+            twitter_handle.op("%")(term),
+            prefix_match(PlatformProfile.username, term),
+        )
+    )
+    if platform_id:
+        stmt = stmt.where(PlatformProfile.platform_id == platform_id)
+    return stmt.order_by(score.desc(), PlatformProfile.global_rank.asc().nulls_last()).limit(limit)
+
+
+def twitter_search_query(q: str, limit: int = 20):
+    """Twitter profiles whose handle matches ``q``, best first"""
+    term = normalize_query(q).lstrip("@")
+    handle = func.lower(TwitterProfile.twitter_handle)
+    score = func.similarity(handle, term) + case(
+        (prefix_match(TwitterProfile.twitter_handle, term), 1.0), else_=0.0
+    )
+
+    stmt = select(TwitterProfile, score.label("score")).where(
+        or_(handle.op("%")(term), prefix_match(TwitterProfile.twitter_handle, term))
+    )
+    return stmt.order_by(score.desc(), TwitterProfile.followers_count.desc().nulls_last()).limit(limit)
+
+
+def autocomplete_queries(prefix: str, limit: int = 10) -> List[Tuple[str, Any]]:
+    """(kind, statement of ids and labels) for each source of completions"""
+    term = normalize_query(prefix).lstrip("@")
+    sources = (
+        ("campaign", Campaign.id, Campaign.name),
+        ("profile", PlatformProfile.id, PlatformProfile.username),
+        ("twitter", TwitterProfile.id, TwitterProfile.twitter_handle),
+    )
+    return [
+        (kind, select(id_column, label).where(prefix_match(label, term)).order_by(_byte_order(label)).limit(limit))
+        for kind, id_column, label in sources
+    ]
+
+
+async def search_campaigns(db: AsyncSession, q: str, **filters) -> List[tuple]:
+    """(campaign, score) rows for ``campaign_search_query``"""
+    if not normalize_query(q):
+        return []
+    result = await db.execute(campaign_search_query(q, **filters))
+    return result.all()
+
+
+async def search_profiles(db: AsyncSession, q: str, **filters) -> List[tuple]:
+    """(profile, score) rows for ``profile_search_query``"""
+    if not normalize_query(q).lstrip("@"):
+        return []
+    result = await db.execute(profile_search_query(q, **filters))
+    return result.all()
+
+
+async def search_twitter_profiles(db: AsyncSession, q: str, limit: int = 20) -> List[tuple]:
+    """(twitter profile, score) rows for ``twitter_search_query``"""
+    if not normalize_query(q).lstrip("@"):
+        return []
+    result = await db.execute(twitter_search_query(q, limit))
+    return result.all()
+
+
+async def autocomplete(db: AsyncSession, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Campaign names, profile usernames and twitter handles starting with ``prefix``"""
+    if not normalize_query(prefix).lstrip("@"):
+        return []
+
+    suggestions = []
+    for kind, stmt in autocomplete_queries(prefix, limit):
+        result = await db.execute(stmt)
+        suggestions += [{"kind": kind, "id": str(id_), "label": label} for id_, label in result]
+
+    # Shortest labels first: the closest completions of what was typed
+    suggestions.sort(key=lambda s: (len(s["label"]), s["label"].lower()))
+    return suggestions[:limit]
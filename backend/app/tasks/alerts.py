@@ -0,0 +1,46 @@
+"""
+Alert tasks
+
+``deliver_alerts`` runs from beat every ``ALERT_DELIVERY_INTERVAL_SECONDS``
+and sends digest rounds (``app.services.alerts.delivery``) until no user is
+due. A Redis lease keeps a slow run and the next tick from sending the same
+alerts twice.
+"""
+
+import logging
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.alerts.delivery import deliver_pending
+from app.tasks.celery_app import celery_app, run_async, task_lease
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_LOCK_KEY = "alerts:delivery:lock"
+DELIVERY_LEASE_SECONDS = 600
+
+
+@celery_app.task(name="alerts.deliver_alerts")
+def deliver_alerts() -> int:
+    """Send the pending alert digests of every due user"""
+    return run_async(_deliver_alerts())
+
+
+async def _deliver_alerts() -> int:
+    sent = 0
+    async with task_lease(DELIVERY_LOCK_KEY, DELIVERY_LEASE_SECONDS) as leased:
+        while leased:
+            async with AsyncSessionLocal() as db:
+                stats = await deliver_pending(db)
+                await db.commit()
+            sent += stats.digests_sent
+            if stats.users:
+                logger.info(
+                    "Delivered %d digests (%d failed) for %d users",
+                    stats.digests_sent, stats.digests_failed, stats.users
+                )
+            # A short round means every due user was handled; failed alerts
+            # back off, so the next round picks different users
+            if stats.users < settings.ALERT_DELIVERY_BATCH_SIZE or not (stats.alerts_marked or stats.alerts_failed):
+                break
+    return sent
@@ -0,0 +1,137 @@
+"""
+Celery application
+
+Workers start with ``celery -A app.tasks.celery_app worker -Q crawler`` and
+additionally subscribe to the domain shard queues of
+``CRAWLER_WORKER_SHARDS`` (all shards when unset). Scale out by starting
+more workers, each on a share of the shards. One ``celery beat`` process
+drives the recrawl scheduler, alert delivery, the API quota flush and the
+leaderboard backfill.
+
+Tasks run their coroutines with ``run_async`` on one event loop per worker
+process, so database pools, the Redis client and the browser pool outlive
+the task that opened them. Beat tasks that must not overlap hold a
+``task_lease``.
+"""
+
+import asyncio
+import logging
+import secrets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Optional
+
+from celery import Celery
+from celery.signals import celeryd_after_setup, worker_process_shutdown
+
+from app.config import settings
+from app.core.cache import get_redis
+from app.services.crawler.domains import CRAWLER_QUEUE, queue_for, shard_queues
+
+logger = logging.getLogger(__name__)
+
+# Deletes a lease only while it still holds the token it was taken with
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_release_script = None
+
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine on this process's long-lived event loop"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@asynccontextmanager
+async def task_lease(key: str, seconds: int) -> AsyncIterator[bool]:
+    """
+    Hold a Redis lease for the duration of a run; yields False if another
+    run holds it
+
+    The lease stores a random token and is released only while it still
+    holds that token, so a run that outlived its lease cannot release the
+    lease of the run that took over.
+    """
+    global _release_script
+    redis = get_redis()
+    token = secrets.token_hex(16)
+    if not await redis.set(key, token, nx=True, ex=seconds):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        if _release_script is None:
+            _release_script = redis.register_script(RELEASE_LUA)
+        if not await _release_script(keys=[key], args=[token]):
+            logger.warning("Lease %s expired before its run finished", key)
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Send page tasks to the shard queue of their domain"""
+    if name == "crawler.crawl_page" and kwargs and kwargs.get("url"):
+        return {"queue": queue_for(kwargs["url"])}
+    return None
+
+
+celery_app = Celery(
+    "infofi",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.crawler", "app.tasks.alerts", "app.tasks.quotas", "app.tasks.leaderboards"],
+)
+
+celery_app.conf.update(
+    task_default_queue=CRAWLER_QUEUE,
+    task_routes=(route_task,),
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=True,
+    # Pages take seconds to minutes: redeliver a page whose worker died, and
+    # do not let one process hoard pages other processes could be crawling
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    broker_transport_options={"visibility_timeout": 3600},
+    beat_schedule={
+        "schedule-recrawls": {
+            "task": "crawler.schedule_recrawls",
+            "schedule": float(settings.CRAWLER_SCHEDULE_INTERVAL_SECONDS),
+        },
+        "deliver-alerts": {
+            "task": "alerts.deliver_alerts",
+            "schedule": float(settings.ALERT_DELIVERY_INTERVAL_SECONDS),
+        },
+        "flush-api-quotas": {
+            "task": "quotas.flush_api_quotas",
+            "schedule": float(settings.API_QUOTA_FLUSH_SECONDS),
+        },
+        "backfill-leaderboards": {
+            "task": "leaderboards.backfill_leaderboards",
+            "schedule": float(settings.LEADERBOARD_BACKFILL_SECONDS),
+        },
+    },
+)
+
+
+@celeryd_after_setup.connect
+def subscribe_shards(sender, instance, **kwargs):
+    for queue in shard_queues():
+        instance.app.amqp.queues.select_add(queue)
+
+
+@worker_process_shutdown.connect
+def close_browsers(**kwargs):
+    from app.services.crawler.browser import browser_pool
+
+    if _loop is not None and not _loop.is_closed():
+        run_async(browser_pool.close())
@@ -0,0 +1,256 @@
+"""
+Crawl tasks
+
+A harvest fans out as ``harvest`` → ``harvest_platform`` per active
+platform → ``crawl_page`` per URL. Page tasks run on their domain's shard
+queue, wait for the site's politeness delay and ingest the users they
+extract in their own transaction.
+
+Each entry URL seeds a best-first frontier (``app.services.crawler.frontier``):
+a page task scores its links into its seed's frontier and queues the best
+candidate next, until the seed's page budget is spent or its yield dries
+up. A Redis set per harvest and platform keeps a URL from being queued
+twice.
+
+Every visit also reschedules its URL (``app.services.crawler.schedule``).
+``schedule_recrawls`` runs from beat: it revisits due targets within each
+platform's budget, and seeds platforms that have no targets yet with a
+harvest. Scheduled revisits only follow the best scored few of their links
+to URLs that are not scheduled yet, since known ones come due on their own.
+
+Platforms may set ``entry_urls``, ``url_patterns`` and ``budget_per_hour``
+in ``crawler_config``; otherwise the crawl starts at the platform's domain.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.core.cache import get_redis
+from app.db.session import AsyncSessionLocal
+from app.models.platform import Platform
+from app.services.crawler import frontier, pages, schedule
+from app.services.crawler.domains import acquire_fetch_slot
+from app.services.ingestion import ingest_crawl
+from app.tasks.celery_app import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+HARVEST_TTL = 86400
+PAGE_RETRY_SECONDS = 30
+# How long a seeding harvest may take before the scheduler starts another
+SEED_LEASE_SECONDS = 3600
+
+
+async def _enqueue(
+    harvest_id: str,
+    platform_id: int,
+    urls: List[str],
+    depth: int,
+    patterns: List[str],
+    scheduled: bool = False
+) -> int:
+    """Queue page tasks for the URLs this harvest has not seen yet"""
+    redis = get_redis()
+    seen = frontier.seen_key(harvest_id, platform_id)
+    queued = 0
+    for url in urls:
+        if not await redis.sadd(seen, url):
+            continue
+        crawl_page.apply_async(kwargs={
+            "harvest_id": harvest_id,
+            "platform_id": platform_id,
+            "url": url,
+            "depth": depth,
+            "patterns": patterns,
+            "scheduled": scheduled,
+        })
+        queued += 1
+    await redis.expire(seen, HARVEST_TTL)
+    return queued
+
+
+@celery_app.task(name="crawler.harvest")
+def harvest(platform_ids: Optional[List[int]] = None) -> str:
+    """Start a harvest of the given (default: all active) platforms"""
+    return run_async(_harvest(platform_ids))
+
+
+async def _harvest(platform_ids: Optional[List[int]]) -> str:
+    harvest_id = uuid4().hex
+    async with AsyncSessionLocal() as db:
+        query = select(Platform.id).where(Platform.is_active == True)
+        if platform_ids:
+            query = query.where(Platform.id.in_(platform_ids))
+        ids = (await db.execute(query)).scalars().all()
+    for platform_id in ids:
+        harvest_platform.delay(platform_id, harvest_id)
+    logger.info("Harvest %s started for %d platforms", harvest_id, len(ids))
+    return harvest_id
+
+
+@celery_app.task(name="crawler.harvest_platform")
+def harvest_platform(platform_id: int, harvest_id: str) -> int:
+    """Queue the entry pages of one platform"""
+    return run_async(_harvest_platform(platform_id, harvest_id))
+
+
+async def _harvest_platform(platform_id: int, harvest_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        platform = await db.get(Platform, platform_id)
+    if platform is None:
+        return 0
+    config = platform.crawler_config or {}
+    entry_urls = config.get("entry_urls") or [f"https://{platform.domain}/"]
+    patterns = config.get("url_patterns") or pages.DEFAULT_URL_PATTERNS
+    queued = 0
+    for url in entry_urls:
+        seed = frontier.seed_id(url)
+        await frontier.Frontier(harvest_id, platform_id, seed).push([(1.0, frontier.Link(url))], 0)
+        queued += await _crawl_next(harvest_id, platform_id, seed, patterns)
+    return queued
+
+
+async def _crawl_next(harvest_id: str, platform_id: int, seed: str, patterns: List[str]) -> int:
+    """Queue the best candidate of a seed's frontier"""
+    candidate = await frontier.Frontier(harvest_id, platform_id, seed).pop()
+    if candidate is None:
+        return 0
+    url, depth = candidate
+    crawl_page.apply_async(kwargs={
+        "harvest_id": harvest_id,
+        "platform_id": platform_id,
+        "url": url,
+        "depth": depth,
+        "patterns": patterns,
+        "seed": seed,
+    })
+    return 1
+
+
+async def _advance(
+    harvest_id: str,
+    platform_id: int,
+    seed: str,
+    patterns: List[str],
+    ranked: List[Tuple[float, frontier.Link]],
+    depth: int,
+    users: int
+) -> int:
+    """Add a crawled page's links to its seed's frontier and queue the next page"""
+    seed_frontier = frontier.Frontier(harvest_id, platform_id, seed)
+    await seed_frontier.push(ranked, depth)
+    if await seed_frontier.record_page(users):
+        await seed_frontier.close()
+        return 0
+    return await _crawl_next(harvest_id, platform_id, seed, patterns)
+
+
+@celery_app.task(name="crawler.crawl_page", bind=True, max_retries=3)
+def crawl_page(
+    self,
+    harvest_id: str,
+    platform_id: int,
+    url: str,
+    depth: int = 0,
+    patterns: Optional[List[str]] = None,
+    scheduled: bool = False,
+    seed: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Crawl one page, ingest its users, reschedule it and queue what to crawl next"""
+    patterns = patterns or pages.DEFAULT_URL_PATTERNS
+    try:
+        wait = run_async(acquire_fetch_slot(url))
+        if wait is not None:
+            # Not a failure, so not a retry: come back once the site's delay has passed
+            crawl_page.apply_async(kwargs=self.request.kwargs, countdown=wait)
+            return None
+        return run_async(_crawl_page(harvest_id, platform_id, url, depth, patterns, scheduled, seed))
+    except Exception as e:
+        # Fetch failures as much as database, Redis or ingestion errors: any of
+        # them would otherwise end the seed's chain of pages for good
+        if seed and self.request.retries >= self.max_retries:
+            # Give up on the page, not on the rest of its seed
+            try:
+                run_async(_advance(harvest_id, platform_id, seed, patterns, [], depth + 1, 0))
+            except Exception:
+                logger.exception("Could not advance seed %s past %s", seed, url)
+        raise self.retry(exc=e, countdown=PAGE_RETRY_SECONDS * 2 ** self.request.retries)
+
+
+async def _crawl_page(
+    harvest_id: str,
+    platform_id: int,
+    url: str,
+    depth: int,
+    patterns: List[str],
+    scheduled: bool,
+    seed: Optional[str]
+) -> Dict[str, Any]:
+    page = await pages.crawl_page(url)
+    links = page.links if depth < settings.CRAWLER_MAX_DEPTH else []
+    async with AsyncSessionLocal() as db:
+        if page.users:
+            await ingest_crawl(db, platform_id, page.users)
+        digest = schedule.fingerprint(page.users, [link.url for link in page.links])
+        await schedule.record_visit(db, platform_id, url, digest, depth)
+        if scheduled and links:
+            known = await schedule.known_urls(db, platform_id, [link.url for link in links])
+            links = [link for link in links if link.url not in known]
+        await db.commit()
+
+    await frontier.record_yield(platform_id, url, len(page.users))
+    ranked = []
+    if links:
+        scorer = frontier.LinkScorer(patterns, await frontier.load_yields(platform_id))
+        ranked = scorer.rank(links, depth + 1)
+    if seed:
+        queued = await _advance(harvest_id, platform_id, seed, patterns, ranked, depth + 1, len(page.users))
+    else:
+        discovered = [link.url for _, link in ranked[:settings.CRAWLER_DISCOVERY_LINKS]]
+        queued = await _enqueue(harvest_id, platform_id, discovered, depth + 1, patterns, scheduled)
+    logger.info("Crawled %s: %d users, %d links queued", url, len(page.users), queued)
+    return {"url": url, "users": len(page.users), "queued": queued}
+
+
+@celery_app.task(name="crawler.schedule_recrawls")
+def schedule_recrawls() -> int:
+    """Queue the due revisits of every active platform within its budget"""
+    return run_async(_schedule_recrawls())
+
+
+async def _schedule_recrawls() -> int:
+    harvest_id = uuid4().hex
+    queued = 0
+    async with AsyncSessionLocal() as db:
+        platforms = (await db.execute(select(Platform).where(Platform.is_active == True))).scalars().all()
+        for platform in platforms:
+            allowance = await schedule.budget_allowance(platform.id, schedule.platform_budget(platform))
+            targets = await schedule.claim_due_targets(db, platform.id, allowance)
+            if not targets:
+                continue
+            patterns = (platform.crawler_config or {}).get("url_patterns") or pages.DEFAULT_URL_PATTERNS
+            for target in targets:
+                crawl_page.apply_async(kwargs={
+                    "harvest_id": harvest_id,
+                    "platform_id": platform.id,
+                    "url": target.url,
+                    "depth": target.depth or 0,
+                    "patterns": patterns,
+                    "scheduled": True,
+                })
+            await schedule.spend_budget(platform.id, len(targets))
+            queued += len(targets)
+        unscheduled = await schedule.unscheduled_platforms(db)
+        await db.commit()
+
+    redis = get_redis()
+    for platform in unscheduled:
+        if await redis.set(f"crawl:seeding:{platform.id}", b"1", nx=True, ex=SEED_LEASE_SECONDS):
+            harvest_platform.delay(platform.id, harvest_id)
+    if queued:
+        logger.info("Scheduled %d revisits", queued)
+    return queued
@@ -0,0 +1,36 @@
+"""
+Leaderboard tasks
+
+``backfill_leaderboards`` runs from beat every
+``LEADERBOARD_BACKFILL_SECONDS`` and rebuilds the Redis boards that are not
+marked complete (``app.services.leaderboard``). Reads use Postgres until it
+has.
+"""
+
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services import leaderboard
+from app.tasks.celery_app import celery_app, run_async, task_lease
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_LOCK_KEY = "leaderboard:backfill:lock"
+BACKFILL_LEASE_SECONDS = 3600
+
+
+@celery_app.task(name="leaderboards.backfill_leaderboards")
+def backfill_leaderboards() -> int:
+    """Rebuild the leaderboards Redis does not fully hold"""
+    return run_async(_backfill_leaderboards())
+
+
+async def _backfill_leaderboards() -> int:
+    async with task_lease(BACKFILL_LOCK_KEY, BACKFILL_LEASE_SECONDS) as leased:
+        if not leased:
+            return 0
+        async with AsyncSessionLocal() as db:
+            rebuilt = await leaderboard.backfill_leaderboards(db)
+    if rebuilt:
+        logger.info("Rebuilt %d leaderboards", rebuilt)
+    return rebuilt
@@ -0,0 +1,23 @@
+"""
+API quota tasks
+
+``flush_api_quotas`` runs from beat every ``API_QUOTA_FLUSH_SECONDS`` and
+writes the API key requests counted in Redis back to the database
+(``app.core.rate_limit``).
+"""
+
+import logging
+
+from app.core import rate_limit
+from app.tasks.celery_app import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="quotas.flush_api_quotas")
+def flush_api_quotas() -> int:
+    """Subtract the requests API keys spent from their stored quotas"""
+    flushed = run_async(rate_limit.flush_api_quotas())
+    if flushed:
+        logger.info("Flushed API quota usage of %d users", flushed)
+    return flushed
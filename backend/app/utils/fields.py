@@ -0,0 +1,42 @@
+"""Sparse fieldset helpers"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(
+    fields: Optional[str],
+    schema: Type[BaseModel],
+    always: Sequence[str] = ("id",)
+) -> List[str]:
+    """
+    Field names selected by a ``fields=a,b,c`` parameter, in schema order
+
+    No parameter selects every field of the schema. Unknown names are a 400.
+    """
+    allowed = list(schema.model_fields)
+    if not fields:
+        return allowed
+
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    requested.update(always)
+    return [f for f in allowed if f in requested]
+
+
+def load_only_fields(model: Any, fields: Iterable[str]):
+    """Loader option restricting a query to the selected mapped columns"""
+    return load_only(*(getattr(model, f) for f in fields))
+
+
+def project(obj: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    """Selected attributes of an ORM object as a plain dict"""
+    return {f: getattr(obj, f) for f in fields}
@@ -0,0 +1,42 @@
+"""Pagination helpers"""
+
+import base64
+import json
+from typing import Any, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor token for the sort key of the last row on a page"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Sort key values from a cursor token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+async def estimate_count(db: AsyncSession, query: Select) -> int:
+    """Row estimate from the query planner, without scanning the table"""
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
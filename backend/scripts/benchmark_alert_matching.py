@@ -0,0 +1,134 @@
+"""
+Benchmark alert recipient matching
+
+Builds a SubscriptionIndex for synthetic users and matches a crawl's worth of
+events against it, then checks a sample against a naive scan over every user.
+
+    python -m scripts.benchmark_alert_matching --users 100000 --events 10000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from app.services.alerts.diff import AlertEvent
+from app.services.alerts.subscriptions import SubscriptionIndex, BROADCAST_TYPES, DEFAULT_ALERT_TYPES, _subscription
+
+
+def build_users(count: int, platforms: int, profiles_per_platform: int, rng: random.Random):
+    users = []
+    for _ in range(count):
+        alert_types = {}
+        roll = rng.random()
+        if roll < 0.3:
+            alert_types['new_campaign'] = {"platforms": rng.sample(range(1, platforms + 1), 3)}
+        elif roll < 0.4:
+            alert_types['new_campaign'] = True
+        if rng.random() < 0.1:
+            alert_types['whale_alert'] = {"platforms": [rng.randint(1, platforms)]}
+        if rng.random() < 0.8:
+            alert_types['rank_change'] = True
+        if rng.random() < 0.05:
+            alert_types.setdefault('rank_change', {})
+            if alert_types['rank_change'] is True:
+                alert_types['rank_change'] = {}
+            alert_types['rank_change']['profiles'] = [
+                f"{rng.randint(1, platforms)}-{rng.randrange(profiles_per_platform)}" for _ in range(5)
+            ]
+
+        owned = {}
+        for _ in range(rng.choice((0, 1, 1, 2, 3))):
+            platform_id = rng.randint(1, platforms)
+            owned[f"{platform_id}-{rng.randrange(profiles_per_platform)}"] = platform_id
+        users.append((uuid.uuid4(), alert_types, owned))
+    return users
+
+
+def build_events(count: int, platforms: int, profiles_per_platform: int, rng: random.Random):
+    events = []
+    for _ in range(count):
+        platform_id = rng.randint(1, platforms)
+        roll = rng.random()
+        if roll < 0.9:
+            alert_type, entity_type = 'rank_change', 'profile'
+        elif roll < 0.98:
+            alert_type, entity_type = 'whale_alert', 'profile'
+        else:
+            alert_type, entity_type = 'new_campaign', 'campaign'
+        entity_id = f"{platform_id}-{rng.randrange(profiles_per_platform)}" if entity_type == 'profile' else str(uuid.uuid4())
+        events.append(AlertEvent(alert_type, platform_id, entity_type, entity_id, title="benchmark"))
+    return events
+
+
+def naive_match(users, event: AlertEvent):
+    """Reference implementation: check every user's preferences"""
+    recipients = set()
+    for user_id, alert_types, owned in users:
+        enabled, platforms, watched = _subscription(alert_types or DEFAULT_ALERT_TYPES, event.alert_type)
+        if not enabled:
+            continue
+        if event.alert_type in BROADCAST_TYPES and (platforms is None or event.platform_id in platforms):
+            recipients.add(user_id)
+        elif event.related_entity_type == 'profile':
+            if event.related_entity_id in watched:
+                recipients.add(user_id)
+            elif event.related_entity_id in owned and (platforms is None or owned[event.related_entity_id] in platforms):
+                recipients.add(user_id)
+    return recipients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--platforms", type=int, default=10)
+    parser.add_argument("--profiles-per-platform", type=int, default=50000)
+    parser.add_argument("--verify", type=int, default=50, help="events to check against a naive scan")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = build_users(args.users, args.platforms, args.profiles_per_platform, rng)
+    events = build_events(args.events, args.platforms, args.profiles_per_platform, rng)
+
+    index = SubscriptionIndex()
+    start = time.perf_counter()
+    for user_id, alert_types, owned in users:
+        index.upsert_user(user_id, alert_types, owned)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recipients = index.match_many(events)
+    match_seconds = time.perf_counter() - start
+    total = sum(len(r) for r in recipients.values())
+
+    start = time.perf_counter()
+    for user_id, alert_types, owned in users[:1000]:
+        index.upsert_user(user_id, {"rank_change": True}, owned)
+    update_seconds = time.perf_counter() - start
+
+    print(f"users={args.users:,} events={args.events:,} platforms={args.platforms}")
+    print(f"index build:        {build_seconds * 1000:10.1f} ms")
+    print(f"match all events:   {match_seconds * 1000:10.1f} ms  ({match_seconds / len(events) * 1e6:.1f} us/event)")
+    print(f"recipients:         {total:10,d}  ({match_seconds / max(total, 1) * 1e9:.0f} ns/recipient)")
+    print(f"1k incremental updates: {update_seconds * 1000:6.1f} ms")
+
+    if args.verify:
+        # Compare against the scan the index replaces, on the original preferences
+        index = SubscriptionIndex()
+        for user_id, alert_types, owned in users:
+            index.upsert_user(user_id, alert_types, owned)
+        sample = events[:args.verify]
+        start = time.perf_counter()
+        for event in sample:
+            expected = naive_match(users, event)
+            assert index.match(event) == expected, f"mismatch for {event}"
+        naive_seconds = time.perf_counter() - start
+        per_event = naive_seconds / len(sample)
+        print(f"naive scan:         {per_event * 1000:10.1f} ms/event  (~{per_event * len(events):.0f} s per crawl)")
+        print(f"verified {len(sample)} events against the naive scan")
+
+
+if __name__ == "__main__":
+    main()
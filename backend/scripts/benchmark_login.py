@@ -0,0 +1,119 @@
+"""
+Benchmark login latency under concurrent logins
+
+Simulates bursts of password and wallet logins on one event loop while a
+probe coroutine stands in for unrelated requests, once with the crypto run
+inline (as the handlers used to) and once through the crypto executor, and
+reports p50/p99 latency of both.
+
+    python -m scripts.benchmark_login --logins 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from passlib.context import CryptContext
+
+from app.core import crypto
+from app.core.crypto import CryptoExecutor, check_password, check_wallet_signature
+
+PROBE_INTERVAL = 0.005
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+def build_credentials(count: int, rounds: int):
+    hasher = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    password_hash = hasher.hash("benchmark-password")
+    wallets = []
+    for i in range(count):
+        account = Account.create()
+        message = f"Sign in to InfoFi: {i}"
+        signature = account.sign_message(encode_defunct(text=message)).signature.hex()
+        wallets.append((account.address, message, signature))
+    return password_hash, wallets
+
+
+async def login_inline(password_hash: str, wallet) -> None:
+    check_password("benchmark-password", password_hash)
+    check_wallet_signature(*wallet)
+
+
+async def login_offloaded(password_hash: str, wallet) -> None:
+    await crypto.verify_password("benchmark-password", password_hash)
+    await crypto.verify_wallet_signature(*wallet)
+
+
+async def run(login, password_hash: str, wallets, concurrency: int):
+    """Login latencies and probe latencies for one burst"""
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def one(wallet):
+        # The whole burst arrives at once; latency includes time queued behind other logins
+        async with semaphore:
+            await login(password_hash, wallet)
+        login_latencies.append(time.perf_counter() - started)
+
+    async def probe():
+        # Time beyond the requested sleep is how long an unrelated request waited
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            probe_latencies.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+    started = time.perf_counter()
+    probe_task = asyncio.create_task(probe())
+    await asyncio.gather(*(one(w) for w in wallets))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return login_latencies, probe_latencies, elapsed
+
+
+def report(name: str, logins, probes, elapsed: float) -> None:
+    print(f"{name}")
+    print(f"  throughput    {len(logins) / elapsed:8.1f} logins/s ({elapsed:.2f}s)")
+    print(f"  login   p50 {percentile(logins, 0.50):8.1f} ms  p99 {percentile(logins, 0.99):8.1f} ms")
+    print(f"  unrelated p50 {percentile(probes, 0.50):6.1f} ms  p99 {percentile(probes, 0.99):8.1f} ms  max {max(probes) * 1000:8.1f} ms")
+
+
+async def main(args) -> None:
+    password_hash, wallets = build_credentials(args.logins, args.rounds)
+    print(f"{args.logins} logins, concurrency {args.concurrency}, bcrypt rounds {args.rounds}")
+
+    report("inline", *await run(login_inline, password_hash, wallets, args.concurrency))
+
+    crypto.crypto_executor = CryptoExecutor(args.executor, args.workers, max_pending=args.logins * 2)
+    crypto.crypto_executor.start()
+    try:
+        # Let the pool finish spawning and warming before measuring
+        await crypto.verify_wallet_signature(*wallets[0])
+        report(f"{args.executor} pool x{args.workers}", *await run(login_offloaded, password_hash, wallets, args.concurrency))
+
+        start = time.perf_counter()
+        results = await crypto.verify_wallet_signatures(wallets)
+        elapsed = time.perf_counter() - start
+        assert all(results)
+        print(f"batch verify    {len(wallets) / elapsed:8.1f} signatures/s")
+    finally:
+        crypto.crypto_executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    asyncio.run(main(parser.parse_args()))
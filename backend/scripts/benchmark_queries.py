@@ -0,0 +1,336 @@
+"""
+Benchmark router queries against a seeded Postgres
+
+Seeds an empty database with realistic volumes (``--seed``), then runs every
+query the API routers issue with representative parameters, recording
+latency and the EXPLAIN (ANALYZE) plan of each. Exits non-zero when any plan
+sequentially scans a large table, so index regressions fail CI.
+
+    python -m scripts.benchmark_queries --seed --profiles 2000000 --participations 5000000
+    python -m scripts.benchmark_queries --repeat 20 --output query_plans.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import create_engine, func, select, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.db.schema import create_missing
+from app.models.alert import UserAlert
+from app.models.analytics import UserDashboardStats
+from app.models.platform import Campaign, CampaignParticipation, Platform
+from app.models.profile import PlatformProfile
+from app.models.twitter import TwitterEngagement, TwitterProfile
+from app.models.user import User, UserWallet
+from app.services.search import autocomplete_queries, campaign_search_query, profile_search_query
+
+# Small enough that a sequential scan is the right plan
+SMALL_TABLES = {"platforms", "schema_version"}
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO platforms (name, domain, is_active, crawler_config, created_at)
+    SELECT 'platform-' || i, 'platform' || i || '.example', true, '{}', now()
+    FROM generate_series(1, :platforms) i
+    """,
+    """
+    INSERT INTO users (id, username, email, subscription_tier, api_quota_remaining,
+                       is_active, created_at, updated_at, metadata)
+    SELECT gen_random_uuid(), 'user' || i, 'user' || i || '@example.com',
+           (ARRAY['free', 'free', 'free', 'pro', 'whale'])[1 + i % 5], 0, true, now(), now(), '{}'
+    FROM generate_series(1, :users) i
+    """,
+    """
+    INSERT INTO user_wallets (user_id, wallet_address, chain, is_primary, created_at)
+    SELECT id, '0x' || substr(md5(id::text) || md5(username), 1, 40), 'ethereum', true, now()
+    FROM users
+    """,
+    # Skewed towards the first platforms, like real crawl volumes
+    """
+    INSERT INTO campaigns (id, platform_id, external_id, name, description, campaign_type,
+                           total_participants, status, discovered_at, metadata)
+    SELECT gen_random_uuid(), 1 + floor(power(random(), 2) * :platforms)::int, 'c' || i,
+           'Campaign ' || i, 'Quest campaign number ' || i,
+           (ARRAY['quest', 'tournament', 'airdrop'])[1 + i % 3], 0,
+           CASE WHEN random() < 0.2 THEN 'active' WHEN random() < 0.1 THEN 'upcoming' ELSE 'ended' END,
+           now() - random() * interval '730 days', '{}'
+    FROM generate_series(1, :campaigns) i
+    """,
+    # One profile in twenty belongs to a registered wallet; 90% are ranked
+    """
+    INSERT INTO platform_profiles (id, user_wallet_id, platform_id, external_user_id, username,
+                                   display_name, total_points, twitter_handle, last_synced_at,
+                                   created_at, metadata)
+    SELECT gen_random_uuid(),
+           CASE WHEN i % 20 = 0 THEN 1 + (i / 20) % :users END,
+           1 + floor(power(random(), 2) * :platforms)::int, 'p' || i, 'player' || i, 'Player ' || i,
+           round((random() * 100000)::numeric, 2),
+           CASE WHEN i % 3 = 0 THEN 'handle' || (i % :twitter_profiles) END,
+           CASE WHEN random() < 0.9 THEN now() END, now(), '{}'
+    FROM generate_series(1, :profiles) i
+    """,
+    """
+    UPDATE platform_profiles p SET global_rank = r.rank
+    FROM (
+        SELECT id, row_number() OVER (PARTITION BY platform_id ORDER BY total_points DESC) AS rank
+        FROM platform_profiles WHERE last_synced_at IS NOT NULL
+    ) r
+    WHERE p.id = r.id
+    """,
+    """
+    INSERT INTO twitter_profiles (twitter_handle, display_name, followers_count, created_at)
+    SELECT 'handle' || i, 'Handle ' || i, (random() * 50000)::int, now()
+    FROM generate_series(0, :twitter_profiles - 1) i
+    """,
+    """
+    INSERT INTO twitter_engagement (twitter_profile_id, tweet_id, posted_at, likes_count, retweets_count,
+                                    replies_count, quotes_count, is_platform_related, created_at)
+    SELECT 1 + i % :twitter_profiles, 't' || i, now() - random() * interval '365 days',
+           (random() * 500)::int, (random() * 100)::int, (random() * 50)::int, (random() * 10)::int,
+           random() < 0.3, now()
+    FROM generate_series(1, :engagements) i
+    """,
+    "CREATE TEMP TABLE seed_campaigns AS SELECT row_number() OVER () AS n, id FROM campaigns",
+    "CREATE TEMP TABLE seed_profiles AS SELECT row_number() OVER () AS n, id FROM platform_profiles",
+    "CREATE TEMP TABLE seed_users AS SELECT row_number() OVER () AS n, id FROM users",
+    """
+    INSERT INTO campaign_participation (id, campaign_id, platform_profile_id, points_earned, rank,
+                                        quests_completed, metadata)
+    SELECT gen_random_uuid(), c.id, p.id, round((random() * 1000)::numeric, 2),
+           1 + g / :campaigns, (random() * 10)::int, '{}'
+    FROM generate_series(1, :participations) g
+    JOIN seed_campaigns c ON c.n = 1 + (g * 7919) % :campaigns
+    JOIN seed_profiles p ON p.n = 1 + (g * 104729) % :profiles
+    """,
+    """
+    INSERT INTO shill_scores (platform_profile_id, twitter_profile_id, score, calculated_at)
+    SELECT p.id, 1 + g % :twitter_profiles, round((random() * 100)::numeric, 2),
+           now() - random() * interval '90 days'
+    FROM generate_series(1, :profiles / 5) g
+    JOIN seed_profiles p ON p.n = 1 + (g * 31) % :profiles
+    """,
+    """
+    INSERT INTO roi_predictions (id, campaign_id, predicted_airdrop_value_usd, created_at, factors)
+    SELECT gen_random_uuid(), id, round((random() * 1000000)::numeric, 2),
+           now() - random() * interval '30 days', '{}'
+    FROM campaigns, generate_series(1, 2)
+    """,
+    """
+    INSERT INTO user_alerts (user_id, alert_type, priority, title, is_read, delivered_at, created_at)
+    SELECT u.id, 'new_campaign', 'medium', 'Alert ' || g, random() < 0.5,
+           CASE WHEN random() < 0.95 THEN now() END, now() - random() * interval '60 days'
+    FROM generate_series(1, :users * 10) g
+    JOIN seed_users u ON u.n = 1 + g % :users
+    """,
+]
+
+
+def seed(conn: Connection, counts: Dict[str, int]) -> None:
+    create_missing(conn)
+    if conn.scalar(select(func.count()).select_from(Campaign)):
+        sys.exit("Refusing to seed: the database already has campaigns")
+    for statement in SEED_STATEMENTS:
+        start = time.perf_counter()
+        conn.execute(text(statement), counts)
+        print(f"  {' '.join(statement.split()[:3]):40} {time.perf_counter() - start:8.1f}s")
+    conn.execute(text("ANALYZE"))
+
+
+def sample_params(conn: Connection) -> Dict[str, Any]:
+    """Representative parameters from the seeded data"""
+    platform_id = conn.scalar(
+        select(PlatformProfile.platform_id).group_by(PlatformProfile.platform_id)
+        .order_by(func.count().desc()).limit(1)
+    )
+    ranked = conn.scalar(select(func.count()).select_from(PlatformProfile).where(
+        PlatformProfile.platform_id == platform_id, PlatformProfile.global_rank.isnot(None)
+    ))
+    profile_id, profile_rank = conn.execute(
+        select(PlatformProfile.id, PlatformProfile.global_rank)
+        .where(PlatformProfile.platform_id == platform_id, PlatformProfile.global_rank == ranked // 2)
+    ).one()
+    user_id = conn.scalar(
+        select(UserWallet.user_id)
+        .join(PlatformProfile, PlatformProfile.user_wallet_id == UserWallet.id)
+        .limit(1)
+    )
+    wallets = conn.execute(select(UserWallet.id, UserWallet.wallet_address).where(UserWallet.user_id == user_id)).all()
+    last = conn.execute(
+        select(Campaign.discovered_at, Campaign.id)
+        .where(Campaign.status == 'active')
+        .order_by(Campaign.discovered_at.desc(), Campaign.id.desc()).offset(19).limit(1)
+    ).one()
+    return {
+        "platform_id": platform_id,
+        "profile_id": profile_id,
+        "profile_rank": profile_rank,
+        "user_id": user_id,
+        "wallet_ids": [w.id for w in wallets],
+        "wallet_address": wallets[0].wallet_address,
+        "email": conn.scalar(select(User.email).where(User.id == user_id)),
+        "campaign_id": conn.scalar(select(CampaignParticipation.campaign_id).limit(1)),
+        "cursor": (last.discovered_at, last.id),
+        "twitter_handle": conn.scalar(select(TwitterProfile.twitter_handle).limit(1)),
+    }
+
+
+def router_queries(p: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """(name, statement) for each query the routers issue, shaped as they build them"""
+    active = [Campaign.status == 'active']
+    on_platform = active + [Campaign.platform_id == p["platform_id"]]
+    ranked = [PlatformProfile.global_rank.isnot(None)]
+    board = ranked + [PlatformProfile.platform_id == p["platform_id"]]
+    newest = (Campaign.discovered_at.desc(), Campaign.id.desc())
+    return [
+        # platforms
+        ("platforms.list", select(Platform).where(Platform.is_active == True).offset(0).limit(100)),
+        # campaigns
+        ("campaigns.list", select(Campaign).where(*active).order_by(*newest).limit(21)),
+        ("campaigns.list_platform", select(Campaign).where(*on_platform).order_by(*newest).limit(21)),
+        ("campaigns.list_cursor", select(Campaign).where(
+            *active, tuple_(Campaign.discovered_at, Campaign.id) < p["cursor"]
+        ).order_by(*newest).limit(21)),
+        ("campaigns.count", select(func.count()).select_from(Campaign).where(*active)),
+        ("campaigns.count_platform", select(func.count()).select_from(Campaign).where(*on_platform)),
+        ("campaigns.get", select(Campaign).where(Campaign.id == p["campaign_id"])),
+        # analytics leaderboards (Postgres fallback of the Redis boards)
+        ("leaderboard.global", select(PlatformProfile).where(*ranked).order_by(PlatformProfile.global_rank).limit(100)),
+        ("leaderboard.platform", select(PlatformProfile).where(*board).order_by(PlatformProfile.global_rank).limit(100)),
+        ("leaderboard.position", select(func.count()).select_from(PlatformProfile).where(
+            *board, PlatformProfile.global_rank < p["profile_rank"]
+        )),
+        ("leaderboard.total", select(func.count()).select_from(PlatformProfile).where(*board)),
+        ("leaderboard.above", select(PlatformProfile).where(
+            *board, PlatformProfile.id != p["profile_id"], PlatformProfile.global_rank <= p["profile_rank"]
+        ).order_by(PlatformProfile.global_rank.desc()).limit(10)),
+        ("leaderboard.below", select(PlatformProfile).where(
+            *board, PlatformProfile.id != p["profile_id"], PlatformProfile.global_rank > p["profile_rank"]
+        ).order_by(PlatformProfile.global_rank).limit(10)),
+        ("analytics.dashboard_stats", select(UserDashboardStats).where(UserDashboardStats.user_id == p["user_id"])),
+        # profiles and users
+        ("profiles.me", select(PlatformProfile).options(selectinload(PlatformProfile.platform))
+            .where(PlatformProfile.user_wallet_id.in_(p["wallet_ids"]))),
+        ("users.wallets", select(UserWallet).where(UserWallet.user_id == p["user_id"])),
+        ("auth.login", select(User).where(User.email == p["email"])),
+        ("auth.wallet_login", select(UserWallet).where(UserWallet.wallet_address == p["wallet_address"])),
+        # alerts
+        ("alerts.list", select(UserAlert).where(UserAlert.user_id == p["user_id"])
+            .order_by(UserAlert.created_at.desc()).limit(50)),
+        ("alerts.list_unread", select(UserAlert).where(UserAlert.user_id == p["user_id"], UserAlert.is_read == False)
+            .order_by(UserAlert.created_at.desc()).limit(50)),
+        # exports (filtered; unfiltered exports read whole tables by design)
+        ("exports.leaderboard", select(PlatformProfile.id, PlatformProfile.global_rank).where(*board)
+            .order_by(PlatformProfile.platform_id, PlatformProfile.global_rank)),
+        ("exports.participation", select(CampaignParticipation.platform_profile_id, CampaignParticipation.rank)
+            .join(Campaign, Campaign.id == CampaignParticipation.campaign_id)
+            .where(CampaignParticipation.campaign_id == p["campaign_id"])
+            .order_by(CampaignParticipation.campaign_id, CampaignParticipation.rank)),
+        ("exports.engagement", select(TwitterEngagement.tweet_id, TwitterEngagement.posted_at)
+            .join(TwitterProfile, TwitterProfile.id == TwitterEngagement.twitter_profile_id)
+            .where(func.lower(TwitterProfile.twitter_handle) == p["twitter_handle"].lower())
+            .order_by(TwitterEngagement.posted_at)),
+        # search
+        ("search.campaigns", campaign_search_query("quest campaign 42")),
+        ("search.campaigns_fuzzy", campaign_search_query("campain 4217")),
+        ("search.profiles", profile_search_query("player4217")),
+        ("search.profiles_handle", profile_search_query("@handle42")),
+        *((f"search.autocomplete_{kind}", stmt) for kind, stmt in autocomplete_queries("pla")),
+    ]
+
+
+def seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Large tables a plan reads with a sequential scan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") not in SMALL_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+def measure(conn: Connection, statement, repeat: int) -> Dict[str, Any]:
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    sql = str(compiled)
+    explained = conn.exec_driver_sql(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, compiled.params
+    ).scalar()
+    plan = (json.loads(explained) if isinstance(explained, str) else explained)[0]
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.exec_driver_sql(sql, compiled.params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "sql": sql,
+        "p50_ms": statistics.median(timings),
+        "max_ms": max(timings),
+        "seq_scans": seq_scans(plan["Plan"]),
+        "plan": plan,
+    }
+
+
+def main(args) -> int:
+    from psycopg2.extras import register_uuid
+
+    # Parameters are passed to the driver as-is, including UUIDs
+    register_uuid()
+    engine = create_engine(args.database_url or settings.DATABASE_URL)
+    if args.seed:
+        counts = {
+            "platforms": args.platforms,
+            "users": args.users,
+            "campaigns": args.campaigns,
+            "profiles": args.profiles,
+            "participations": args.participations,
+            "twitter_profiles": args.twitter_profiles,
+            "engagements": args.engagements,
+        }
+        print(f"seeding {counts}")
+        with engine.begin() as conn:
+            seed(conn, counts)
+
+    report = {"recorded_at": datetime.utcnow().isoformat(), "queries": {}}
+    failures = []
+    with engine.connect() as conn:
+        params = sample_params(conn)
+        for name, statement in router_queries(params):
+            result = measure(conn, statement, args.repeat)
+            report["queries"][name] = result
+            flag = f"  SEQ SCAN {', '.join(result['seq_scans'])}" if result["seq_scans"] else ""
+            print(f"{name:28} p50 {result['p50_ms']:8.2f} ms  max {result['max_ms']:8.2f} ms{flag}")
+            if result["seq_scans"]:
+                failures.append(name)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    if failures:
+        print(f"\n{len(failures)} queries scan large tables sequentially: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    parser.add_argument("--seed", action="store_true", help="seed an empty database first")
+    parser.add_argument("--platforms", type=int, default=12)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--campaigns", type=int, default=100000)
+    parser.add_argument("--profiles", type=int, default=2000000)
+    parser.add_argument("--participations", type=int, default=5000000)
+    parser.add_argument("--twitter-profiles", type=int, default=200000)
+    parser.add_argument("--engagements", type=int, default=2000000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="write latencies and plans as JSON")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""
+Benchmark API worker startup
+
+Times ``import app.main`` in fresh interpreters and lists the slowest
+imports. With ``--lifespan`` it also times the startup half of the lifespan
+(schema check) against the configured database, next to a
+bare ``create_all`` as the previous startup path did.
+
+    python -m scripts.benchmark_startup --runs 5 --top 15 --lifespan
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_PROBE = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_imports(runs: int):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(top: int):
+    """(cumulative µs, module) of the slowest app modules and packages"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # App modules and top-level packages; submodules only add noise
+        name = name.strip()
+        if "." in name and not name.startswith("app."):
+            continue
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+async def time_lifespan() -> None:
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.main import app
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - start
+    print(f"lifespan startup  {ready * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(f"create_all        {(time.perf_counter() - start) * 1000:8.1f} ms")
+    await engine.dispose()
+
+
+def main(args) -> None:
+    samples = time_imports(args.runs)
+    print(f"import app.main   p50 {statistics.median(samples) * 1000:8.1f} ms  "
+          f"min {min(samples) * 1000:8.1f} ms  ({args.runs} runs)")
+
+    if args.top:
+        print("slowest imports (cumulative)")
+        for cumulative, name in slowest_imports(args.top):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.lifespan:
+        asyncio.run(time_lifespan())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--lifespan", action="store_true", help="also time startup against the database")
+    main(parser.parse_args())
@@ -0,0 +1,227 @@
+"""Alert digests, provider rate limiting and the email/Telegram senders against stub servers"""
+
+import asyncio
+import socket
+import time
+import uuid
+
+import httpx
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiosmtpd.controller import Controller
+
+import app.db.base  # noqa: F401  (configures the mappers)
+from app.config import settings
+from app.models.alert import UserAlert, UserAlertPreferences
+from app.services.alerts.delivery import TokenBucket, build_digests, render_digest, retry_delay
+from app.services.alerts.email import EmailSender
+from app.services.alerts.telegram import TelegramSender
+
+
+def _alert(id, user_id, title="Rank up", priority="medium"):
+    return UserAlert(id=id, user_id=user_id, title=title, message=None, priority=priority)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# build_digests
+
+def test_build_digests_coalesces_alerts_per_user_and_channel():
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    alerts = [_alert(1, alice), _alert(2, alice), _alert(3, bob)]
+    preferences = {alice: UserAlertPreferences(user_id=alice, email_enabled=True, telegram_enabled=True, telegram_chat_id="42")}
+    emails = {alice: "alice@example.com", bob: "bob@example.com"}
+
+    digests = build_digests(alerts, preferences, emails, {"email": object(), "telegram": object()})
+
+    by_key = {(d.user_id, d.channel): d for d in digests}
+    assert set(by_key) == {(alice, "email"), (alice, "telegram"), (bob, "email")}
+    assert [a.id for a in by_key[(alice, "email")].alerts] == [1, 2]
+    assert by_key[(alice, "telegram")].address == "42"
+
+
+def test_build_digests_respects_preferences_and_configured_senders():
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    alerts = [_alert(1, alice), _alert(2, bob)]
+    preferences = {
+        alice: UserAlertPreferences(user_id=alice, email_enabled=False, telegram_enabled=True, telegram_chat_id="42"),
+    }
+    emails = {alice: "alice@example.com", bob: None}
+
+    assert build_digests(alerts, preferences, emails, {"email": object()}) == []
+
+
+def test_build_digests_skips_channels_already_delivered():
+    alice = uuid.uuid4()
+    alerts = [_alert(1, alice), _alert(2, alice)]
+    preferences = {alice: UserAlertPreferences(user_id=alice, email_enabled=True, telegram_enabled=True, telegram_chat_id="42")}
+    emails = {alice: "alice@example.com"}
+    delivered = {(1, "email"), (2, "email"), (1, "telegram")}
+
+    digests = build_digests(alerts, preferences, emails, {"email": object(), "telegram": object()}, delivered)
+
+    assert [(d.channel, [a.id for a in d.alerts]) for d in digests] == [("telegram", [2])]
+
+
+def test_render_digest_puts_critical_alerts_first():
+    alice = uuid.uuid4()
+    digests = build_digests(
+        [_alert(1, alice, "Rank up"), _alert(2, alice, "Whale", "critical")],
+        {}, {alice: "alice@example.com"}, {"email": object()}
+    )
+
+    subject, body = render_digest(digests[0])
+
+    assert subject == "InfoFi: 2 new alerts"
+    assert body.splitlines() == ["- Whale", "- Rank up"]
+
+
+def test_retry_delay_doubles_after_each_failed_round(monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_DELIVERY_RETRY_SECONDS", 60)
+    assert [retry_delay(n).total_seconds() for n in (1, 2, 3)] == [60, 120, 240]
+
+
+# TokenBucket
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    start = time.monotonic()
+    await bucket.acquire()
+    await bucket.acquire()
+    burst = time.monotonic() - start
+    for _ in range(4):
+        await bucket.acquire()
+    paced = time.monotonic() - start
+
+    assert burst < 0.05
+    assert paced >= 4 / 20 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_serializes_concurrent_callers():
+    bucket = TokenBucket(rate=50, burst=1)
+
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+# EmailSender over SMTP
+
+class _SMTPHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = _SMTPHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "SENDGRID_API_KEY", None)
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    yield handler
+    controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_email_sender_sends_over_smtp(smtp_server):
+    sender = EmailSender()
+
+    await sender.send("alice@example.com", "InfoFi: 2 new alerts", "- Whale\n- Rank up")
+
+    assert sender.enabled
+    [envelope] = smtp_server.envelopes
+    assert envelope.rcpt_tos == ["alice@example.com"]
+    content = envelope.content.decode()
+    assert "Subject: InfoFi: 2 new alerts" in content
+    assert "- Whale" in content
+
+
+@pytest.mark.asyncio
+async def test_email_sender_raises_when_smtp_is_down(monkeypatch):
+    monkeypatch.setattr(settings, "SENDGRID_API_KEY", None)
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", _free_port())
+
+    with pytest.raises(OSError):
+        await EmailSender().send("alice@example.com", "Subject", "Body")
+
+
+# EmailSender over SendGrid and TelegramSender over HTTP
+
+@pytest_asyncio.fixture
+async def http_server():
+    requests = []
+    status = {"code": 200}
+
+    async def record(request):
+        requests.append((request.path, dict(request.headers), await request.json()))
+        return web.json_response({"ok": status["code"] == 200}, status=status["code"])
+
+    app = web.Application()
+    app.router.add_post("/{tail:.*}", record)
+    server = TestServer(app)
+    await server.start_server()
+    server.requests = requests
+    server.status = status
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_email_sender_posts_to_sendgrid(http_server, monkeypatch):
+    monkeypatch.setattr(settings, "SENDGRID_API_KEY", "sg-key")
+    monkeypatch.setattr(settings, "SENDGRID_API_URL", str(http_server.make_url("/v3/mail/send")))
+
+    async with httpx.AsyncClient() as client:
+        await EmailSender(client).send("alice@example.com", "Subject", "Body")
+
+    [(path, headers, payload)] = http_server.requests
+    assert path == "/v3/mail/send"
+    assert headers["Authorization"] == "Bearer sg-key"
+    assert payload["personalizations"] == [{"to": [{"email": "alice@example.com"}]}]
+    assert payload["content"] == [{"type": "text/plain", "value": "Body"}]
+
+
+@pytest.mark.asyncio
+async def test_telegram_sender_posts_to_bot_api(http_server, monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_TELEGRAM_ALERTS", True)
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", "123:abc")
+    monkeypatch.setattr(settings, "TELEGRAM_API_URL", str(http_server.make_url("")).rstrip("/"))
+
+    async with httpx.AsyncClient() as client:
+        sender = TelegramSender(client)
+        await sender.send("42", "Subject", "x" * 5000)
+
+    assert sender.enabled
+    [(path, _, payload)] = http_server.requests
+    assert path == "/bot123:abc/sendMessage"
+    assert payload["chat_id"] == "42"
+    assert payload["text"].startswith("Subject\n\n")
+    assert len(payload["text"]) == 4096
+
+
+@pytest.mark.asyncio
+async def test_telegram_sender_raises_on_api_error(http_server, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", "123:abc")
+    monkeypatch.setattr(settings, "TELEGRAM_API_URL", str(http_server.make_url("")).rstrip("/"))
+    http_server.status["code"] = 429
+
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await TelegramSender(client).send("42", "Subject", "Body")